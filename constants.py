@@ -23,10 +23,172 @@ DEFAULT_LIMIT = 50
 # - near_text requires vectorizer (text2vec-openai/google) which needs LLM API key
 # - hybrid combines BM25 + vector search, so needs LLM API key for vector component
 SEARCH_TYPES = {
-    "keyword": {"label": "🔤 Keyword Search (BM25)", "needs_llm": False},
-    "near_text": {"label": "📝 Near Text (Semantic)", "needs_llm": True},
-    "hybrid": {"label": "🔀 Hybrid Search", "needs_llm": True}
+    "keyword": {"label": "🔤 Keyword Search (BM25)", "needs_llm": False, "group_by": False},
+    "near_text": {"label": "📝 Near Text (Semantic)", "needs_llm": True, "group_by": True},
+    "hybrid": {"label": "🔀 Hybrid Search", "needs_llm": True, "group_by": True}
 }
 
 SEARCH_TYPES_LIST = list(SEARCH_TYPES.keys())
 DEFAULT_SEARCH_TYPE = "keyword"
+
+# Server-side group-by defaults, e.g. to collapse chunk hits into their documents
+GROUP_BY_DEFAULT_GROUPS = 10
+GROUP_BY_DEFAULT_OBJECTS = 3
+GROUP_VIEW_MAX_GROUPS = 100
+# Columns tagging grouped rows; property names cannot contain dots, so these never collide with one
+GROUP_COLUMN = ".group"
+GROUP_SIZE_COLUMN = ".group_size"
+
+# Average bytes per returned value, used to estimate result size before admitting a search
+ADMISSION_BYTES_PER_VALUE = 256
+
+# Rows per page when browsing stored results
+RESULT_PAGE_SIZES = [100, 500, 1000, 5000]
+
+# Pages reachable from the sidebar once connected; keys are module and function names in `pages`.
+# Offline pages also work on a local snapshot without a Weaviate connection.
+PAGES = {
+    "overview": {"label": "🗂️ Collections Overview"},
+    "home": {"label": "🔍 Data Explorer", "offline": True},
+    "compare": {"label": "⚖️ Compare Search Types"},
+    "evaluation": {"label": "🧪 Relevance Evaluation"},
+    "profiler": {"label": "🧬 Collection Profiler"},
+    "recall": {"label": "🎯 Index Recall"},
+    "duplicates": {"label": "👯 Near Duplicates"},
+    "diff": {"label": "🔀 Collection Diff"},
+    "loadtest": {"label": "🏋️ Load Test"},
+    "snapshots": {"label": "📦 Snapshots", "offline": True},
+    "memory": {"label": "🧠 Session Memory", "offline": True},
+}
+DEFAULT_PAGE = "overview"
+
+# Cross-reference expansion: inline resolves references inside the search query, batched fetches
+# the referenced objects once per target collection and caches them
+REFERENCE_MODES = {
+    "inline": "Inline (same query)",
+    "batched": "Batched lookup (cached)",
+}
+DEFAULT_REFERENCE_MODE = "inline"
+REFERENCE_DEPTH_MAX = 3
+REFERENCE_BATCH_SIZE = 500
+REFERENCE_CACHE_SIZE = 50000
+REFERENCE_CACHE_TTL = 300
+
+# "More like this" results cached per source object
+SIMILAR_CACHE_SIZE = 256
+SIMILAR_CACHE_TTL = 600
+
+# Collection configs and tenant lists cached per connection; schema changes show up after the TTL
+SCHEMA_CACHE_SIZE = 2000
+SCHEMA_CACHE_TTL = 60
+
+# Default grid and concurrency of the offline evaluation harness (utility/evaluation.py)
+EVAL_ALPHAS = [0.25, 0.5, 0.75]
+EVAL_LIMITS = [10, 50]
+EVAL_MAX_WORKERS = 4
+
+# Federated search fans out to at most this many sources at once
+FEDERATED_MAX_WORKERS = 8
+
+# Transport profiles for the Weaviate client. Timeouts are in seconds; pool settings size the
+# HTTP keep-alive connection pool. Select one on the connection page or with TRANSPORT_PROFILE.
+TRANSPORT_PROFILES = {
+    "default": {
+        "label": "⚖️ Default",
+        "timeout_init": 2, "timeout_query": 30, "timeout_insert": 90,
+        "pool_connections": 20, "pool_maxsize": 100, "pool_max_retries": 3, "pool_timeout": 5,
+    },
+    "lan": {
+        "label": "🏢 LAN (low latency)",
+        "timeout_init": 2, "timeout_query": 15, "timeout_insert": 60,
+        "pool_connections": 20, "pool_maxsize": 100, "pool_max_retries": 1, "pool_timeout": 5,
+    },
+    "wan": {
+        "label": "🌍 WAN (high latency)",
+        "timeout_init": 10, "timeout_query": 120, "timeout_insert": 300,
+        "pool_connections": 10, "pool_maxsize": 50, "pool_max_retries": 5, "pool_timeout": 30,
+    },
+    "bulk": {
+        "label": "📦 Bulk export",
+        "timeout_init": 5, "timeout_query": 600, "timeout_insert": 600,
+        "pool_connections": 4, "pool_maxsize": 20, "pool_max_retries": 3, "pool_timeout": 60,
+    },
+}
+DEFAULT_TRANSPORT_PROFILE = "default"
+TRANSPORT_PROBE_ROUNDS = 3
+
+# Background search jobs (utility/jobs.py): rows fetched per request, jobs listed per session,
+# and how often the job list refreshes while a job runs, in seconds
+JOB_PAGE_SIZE = 1000
+JOB_HISTORY_SIZE = 5
+JOB_POLL_INTERVAL = 1.0
+
+# Collection profiler (utility/profiler.py): sketch sizes, quantiles reported, objects per cursor
+# page and how often progress is shown
+PROFILE_RESERVOIR_SIZE = 1000
+PROFILE_HLL_PRECISION = 12
+PROFILE_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+PROFILE_SAMPLE_CHARS = 200
+PROFILE_PAGE_SIZE = 1000
+PROFILE_PROGRESS_EVERY = 2000
+PROFILE_DEFAULT_TIME_BUDGET = 60
+PROFILE_DEFAULT_OBJECT_BUDGET = 100000
+
+# Index recall diagnostics (utility/recall.py): neighbours compared, default sample and corpus cap,
+# block sizes of the local brute-force search, and the ef values of a sweep
+RECALL_K = 10
+RECALL_DEFAULT_QUERIES = 100
+RECALL_MAX_OBJECTS = 100000
+RECALL_QUERY_BLOCK = 256
+RECALL_CORPUS_BLOCK = 16384
+RECALL_EF_VALUES = [16, 32, 64, 128, 256]
+
+# Near-duplicate detection (utility/dedup.py): vectors per streamed chunk and per compared block,
+# the largest collection compared exhaustively, LSH banding (bands x bits per band) and result caps
+DEDUP_STREAM_CHUNK = 8192
+DEDUP_BLOCK_SIZE = 4096
+DEDUP_EXACT_MAX_OBJECTS = 50000
+DEDUP_BANDS = 16
+DEDUP_BAND_BITS = 12
+DEDUP_MAX_PAIRS = 1000000
+DEDUP_FETCH_BATCH = 500
+DEDUP_DEFAULT_THRESHOLD = 0.95
+
+# Collection diff (utility/diff.py): concurrent UUID range readers, objects per cursor page,
+# and the ids kept per kind of difference
+DIFF_READERS = 4
+DIFF_PAGE_SIZE = 1000
+DIFF_SAMPLE_SIZE = 100
+
+# Load generator (utility/loadgen.py): default rate (queries/s), worker threads and run length (s),
+# open-loop queries allowed to wait for a thread before being dropped, latency buckets (s), and the
+# longest run started from the UI
+LOADGEN_RATE = 10.0
+LOADGEN_CONCURRENCY = 8
+LOADGEN_DURATION = 30.0
+LOADGEN_MAX_BACKLOG = 1000
+LOADGEN_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LOADGEN_UI_MAX_DURATION = 300
+
+# Offline snapshots (utility/snapshot.py): objects per Parquet row group, snapshots kept open per
+# process, and the default row cap when browsing a snapshot in the Data Explorer
+SNAPSHOT_BATCH_SIZE = 10000
+SNAPSHOT_CACHE_SIZE = 4
+SNAPSHOT_DEFAULT_LIMIT = 10000
+
+# Memory profiling (utility/memprofile.py): stage measurements and RSS samples kept per process,
+# allocation sites listed, and the deepest container nesting followed when sizing session state
+MEMORY_STAGE_HISTORY = 1000
+MEMORY_RSS_HISTORY = 8640
+MEMORY_TOP_SITES = 25
+MEMORY_SIZE_DEPTH = 6
+
+# Collection overview (utility/overview.py): concurrent count requests per process, how long a
+# cached summary or count stays fresh (s), how long a page render waits for counts (s), how often it
+# polls for the rest (s), and the most active tenants counted for one multi-tenant collection
+OVERVIEW_MAX_WORKERS = 16
+OVERVIEW_CACHE_SIZE = 5000
+OVERVIEW_CACHE_TTL = 60
+OVERVIEW_DEADLINE = 0.8
+OVERVIEW_POLL_INTERVAL = 1.0
+OVERVIEW_MAX_TENANTS = 50
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,3 +14,58 @@ WEAVIATE_API_KEY = os.environ.get("WEAVIATE_API_KEY")
 MASTER_PASSWORD = os.environ.get("MASTER_PASSWORD")
 GRPC_PORT= os.environ.get("GRPC_PORT", "50051")
 GRPC_HOST= os.environ.get("GRPC_HOST", "localhost")
+
+# Per-session result memory budget; larger results are spilled to disk
+SESSION_MEMORY_BUDGET_MB = float(os.environ.get("SESSION_MEMORY_BUDGET_MB", "256"))
+SESSION_IDLE_TIMEOUT = int(os.environ.get("SESSION_IDLE_TIMEOUT", "1800"))
+SPILL_DIR = os.environ.get("SPILL_DIR", os.path.join(tempfile.gettempdir(), "weaviate-utility"))
+# Local Parquet snapshots of collections and results, browsable without a Weaviate connection
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", os.path.join(os.path.expanduser("~"), ".weaviate-utility", "snapshots"))
+
+# Opt-in memory profiling with tracemalloc (frames kept per allocation) and RSS sampling every MEMORY_RSS_INTERVAL seconds
+MEMORY_PROFILING = os.environ.get("MEMORY_PROFILING", "false").lower() == "true"
+MEMORY_PROFILE_FRAMES = int(os.environ.get("MEMORY_PROFILE_FRAMES", "5"))
+MEMORY_RSS_INTERVAL = float(os.environ.get("MEMORY_RSS_INTERVAL", "10"))
+
+# Record Weaviate responses (RESPONSE_RECORDING=record) and serve them without a cluster (replay).
+# REPLAY_LATENCY is "recorded" to wait as long as the recorded call took, or a fixed delay in ms.
+RESPONSE_RECORDING = os.environ.get("RESPONSE_RECORDING", "off").lower()
+RESPONSE_RECORDING_DIR = os.environ.get("RESPONSE_RECORDING_DIR", os.path.join(os.path.expanduser("~"), ".weaviate-utility", "recordings"))
+REPLAY_LATENCY = os.environ.get("REPLAY_LATENCY", "recorded").lower()
+
+# Background cluster health monitoring and circuit breaker
+HEALTH_CHECK_INTERVAL = float(os.environ.get("HEALTH_CHECK_INTERVAL", "5"))
+HEALTH_HISTORY_SIZE = int(os.environ.get("HEALTH_HISTORY_SIZE", "60"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get("CIRCUIT_RESET_TIMEOUT", "30"))
+
+# OpenMetrics endpoint scraped by Prometheus; served at http://METRICS_HOST:METRICS_PORT/metrics
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9464"))
+
+# Admission control shared by all sessions; per-user quotas apply to each browser session
+ADMISSION_MAX_CONCURRENT = int(os.environ.get("ADMISSION_MAX_CONCURRENT", "8"))
+ADMISSION_MAX_INFLIGHT_MB = float(os.environ.get("ADMISSION_MAX_INFLIGHT_MB", "512"))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "60"))
+USER_MAX_ROWS = int(os.environ.get("USER_MAX_ROWS", "100000"))
+USER_QUERIES_PER_MINUTE = int(os.environ.get("USER_QUERIES_PER_MINUTE", "30"))
+
+# Tracing: TRACE_EXPORTER is none, json (rotating file at TRACE_FILE) or otlp (OTLP/HTTP JSON collector).
+# TRACE_SAMPLE_RATE is the share of traces recorded, decided at each trace's root span.
+TRACE_EXPORTER = os.environ.get("TRACE_EXPORTER", "none").lower()
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0.1"))
+TRACE_SERVICE_NAME = os.environ.get("TRACE_SERVICE_NAME", "weaviate-utility")
+TRACE_FILE = os.environ.get("TRACE_FILE", os.path.join(tempfile.gettempdir(), "weaviate-utility", "traces.jsonl"))
+TRACE_FILE_MAX_MB = float(os.environ.get("TRACE_FILE_MAX_MB", "10"))
+TRACE_FILE_BACKUPS = int(os.environ.get("TRACE_FILE_BACKUPS", "5"))
+TRACE_OTLP_ENDPOINT = os.environ.get("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_BATCH_SIZE = int(os.environ.get("TRACE_BATCH_SIZE", "256"))
+
+# Transport profile and optional per-setting overrides (see TRANSPORT_PROFILES in constants.py)
+TRANSPORT_PROFILE = os.environ.get("TRANSPORT_PROFILE", "default")
+TRANSPORT_OVERRIDES = {
+    setting: float(os.environ[f"WEAVIATE_{setting.upper()}"])
+    for setting in ("timeout_init", "timeout_query", "timeout_insert", "pool_connections", "pool_maxsize", "pool_max_retries", "pool_timeout")
+    if os.environ.get(f"WEAVIATE_{setting.upper()}")
+}
@@ -1,2 +1 @@
-from pages.home import home # noqa
-from pages.connection import connection # noqa
+# Page modules are imported on first render by utility.startup.load_page
@@ -0,0 +1,113 @@
+import pandas as pd
+import streamlit as st
+
+from constants import DEFAULT_ALPHA, DEFAULT_FUSION, FUSION_TYPES, LIMIT_DEFAULT_VALUE, LIMIT_MAX_VALUE, LIMIT_MIN_VALUE, SEARCH_TYPES
+from utility.admission import AdmissionError, admission_slot
+from utility.base import convert_response_to_df
+from utility.compare import compare_search_types, overlap_metrics
+from utility.weaviate import get_session_weaviate
+
+def compare():
+    weaviate = get_session_weaviate()
+
+    st.markdown("### ⚖️ Compare Search Types")
+    st.caption("Runs one query with several search types in parallel and shows how much their results agree.")
+
+    # Vector search types need the LLM key given at login to embed the query
+    has_llm = bool(st.session_state.get("llm_api_key"))
+    available_types = [name for name, config in SEARCH_TYPES.items() if has_llm or not config["needs_llm"]]
+    if not has_llm:
+        st.info("ℹ️ Near Text and Hybrid need an LLM API key. Reconnect with one to compare them against Keyword search.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        class_name = st.selectbox("📊 Weaviate Class", options=weaviate.get_classes(), key="compare_class")
+    with col2:
+        search_types = st.multiselect(
+            "🔍 Search Types",
+            options=available_types,
+            default=available_types,
+            format_func=lambda x: SEARCH_TYPES[x]["label"],
+            key="compare_search_types"
+        )
+
+    if not class_name:
+        st.info("No classes found in this Weaviate instance.")
+        return
+
+    properties = st.multiselect(
+        "🏷️ Properties",
+        options=weaviate.get_properties(class_name),
+        key="compare_properties",
+        help="Leave empty to retrieve all properties"
+    )
+    prompt = st.text_input("🔍 Search Query", key="compare_prompt", placeholder="Enter the query to compare...")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        limit = st.number_input("📊 Top k", min_value=LIMIT_MIN_VALUE, max_value=LIMIT_MAX_VALUE, value=min(LIMIT_DEFAULT_VALUE, 50), key="compare_limit")
+    with col2:
+        alpha = st.slider("🎯 Alpha (Hybrid)", min_value=0.0, max_value=1.0, value=DEFAULT_ALPHA, step=0.01, key="compare_alpha")
+    with col3:
+        fusion = st.selectbox("🔀 Fusion (Hybrid)", options=FUSION_TYPES, index=FUSION_TYPES.index(DEFAULT_FUSION), key="compare_fusion")
+
+    if st.button("⚖️ Compare", type="primary", use_container_width=True, disabled=len(search_types) < 2 or not prompt):
+        with st.spinner(f"⚖️ Running {len(search_types)} search types in parallel..."):
+            properties = properties or weaviate.get_properties(class_name)
+            try:
+                with admission_slot(limit * len(search_types), len(properties)):
+                    st.session_state["compare_results"] = compare_search_types(
+                        weaviate,
+                        search_types,
+                        class_name=class_name,
+                        query=prompt,
+                        properties=properties,
+                        with_additional=["id", "score", "distance"],
+                        alpha=alpha,
+                        fusion=fusion,
+                        limit=limit
+                    )
+                st.session_state["compare_limit_used"] = limit
+            except AdmissionError as e:
+                st.warning(f"🚦 Comparison not admitted: {e}")
+
+    results = st.session_state.get("compare_results")
+    if not results:
+        return
+
+    k = st.session_state["compare_limit_used"]
+    st.markdown("---")
+    st.markdown("#### ⏱️ Latency and Cost")
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "search type": SEARCH_TYPES[search_type]["label"],
+                "latency (s)": outcome["latency"],
+                "results": len(outcome["rows"]),
+                "needs LLM embedding": SEARCH_TYPES[search_type]["needs_llm"],
+                "error": outcome["error"] or "",
+            }
+            for search_type, outcome in results.items()
+        ]),
+        hide_index=True,
+        use_container_width=True
+    )
+
+    ranked_ids = {SEARCH_TYPES[search_type]["label"]: [row["id"] for row in outcome["rows"]] for search_type, outcome in results.items()}
+    jaccard, spearman = overlap_metrics(ranked_ids, k)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(f"#### 🔗 Jaccard@{k}")
+        st.dataframe(jaccard.style.format("{:.2f}"), use_container_width=True)
+    with col2:
+        st.markdown(f"#### 📐 Rank Correlation (Spearman@{k})")
+        st.dataframe(spearman.style.format("{:.2f}"), use_container_width=True)
+
+    st.markdown("#### 📊 Results Side by Side")
+    for column, (search_type, outcome) in zip(st.columns(len(results)), results.items()):
+        with column:
+            st.markdown(f"**{SEARCH_TYPES[search_type]['label']}** · {outcome['latency']:.2f}s")
+            if outcome["error"]:
+                st.error(outcome["error"])
+            else:
+                st.dataframe(convert_response_to_df(outcome["rows"]), hide_index=True, use_container_width=True, height=500)
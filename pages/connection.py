@@ -1,6 +1,8 @@
 import streamlit as st
-from utility.weaviate import Weaviate
-from constants import SEARCH_TYPES, DEFAULT_SEARCH_TYPE
+from utility.startup import timed_import
+from utility.transport import probe_profile, resolve_profile
+from constants import SEARCH_TYPES, DEFAULT_SEARCH_TYPE, DEFAULT_TRANSPORT_PROFILE, TRANSPORT_PROFILES
+from env import TRANSPORT_PROFILE
 
 def connection():
     st.markdown(
@@ -78,7 +80,7 @@ def connection():
             "API Key", 
             type="password", 
             placeholder="Your Weaviate API Key",
-            help="Enter your Weaviate API key for authentication",
+            help="Enter your Weaviate API key for authentication; leave empty for clusters without authentication",
             key="manual_api_key"
         )
         
@@ -125,14 +127,53 @@ def connection():
             llm_provider = None
             llm_api_key = None
 
+        st.markdown("#### 🚦 Transport Profile")
+        transport_profile = st.selectbox(
+            "Transport Profile",
+            options=list(TRANSPORT_PROFILES.keys()),
+            format_func=lambda x: TRANSPORT_PROFILES[x]["label"],
+            index=list(TRANSPORT_PROFILES.keys()).index(TRANSPORT_PROFILE) if TRANSPORT_PROFILE in TRANSPORT_PROFILES else 0,
+            help="Timeouts and connection pool sizes used by the Weaviate client. WEAVIATE_TIMEOUT_* and WEAVIATE_POOL_* environment variables override individual settings.",
+            key="manual_transport_profile"
+        )
+
+        with st.expander("📡 Profile settings and latency probe"):
+            settings = [name for name in resolve_profile(DEFAULT_TRANSPORT_PROFILE) if name != "label"]
+            st.markdown(
+                "| Setting | " + " | ".join(TRANSPORT_PROFILES) + " |\n"
+                + "|---" * (len(TRANSPORT_PROFILES) + 1) + "|\n"
+                + "\n".join(
+                    f"| {setting} | " + " | ".join(f"{resolve_profile(name)[setting]:g}" for name in TRANSPORT_PROFILES) + " |"
+                    for setting in settings
+                )
+            )
+            if st.button("📡 Probe all profiles", use_container_width=True, disabled=not host):
+                Weaviate = timed_import("utility.weaviate").Weaviate
+                probes = []
+                with st.spinner("📡 Measuring handshake and query latency..."):
+                    for name in TRANSPORT_PROFILES:
+                        try:
+                            probes.append(probe_profile(Weaviate(
+                                weaviate_host=host,
+                                weaviate_port=port or "8080",
+                                weaviate_api_key=api_key,
+                                llm_provider=llm_provider,
+                                llm_api_key=llm_api_key,
+                                transport_profile=name
+                            )))
+                        except Exception as e:
+                            probes.append({"profile": name, "error": f"{type(e).__name__}: {e}"})
+                st.dataframe(probes, hide_index=True, use_container_width=True)
+                st.caption("Median of several rounds. Handshake covers client creation and the readiness check; query is a one-object gRPC fetch.")
+
         st.markdown("---")
         
         # Connection button with loading state
         if st.button("🔧 Connect to Weaviate", use_container_width=True, type="primary"):
             with st.spinner("🔄 Establishing connection..."):
                 # Validation
-                if not host or not api_key:
-                    st.error("❌ Please provide both host and API key!")
+                if not host:
+                    st.error("❌ Please provide the host!")
                     st.stop()
                 if not port:
                     port = "8080"  # Default port
@@ -146,12 +187,14 @@ def connection():
 
                 # Test connection
                 try:
+                    Weaviate = timed_import("utility.weaviate").Weaviate
                     weaviate_client = Weaviate(
                         weaviate_host=host, 
                         weaviate_port=port, 
                         weaviate_api_key=api_key,
                         llm_provider=llm_provider,
-                        llm_api_key=llm_api_key
+                        llm_api_key=llm_api_key,
+                        transport_profile=transport_profile
                     )
                     if weaviate_client.connect():
                         st.session_state['host'] = host
@@ -160,7 +203,9 @@ def connection():
                         st.session_state['search_type'] = st.session_state.get('manual_search_type', DEFAULT_SEARCH_TYPE)
                         st.session_state['llm_provider'] = llm_provider
                         st.session_state['llm_api_key'] = llm_api_key
+                        st.session_state['transport_profile'] = transport_profile
                         st.session_state['connection_type'] = "Manual Connection"
+                        st.session_state['offline_snapshot'] = None
                         st.session_state['authenticated'] = True
                         
                         st.success("✅ Successfully connected to Weaviate!")
@@ -177,6 +222,25 @@ def connection():
                 except Exception as e:
                     st.error(f"❌ Connection error: {str(e)}")
 
+        # Snapshots saved earlier can be explored without any cluster
+        with st.expander("📦 Work offline on a snapshot"):
+            snapshots = timed_import("utility.snapshot_catalog").list_snapshots()
+            if snapshots:
+                manifests = {manifest["name"]: manifest for manifest in snapshots}
+                snapshot_name = st.selectbox(
+                    "Snapshot",
+                    options=list(manifests),
+                    format_func=lambda name: f"{name} · {manifests[name]['source']} · {manifests[name]['rows']:,} rows · {manifests[name]['created']}",
+                    key="offline_snapshot_name"
+                )
+                if st.button("📦 Open snapshot", use_container_width=True):
+                    st.session_state['offline_snapshot'] = snapshot_name
+                    st.session_state['connection_type'] = "Offline Snapshot"
+                    st.session_state['authenticated'] = True
+                    st.rerun()
+            else:
+                st.caption("No snapshots yet. Save a collection or a search result from the 📦 Snapshots page or the Export tab while connected.")
+
     # Footer with features
     st.markdown("---")
     st.markdown("### ✨ Features")
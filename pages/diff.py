@@ -0,0 +1,121 @@
+from datetime import datetime
+
+import streamlit as st
+
+from constants import DIFF_READERS, DIFF_SAMPLE_SIZE
+from utility.diff import diff_collections, property_names
+from utility.metrics import EXPORT_BYTES
+from utility.tracing import span
+from utility.weaviate import Weaviate, get_session_weaviate
+
+
+def diff():
+    weaviate = get_session_weaviate()
+
+    st.markdown("### 🔀 Collection Diff")
+    st.caption(
+        "Verifies a reindex or migration: both collections are streamed in UUID order and merge-joined on their ids, "
+        "comparing a hash of each object's properties and, optionally, vectors. Neither collection is held in memory. "
+        "For scripted checks run `python -m utility.diff`."
+    )
+
+    classes = weaviate.get_classes()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### 📤 Source")
+        source_class = st.selectbox("📊 Weaviate Class", options=classes, key="diff_source_class")
+        source_tenants = weaviate.get_tenants(source_class) if source_class else []
+        source_tenant = st.selectbox("🏢 Tenant", options=source_tenants, key="diff_source_tenant") if source_tenants else None
+    with col2:
+        st.markdown("#### 📥 Target")
+        other_cluster = st.toggle("Another cluster", key="diff_other_cluster")
+        if other_cluster:
+            target_host = st.text_input("Host", key="diff_target_host")
+            target_port = st.text_input("Port", placeholder="8080", key="diff_target_port")
+            target_api_key = st.text_input("API Key", type="password", key="diff_target_api_key")
+            target_class = st.text_input("Class", value=source_class or "", key="diff_target_class_name")
+            target_tenant = st.text_input("Tenant", value=source_tenant or "", key="diff_target_tenant_name") or None
+        else:
+            target_class = st.selectbox("📊 Weaviate Class", options=classes, key="diff_target_class")
+            target_tenants = weaviate.get_tenants(target_class) if target_class else []
+            target_tenant = st.selectbox("🏢 Tenant", options=target_tenants, key="diff_target_tenant") if target_tenants else None
+    if not source_class:
+        st.info("No classes found in this Weaviate instance.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        properties = st.multiselect("🏷️ Properties", options=weaviate.get_properties(source_class), key="diff_properties",
+                                    help="Leave empty to compare every property both collections share")
+    with col2:
+        readers = st.number_input("🧵 Range readers", min_value=1, max_value=32, value=DIFF_READERS, key="diff_readers")
+    with col3:
+        include_vectors = st.checkbox("🧭 Compare vectors", key="diff_vectors", help="Vectors differ after a vectorizer change")
+
+    ready = bool(target_class) and (not other_cluster or (target_host and target_api_key))
+    if st.button("🔀 Compare", type="primary", use_container_width=True, disabled=not ready):
+        target_weaviate = weaviate
+        progress = st.empty()
+        try:
+            if other_cluster:
+                target_weaviate = Weaviate(
+                    weaviate_host=target_host,
+                    weaviate_port=target_port or "8080",
+                    weaviate_api_key=target_api_key,
+                    llm_provider=None,
+                    llm_api_key=None,
+                    transport_profile=st.session_state.get("transport_profile")
+                )
+                # Without connect()'s step-by-step messages; failures surface below
+                target_weaviate.client = target_weaviate.create_client()
+            source = weaviate.client.collections.get(source_class)
+            target = target_weaviate.client.collections.get(target_class)
+            if source_tenant:
+                source = source.with_tenant(source_tenant)
+            if target_tenant:
+                target = target.with_tenant(target_tenant)
+            if properties:
+                missing = [name for name in properties if name not in property_names(target)]
+                if missing:
+                    raise ValueError(f"the target has no property {', '.join(missing)}")
+            with span("diff_collections", source=source_class, target=target_class, readers=readers, vectors=include_vectors):
+                st.session_state["diff_result"] = diff_collections(
+                    source, target, properties or None, include_vectors, readers, DIFF_SAMPLE_SIZE,
+                    on_progress=lambda scanned, target_scanned: progress.info(f"📡 Scanned {scanned:,} source and {target_scanned:,} target objects...")
+                )
+        except Exception as e:
+            st.error(f"Diff failed: {e}")
+        finally:
+            if target_weaviate is not weaviate:
+                target_weaviate.close()
+        progress.empty()
+
+    report = st.session_state.get("diff_result")
+    if report is None:
+        return
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Source objects", f"{report.source_count:,}")
+    col2.metric("Target objects", f"{report.target_count:,}")
+    col3.metric("Missing in target", f"{report.counts['missing']:,}")
+    col4.metric("Extra in target", f"{report.counts['extra']:,}")
+    col5.metric("Changed", f"{report.counts['changed']:,}")
+    st.caption(
+        f"{len(report.properties)} properties{' and vectors' if report.include_vectors else ''} compared · "
+        f"{report.ranges} range readers · {report.elapsed:.1f}s"
+    )
+    for side, label in (("only_source", "source"), ("only_target", "target")):
+        if report.schema[side]:
+            st.warning(f"Properties only in the {label}, not compared: {', '.join(report.schema[side])}")
+    if report.identical:
+        st.success("✅ Both collections hold the same objects.")
+        return
+
+    st.markdown("#### 🔎 Sampled Differences")
+    st.caption(f"Up to {DIFF_SAMPLE_SIZE} ids per kind, in UUID order.")
+    rows = report.sample_rows()
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+    csv = rows.to_csv(index=False)
+    EXPORT_BYTES.inc(len(csv.encode()), format="csv")
+    st.download_button("📥 Download CSV", data=csv, file_name=f"diff_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                       mime="text/csv", use_container_width=True)
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import streamlit as st
+
+from constants import DEDUP_DEFAULT_THRESHOLD, DEDUP_EXACT_MAX_OBJECTS, DEDUP_MAX_PAIRS
+from utility.dedup import METHODS, find_duplicates, report_rows
+from utility.metrics import EXPORT_BYTES
+from utility.recall import vector_names
+from utility.tracing import span
+from utility.weaviate import get_session_weaviate
+
+
+def duplicates():
+    weaviate = get_session_weaviate()
+
+    st.markdown("### 👯 Near Duplicates")
+    st.caption(
+        "Streams a collection's vectors to a disk-backed matrix and clusters objects whose cosine similarity "
+        f"reaches the threshold. Up to {DEDUP_EXACT_MAX_OBJECTS:,} vectors are compared exhaustively, larger "
+        "collections with LSH bucketing. For very large collections run `python -m utility.dedup` instead."
+    )
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        class_name = st.selectbox("📊 Weaviate Class", options=weaviate.get_classes(), key="dedup_class")
+    if not class_name:
+        st.info("No classes found in this Weaviate instance.")
+        return
+    collection = weaviate.client.collections.get(class_name)
+    tenants = weaviate.get_tenants(class_name)
+    with col2:
+        if tenants:
+            collection = collection.with_tenant(st.selectbox("🏢 Tenant", options=tenants, key="dedup_tenant"))
+    with col3:
+        target_vector = st.selectbox("🧭 Vector", options=vector_names(collection), format_func=lambda name: name or "default", key="dedup_vector")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        threshold = st.slider("🎯 Cosine similarity ≥", min_value=0.80, max_value=1.0, value=DEDUP_DEFAULT_THRESHOLD, step=0.005, key="dedup_threshold")
+    with col2:
+        method = st.radio("Method", options=METHODS, horizontal=True, key="dedup_method",
+                          help="LSH compares only vectors that share a signature band, so it can miss a few pairs")
+    with col3:
+        max_objects = st.number_input("📦 Max vectors (0 = all)", min_value=0, value=0, step=10000, key="dedup_max_objects")
+    display_properties = st.multiselect("🏷️ Display properties", options=weaviate.get_properties(class_name), key="dedup_display")
+
+    if st.button("👯 Find duplicates", type="primary", use_container_width=True):
+        progress = st.progress(0.0, text="Streaming vectors...")
+
+        def on_progress(stage, done, total):
+            if stage == "stream":
+                progress.progress(min(1.0, done / total) if total else 0.0, text=f"Streaming vectors: {done:,}")
+            else:
+                progress.progress(done / total, text=f"Comparing: {done} of {total}")
+
+        try:
+            with span("find_duplicates", collection=class_name, threshold=threshold, method=method):
+                report = find_duplicates(collection, threshold, target_vector, method, max_objects or None, on_progress=on_progress)
+                rows = report_rows(collection, report, display_properties)
+            st.session_state["dedup_result"] = (report, rows)
+        except Exception as e:
+            st.error(f"Duplicate search failed: {e}")
+        progress.empty()
+
+    result = st.session_state.get("dedup_result")
+    if result is None:
+        return
+    report, rows = result
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Objects scanned", f"{len(report.ids):,}")
+    col2.metric("Clusters", f"{len(report.clusters):,}")
+    col3.metric("Removable duplicates", f"{report.duplicates:,}")
+    col4.metric("Time", f"{report.elapsed:.1f}s")
+    st.caption(f"Method: {report.method} · threshold {report.threshold:g} · {report.pairs:,} similar pairs")
+    if report.truncated:
+        st.warning(f"Only the {DEDUP_MAX_PAIRS:,} most similar pairs were kept; raise the threshold for a complete result.")
+    if rows.empty:
+        st.success("✅ No near duplicates found.")
+        return
+
+    st.markdown("#### 🗂️ Clusters")
+    st.caption("The first object seen in each cluster is marked keep; similarity is measured against it.")
+    clusters = sorted(rows["cluster"].unique())
+    selected = st.multiselect("Show clusters", options=clusters, key="dedup_clusters", help="Leave empty to show all")
+    st.dataframe(
+        rows[rows["cluster"].isin(selected)] if selected else rows,
+        hide_index=True,
+        use_container_width=True,
+        column_config={"similarity": st.column_config.ProgressColumn("Similarity", min_value=report.threshold, max_value=1, format="%.4f")}
+    )
+
+    col1, col2 = st.columns(2)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    with col1:
+        csv = rows.to_csv(index=False)
+        EXPORT_BYTES.inc(len(csv.encode()), format="csv")
+        st.download_button("📥 Download CSV", data=csv, file_name=f"duplicates_{stamp}.csv", mime="text/csv", use_container_width=True)
+    with col2:
+        json_data = rows.to_json(orient="records", indent=2)
+        EXPORT_BYTES.inc(len(json_data.encode()), format="json")
+        st.download_button("📄 Download JSON", data=json_data, file_name=f"duplicates_{stamp}.json", mime="application/json", use_container_width=True)
@@ -0,0 +1,107 @@
+import json
+
+import streamlit as st
+
+from constants import EVAL_ALPHAS, EVAL_LIMITS, EVAL_MAX_WORKERS, FUSION_TYPES, SEARCH_TYPES
+from utility.evaluation import QUALITY_METRICS, ResultCache, build_grid, build_report, frontier_chart, load_qrels, pareto_frontier, run_grid, summarize
+from utility.weaviate import get_session_weaviate
+
+UUID_OPTION = "(object UUID)"
+
+def evaluation():
+    weaviate = get_session_weaviate()
+
+    st.markdown("### 🧪 Relevance Evaluation")
+    st.caption(
+        "Scores search configurations against labeled queries (qrels) and plots quality against latency. "
+        "Headless: `python -m utility.evaluation --help`."
+    )
+
+    # Configurations that already ran are reused when the grid is extended
+    if "evaluation_cache" not in st.session_state:
+        st.session_state["evaluation_cache"] = ResultCache()
+
+    uploaded = st.file_uploader("📄 Relevance judgments (CSV or JSONL: query_id, query, doc_id, relevance)", type=["csv", "jsonl", "json"])
+    if uploaded is None:
+        st.info("Upload a qrels file to start.")
+        return
+    try:
+        qrels = load_qrels(uploaded)
+    except Exception as e:
+        st.error(f"Could not read qrels: {str(e)}")
+        return
+    st.success(f"✅ {len(qrels)} queries with {sum(len(entry['relevant']) for entry in qrels.values())} relevant documents")
+
+    has_llm = bool(st.session_state.get("llm_api_key"))
+    available_types = [name for name, config in SEARCH_TYPES.items() if has_llm or not config["needs_llm"]]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        class_name = st.selectbox("📊 Weaviate Class", options=weaviate.get_classes(), key="evaluation_class")
+    with col2:
+        id_property = st.selectbox(
+            "🔑 doc_id refers to",
+            options=[UUID_OPTION] + (weaviate.get_properties(class_name) if class_name else []),
+            key="evaluation_id_property"
+        )
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        search_types = st.multiselect("🔍 Search Types", options=available_types, default=available_types, format_func=lambda x: SEARCH_TYPES[x]["label"], key="evaluation_search_types")
+    with col2:
+        alphas = st.multiselect("🎯 Alphas", options=[round(step * 0.05, 2) for step in range(21)], default=EVAL_ALPHAS, key="evaluation_alphas")
+    with col3:
+        fusions = st.multiselect("🔀 Fusions", options=FUSION_TYPES, default=FUSION_TYPES, key="evaluation_fusions")
+    with col4:
+        limits = st.multiselect("📊 Limits", options=sorted({5, 10, 20, 50, 100, 200, *EVAL_LIMITS}), default=EVAL_LIMITS, key="evaluation_limits")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        max_workers = st.slider("⚙️ Concurrent queries", min_value=1, max_value=32, value=EVAL_MAX_WORKERS, key="evaluation_workers")
+    with col2:
+        quality = st.selectbox("📈 Frontier quality metric", options=QUALITY_METRICS, index=QUALITY_METRICS.index("ndcg"), key="evaluation_quality")
+
+    grid = build_grid(search_types, alphas or [EVAL_ALPHAS[0]], fusions or [FUSION_TYPES[0]], limits)
+    st.caption(f"{len(grid)} configurations × {len(qrels)} queries")
+
+    if st.button("🧪 Run evaluation", type="primary", use_container_width=True, disabled=not grid or not class_name):
+        progress_bar = st.progress(0.0)
+
+        def progress(done, total):
+            progress_bar.progress(done / total if total else 1.0, text=f"{done}/{total} queries")
+
+        runs = run_grid(
+            weaviate,
+            class_name,
+            qrels,
+            grid,
+            id_property=None if id_property == UUID_OPTION else id_property,
+            max_workers=max_workers,
+            cache=st.session_state["evaluation_cache"],
+            progress=progress
+        )
+        st.session_state["evaluation_summary"] = summarize(qrels, grid, runs)
+        st.session_state["evaluation_report_meta"] = (class_name, qrels)
+
+    summary = st.session_state.get("evaluation_summary")
+    if summary is None:
+        return
+
+    if summary["errors"].sum():
+        st.warning(f"⚠️ {int(summary['errors'].sum())} queries failed and were left out of the metrics")
+
+    st.plotly_chart(frontier_chart(summary, quality), use_container_width=True)
+    st.dataframe(
+        summary.assign(frontier=pareto_frontier(summary, quality)).sort_values(quality, ascending=False),
+        hide_index=True,
+        use_container_width=True
+    )
+
+    class_name, qrels = st.session_state["evaluation_report_meta"]
+    st.download_button(
+        label="📥 Download report (JSON)",
+        data=json.dumps(build_report(class_name, qrels, summary, quality), indent=2),
+        file_name="evaluation_report.json",
+        mime="application/json",
+        use_container_width=True
+    )
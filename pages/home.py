@@ -1,46 +1,32 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
-import json
 
-from constants import ADDITIONALS, FUSION_TYPES, LIMIT_MAX_VALUE, LIMIT_DEFAULT_VALUE, LIMIT_MIN_VALUE, SEARCH_TYPES, DEFAULT_SEARCH_TYPE
-from utility.base import convert_response_to_df
-from utility.weaviate import Weaviate
+from constants import ADDITIONALS, FUSION_TYPES, LIMIT_MAX_VALUE, LIMIT_DEFAULT_VALUE, LIMIT_MIN_VALUE, SEARCH_TYPES, DEFAULT_SEARCH_TYPE, RESULT_PAGE_SIZES, FEDERATED_MAX_WORKERS, REFERENCE_MODES, DEFAULT_REFERENCE_MODE, REFERENCE_DEPTH_MAX, GROUP_BY_DEFAULT_GROUPS, GROUP_BY_DEFAULT_OBJECTS, GROUP_VIEW_MAX_GROUPS, GROUP_COLUMN, GROUP_SIZE_COLUMN, JOB_POLL_INTERVAL, SNAPSHOT_DEFAULT_LIMIT
+from env import HEALTH_CHECK_INTERVAL
+from utility.admission import AdmissionError, admission_slot
+from utility.base import convert_response_to_df, get_session_id
+from utility.federated import federated_query
+from utility.health import CircuitOpenError, get_monitor, latency_sparkline
+from utility.jobs import SearchJob, submit_job
+from utility.memory import ResultStore
+from utility.memprofile import profile_memory
+from utility.metrics import EXPORT_BYTES
+from utility.profiler import collection_properties
+from utility.snapshot import AGGREGATIONS, FILTER_OPERATORS, default_snapshot_name, open_snapshot, save_result, sql_available
+from utility.startup import timed_import, timed_section
+from utility.tracing import span, start_search, traced
+from utility.weaviate import get_session_weaviate
 
-def home():
-    # st.set_page_config(layout='wide')
-
-    # Initialize session state variables
-    session_vars = {
-        "properties_options": [],
-        "properties_disabled": True,
-        "properties_default": [],
-        "df": pd.DataFrame(),
-        "show_table": True,
-        "search_history": [],
-        "query_stats": {"total_queries": 0, "avg_response_time": 0},
-        "selected_visualization": "line"
-    }
-    
-    for var, default in session_vars.items():
-        if var not in st.session_state:
-            st.session_state[var] = default
-
-    # Initialize Weaviate client
-    weaviate = Weaviate(
-        weaviate_host=st.session_state['host'], 
-        weaviate_port=st.session_state['port'], 
-        weaviate_api_key=st.session_state['api_key'],
-        llm_provider=st.session_state.get('llm_provider', 'OpenAI'),
-        llm_api_key=st.session_state.get('llm_api_key')
-    )
-    weaviate.connect()
-
-    # Header with search type indicator
+@st.fragment(run_every=HEALTH_CHECK_INTERVAL)
+def cluster_header(monitor):
+    """Header with search mode, security and live cluster health; refreshes on its own"""
     current_search_type = st.session_state.get("search_type", DEFAULT_SEARCH_TYPE)
     llm_provider = st.session_state.get("llm_provider")
+    cluster_state = monitor.breaker.state
+    cluster_color = {"closed": "#4CAF50", "half_open": "#FF9800", "open": "#f44336"}[cluster_state]
+    cluster_latency = monitor.latest_latency()
+    cluster_label = "Unhealthy" if cluster_state == "open" else (f"{cluster_latency:.0f} ms" if cluster_latency is not None else "checking...")
     
     # Create header with search mode and security indicator
     header_html = f"""
@@ -54,6 +40,11 @@ def home():
                 <div style="background: rgba(76, 175, 80, 0.2); padding: 0.5rem 1rem; border-radius: 8px; border: 1px solid #4CAF50;">
                     <span style="color: #4CAF50; font-weight: 600;">Search: {SEARCH_TYPES[current_search_type]['label']}</span>
                 </div>
+                <div style="background: rgba(45, 45, 45, 0.6); padding: 0.5rem 1rem; border-radius: 8px; border: 1px solid {cluster_color};"
+                     title="Cluster round-trip latency, sampled every {monitor.interval:.0f}s">
+                    <span style="color: {cluster_color}; font-weight: 600;">Cluster: {cluster_label}</span>
+                    {latency_sparkline(monitor.samples, color=cluster_color)}
+                </div>
     """
     
     # Add security badge if LLM is being used
@@ -72,6 +63,61 @@ def home():
     
     st.markdown(header_html, unsafe_allow_html=True)
 
+def snapshot_header(snapshot):
+    """Header shown instead of the cluster header when working offline on a snapshot"""
+    manifest = snapshot.manifest
+    tenant = f" / {manifest['tenant']}" if manifest.get("tenant") else ""
+    st.markdown(f"""
+    <div style="background: linear-gradient(135deg, #2d2d2d 0%, #404040 100%); 
+         padding: 1rem 1.5rem; border-radius: 10px; border: 1px solid #555555; margin-bottom: 1rem;">
+        <div style="display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap; gap: 1rem;">
+            <div>
+                <span style="font-size: 1.2rem; font-weight: 600; color: #ffffff;">🔍 Weaviate Data Explorer</span>
+            </div>
+            <div style="background: rgba(255, 152, 0, 0.2); padding: 0.5rem 1rem; border-radius: 8px; border: 1px solid #FF9800;"
+                 title="Frozen copy taken {manifest['created']}; queries run locally">
+                <span style="color: #FF9800; font-weight: 600;">📦 Offline: {snapshot.name} · {manifest['source']}{tenant} · {snapshot.num_rows:,} rows</span>
+            </div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+def home():
+    # st.set_page_config(layout='wide')
+
+    # Initialize session state variables
+    session_vars = {
+        "properties_options": [],
+        "properties_disabled": True,
+        "properties_default": [],
+        "result": None,
+        "show_table": True,
+        "search_history": [],
+        "query_stats": {"total_queries": 0, "avg_response_time": 0},
+        "selected_visualization": "line",
+        "tenant_options": {},
+        "reference_options": {},
+        "federated_stats": None,
+        "search_messages": [],
+        "search_jobs": [],
+        "shown_job": None
+    }
+    
+    for var, default in session_vars.items():
+        if var not in st.session_state:
+            st.session_state[var] = default
+
+    offline = st.session_state.get("offline_snapshot")
+    if offline:
+        # A local snapshot stands in for the cluster; queries run in Arrow on this machine
+        weaviate = None
+        snapshot = open_snapshot(offline)
+        snapshot_header(snapshot)
+    else:
+        # Initialize Weaviate client
+        weaviate = get_session_weaviate()
+        cluster_header(get_monitor(weaviate))
+
     # Helper functions
     def handle_class_selection():
         selected_class = st.session_state.get("weaviate_class")
@@ -80,6 +126,7 @@ def home():
         else:
             st.session_state["properties_disabled"] = True
 
+    @traced("update_properties")
     def update_properties():
         selected_class = st.session_state["weaviate_class"]
         if selected_class == "Select a class":
@@ -91,6 +138,13 @@ def home():
                 collection = weaviate.client.collections.get(selected_class)
                 collection_config = collection.config.get()
                 properties = [prop.name for prop in collection_config.properties]
+                st.session_state["reference_options"] = {
+                    ref.name: {
+                        "targets": list(ref.target_collections),
+                        "properties": list(dict.fromkeys(prop for target in ref.target_collections for prop in weaviate.get_properties(target))),
+                    }
+                    for ref in collection_config.references
+                }
                 
                 if properties:
                     st.session_state["properties_options"] = properties
@@ -102,11 +156,33 @@ def home():
                 st.error(f"Error fetching properties: {str(e)}")
                 st.session_state["properties_disabled"] = True
 
+    def selected_references():
+        # A reference is expanded once at least one of its target properties is picked
+        return {
+            name: st.session_state[f"reference_{name}"]
+            for name in st.session_state["reference_options"]
+            if st.session_state.get(f"reference_{name}")
+        }
+
+    def selected_group_by():
+        search_type = st.session_state.get("search_type", DEFAULT_SEARCH_TYPE)
+        if not SEARCH_TYPES[search_type]["group_by"] or not st.session_state.get("group_by_enabled"):
+            return None
+        return {
+            "property": st.session_state["group_by_property"],
+            "number_of_groups": st.session_state["group_by_groups"],
+            "objects_per_group": st.session_state["group_by_objects"],
+        }
+
     def apply():
-        start_time = datetime.now()
-        
-        with st.spinner("🔍 Searching your data..."):
-            data = weaviate.query(
+        # Runs in the background; the jobs panel shows the first page as soon as it arrives.
+        # The search ID is known up front so the job's span carries it too
+        search_id = start_search()
+        job = SearchJob(
+            weaviate,
+            get_session_id(),
+            st.session_state["weaviate_class"],
+            dict(
                 class_name=st.session_state["weaviate_class"],
                 properties=st.session_state["properties"],
                 with_additional=st.session_state["additionals"],
@@ -114,41 +190,197 @@ def home():
                 fusion=st.session_state["fusion"],
                 query=st.session_state["prompt"],
                 limit=st.session_state["limit"],
-                search_type=st.session_state.get("search_type", DEFAULT_SEARCH_TYPE)
-            )
-            
-        end_time = datetime.now()
-        response_time = (end_time - start_time).total_seconds()
-        
-        if 'errors' in data:
-            st.error(f"❌ Query Error: {data['errors'][0]['message']}")
-        else:
+                search_type=st.session_state.get("search_type", DEFAULT_SEARCH_TYPE),
+                references=selected_references(),
+                reference_depth=st.session_state.get("reference_depth", 1),
+                reference_mode=st.session_state.get("reference_mode", DEFAULT_REFERENCE_MODE),
+                group_by=selected_group_by()
+            ),
+            search_id=search_id
+        )
+        submit_job(st.session_state["search_jobs"], job)
+        st.session_state["shown_job"] = {"id": job.id, "rows": 0, "final": False}
+
+    def show_job(job):
+        # Partial rows replace the result table; the finished job is recorded like any other search
+        data = job.snapshot()
+        st.session_state["shown_job"] = {"id": job.id, "rows": len(data), "final": not job.running}
+        st.session_state["federated_stats"] = None
+        st.session_state["result_source"] = job.label
+        if job.running:
+            set_result(data)
+            return
+        start_search(job.search_id)
+        if job.error:
+            st.session_state["search_messages"].append(("error", f"❌ Search failed after {len(data)} rows: {job.error}"))
+        elif job.status == "cancelled":
+            st.session_state["search_messages"].append(("warning", f"⏹️ Search cancelled, showing the {len(data)} rows fetched"))
+        if data or not job.error:
+            store_result(data, job.elapsed, job.label, query=job.query_kwargs["query"], params=job.query_kwargs)
+        # The ResultStore holds the rows now, within the session budget
+        job.release()
+
+    def apply_federated():
+        start_search()
+        start_time = datetime.now()
+        sources = []
+        for class_name in st.session_state["federated_classes"]:
+            tenants = st.session_state.get(f"tenants_{class_name}") or st.session_state["tenant_options"].get(class_name) or [None]
+            sources.extend((class_name, tenant) for tenant in tenants)
+
+        with st.spinner(f"🌐 Searching {len(sources)} sources..."):
+            try:
+                # Every source can return `limit` rows, so the whole fan-out is admitted as one search
+                with admission_slot(st.session_state["limit"] * len(sources), len(st.session_state["properties"])):
+                    data, source_stats = federated_query(
+                        weaviate,
+                        sources=sources,
+                        properties=st.session_state["properties"],
+                        limit=st.session_state["limit"],
+                        max_workers=FEDERATED_MAX_WORKERS,
+                        with_additional=st.session_state["additionals"],
+                        alpha=st.session_state["alpha"],
+                        fusion=st.session_state["fusion"],
+                        query=st.session_state["prompt"],
+                        search_type=st.session_state.get("search_type", DEFAULT_SEARCH_TYPE)
+                    )
+            except AdmissionError as e:
+                st.session_state["search_messages"].append(("warning", f"🚦 Search not admitted: {e}"))
+                return
+
+        response_time = (datetime.now() - start_time).total_seconds()
+        st.session_state["federated_stats"] = source_stats
+        st.session_state["result_source"] = None
+        failed = [stat for stat in source_stats if stat["error"]]
+        if failed:
+            st.session_state["search_messages"].append(("warning", f"⚠️ {len(failed)} of {len(sources)} sources failed, see Source Latency for details"))
+        store_result(data, response_time, ", ".join(st.session_state["federated_classes"]))
+
+    def more_like_this(row):
+        # Federated rows carry their own collection and tenant
+        class_name = row.get("source_collection") or st.session_state["result_source"]
+        tenant = row.get("source_tenant") if isinstance(row.get("source_tenant"), str) else None
+        available = weaviate.get_properties(class_name)
+        start_search()
+        start_time = datetime.now()
+
+        with st.spinner("🧲 Finding similar objects..."):
+            try:
+                with admission_slot(st.session_state["limit"], len(st.session_state["properties"])):
+                    data = weaviate.more_like_this(
+                        class_name,
+                        row["id"],
+                        properties=[prop for prop in st.session_state["properties"] if prop in available],
+                        with_additional=st.session_state["additionals"],
+                        limit=st.session_state["limit"],
+                        tenant=tenant
+                    )
+            except CircuitOpenError as e:
+                st.session_state["search_messages"].append(("error", f"⛔ {e}. Searches are paused until the health check recovers."))
+                return
+            except AdmissionError as e:
+                st.session_state["search_messages"].append(("warning", f"🚦 Search not admitted: {e}"))
+                return
+
+        if data is None:
+            st.session_state["search_messages"].append(("error", "❌ Similar object search failed"))
+            return
+        st.session_state["federated_stats"] = None
+        st.session_state["result_source"] = class_name
+        store_result(data, (datetime.now() - start_time).total_seconds(), class_name, query=f"≈ {row['id']}")
+
+    def apply_snapshot():
+        start_search()
+        start_time = datetime.now()
+        filters = [
+            (row["column"], row["operator"], row["value"])
+            for row in st.session_state["snapshot_filters_value"]
+            if row.get("column") and row.get("operator")
+        ]
+        search = st.session_state.get("snapshot_search")
+        sql = st.session_state.get("snapshot_sql")
+        group_by = st.session_state.get("snapshot_group_by")
+        try:
+            with span("snapshot.query", snapshot=snapshot.name, filters=len(filters), group_by=str(group_by), sql=bool(sql)):
+                if sql:
+                    df = snapshot.sql(sql)
+                    matched = len(df)
+                elif group_by:
+                    aggregations = [(st.session_state["snapshot_aggregate_column"], function) for function in st.session_state["snapshot_aggregations"]]
+                    df = snapshot.aggregate(group_by, aggregations, filters, search)
+                    matched = len(df)
+                else:
+                    df, matched = snapshot.query(filters, search, st.session_state["snapshot_columns"] or None, st.session_state["snapshot_limit"])
+        except Exception as e:
+            st.session_state["search_messages"].append(("error", f"❌ Snapshot query failed: {e}"))
+            return
+
+        st.session_state["federated_stats"] = None
+        st.session_state["result_source"] = None
+        description = sql or " AND ".join(
+            [f"{column} {operator} {value}" if value not in (None, "") else f"{column} {operator}" for column, operator, value in filters]
+            + ([f"contains '{search}'"] if search else [])
+        ) or "*"
+        if group_by and not sql:
+            description += f" GROUP BY {', '.join(group_by)}"
+        store_result(df, (datetime.now() - start_time).total_seconds(), snapshot.name, query=description)
+        if matched > len(df):
+            st.session_state["search_messages"].append(("info", f"ℹ️ Showing the first {len(df):,} of {matched:,} matching rows"))
+
+    def set_result(data):
+        with profile_memory("search.dataframe"):
             df = convert_response_to_df(data)
             if 'score' in df.columns:
                 df['score'] = pd.to_numeric(df['score'])
-            st.session_state["df"] = df.reset_index()
-            
-            # Update search history and stats
-            search_entry = {
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "query": st.session_state["prompt"],
-                "class": st.session_state["weaviate_class"],
-                "results": len(df),
-                "response_time": response_time
-            }
-            st.session_state["search_history"].insert(0, search_entry)
-            if len(st.session_state["search_history"]) > 10:
-                st.session_state["search_history"] = st.session_state["search_history"][:10]
-            
-            # Update query stats
-            st.session_state["query_stats"]["total_queries"] += 1
-            current_avg = st.session_state["query_stats"]["avg_response_time"]
-            total_queries = st.session_state["query_stats"]["total_queries"]
-            st.session_state["query_stats"]["avg_response_time"] = (
-                (current_avg * (total_queries - 1) + response_time) / total_queries
-            )
-            
-            st.success(f"✅ Found {len(df)} results in {response_time:.2f} seconds!")
+            # Same column reset_index() would add, without copying the frame
+            df.insert(0, "index", range(len(df)))
+            st.session_state["result"] = ResultStore(df, get_session_id())
+        return df
+
+    def store_result(data, response_time, class_label, query=None, params=None):
+        df = set_result(data)
+        
+        # Update search history and stats; `params` are the Weaviate.query arguments, replayable by the load generator
+        search_entry = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "query": st.session_state["prompt"] if query is None else query,
+            "class": class_label,
+            "results": len(df),
+            "response_time": response_time,
+            "search_type": (params or {}).get("search_type"),
+            "params": params
+        }
+        st.session_state["search_history"].insert(0, search_entry)
+        if len(st.session_state["search_history"]) > 10:
+            st.session_state["search_history"] = st.session_state["search_history"][:10]
+        
+        # Update query stats
+        st.session_state["query_stats"]["total_queries"] += 1
+        current_avg = st.session_state["query_stats"]["avg_response_time"]
+        total_queries = st.session_state["query_stats"]["total_queries"]
+        st.session_state["query_stats"]["avg_response_time"] = (
+            (current_avg * (total_queries - 1) + response_time) / total_queries
+        )
+        
+        st.session_state["search_messages"].append(("success", f"✅ Found {len(df)} results in {response_time:.2f} seconds!"))
+
+    def handle_federated_selection():
+        selected_classes = st.session_state.get("federated_classes", [])
+        if not selected_classes:
+            st.session_state["properties_disabled"] = True
+            return
+
+        try:
+            properties = []
+            for class_name in selected_classes:
+                properties.extend(prop for prop in weaviate.get_properties(class_name) if prop not in properties)
+                if class_name not in st.session_state["tenant_options"]:
+                    st.session_state["tenant_options"][class_name] = weaviate.get_tenants(class_name)
+            st.session_state["properties_options"] = properties
+            st.session_state["properties_disabled"] = not properties
+        except Exception as e:
+            st.error(f"Error fetching properties: {str(e)}")
+            st.session_state["properties_disabled"] = True
 
     def select_all_properties():
         if st.session_state["properties_select_all"]:
@@ -160,179 +392,262 @@ def home():
         if len(st.session_state["properties"]) != len(st.session_state["properties_options"]):
             st.session_state["properties_select_all"] = False
 
-    def export_data():
-        if not st.session_state["df"].empty:
-            csv = st.session_state["df"].to_csv(index=False)
-            st.download_button(
-                label="📥 Download CSV",
-                data=csv,
-                file_name=f"weaviate_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
+    def export_data(df):
+        csv = df.to_csv(index=False)
+        EXPORT_BYTES.inc(len(csv.encode()), format="csv")
+        st.download_button(
+            label="📥 Download CSV",
+            data=csv,
+            file_name=f"weaviate_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
 
-    # Sidebar with enhanced styling
-    with st.sidebar:
-        # st.markdown('<div class="sidebar-content">', unsafe_allow_html=True)
+    @st.fragment
+    def query_configuration(class_options):
+        with timed_section("query_configuration"):
+            # st.markdown('<div class="sidebar-content">', unsafe_allow_html=True)
         
-        st.markdown("### 🎛️ Query Configuration")
+            st.markdown("### 🎛️ Query Configuration")
         
-        # Class selection
-        weaviate_class_options = ["Select a class"] + weaviate.get_classes()
-        weaviate_class = st.selectbox(
-            label="📊 Weaviate Class",
-            options=weaviate_class_options,
-            key="weaviate_class",
-            index=weaviate_class_options.index(st.session_state["weaviate_class"])
-            if "weaviate_class" in st.session_state else 0,
-            on_change=handle_class_selection,
-            help="Select the Weaviate class to query"
-        )
+            federated = st.toggle(
+                "🌐 Federated Search",
+                key="federated",
+                on_change=lambda: handle_federated_selection() if st.session_state["federated"] else handle_class_selection(),
+                help="Run the same query across several classes and tenants and merge the top results"
+            )
 
-        if st.session_state["weaviate_class"] != "Select a class":
+            # Class selection
+            if federated:
+                st.multiselect(
+                    "📊 Weaviate Classes",
+                    options=class_options,
+                    key="federated_classes",
+                    on_change=handle_federated_selection,
+                    help="Select the Weaviate classes to query concurrently"
+                )
+                for class_name in st.session_state.get("federated_classes", []):
+                    if st.session_state["tenant_options"].get(class_name):
+                        st.multiselect(
+                            f"🏢 Tenants of {class_name}",
+                            options=st.session_state["tenant_options"][class_name],
+                            key=f"tenants_{class_name}",
+                            help="Leave empty to search all tenants"
+                        )
+                sources_selected = bool(st.session_state.get("federated_classes"))
+            else:
+                weaviate_class_options = ["Select a class"] + class_options
+                weaviate_class = st.selectbox(
+                    label="📊 Weaviate Class",
+                    options=weaviate_class_options,
+                    key="weaviate_class",
+                    index=weaviate_class_options.index(st.session_state["weaviate_class"])
+                    if "weaviate_class" in st.session_state else 0,
+                    on_change=handle_class_selection,
+                    help="Select the Weaviate class to query"
+                )
+                sources_selected = st.session_state["weaviate_class"] != "Select a class"
+
+            if sources_selected:
             
-            # Properties selection
-            properties = st.multiselect(
-                "🏷️ Properties",
-                options=st.session_state["properties_options"],
-                disabled=st.session_state["properties_disabled"],
-                key="properties",
-                default=st.session_state["properties_default"],
-                on_change=properties_changed,
-                help="Select properties to retrieve"
-            )
+                # Properties selection
+                properties = st.multiselect(
+                    "🏷️ Properties",
+                    options=st.session_state["properties_options"],
+                    disabled=st.session_state["properties_disabled"],
+                    key="properties",
+                    default=st.session_state["properties_default"],
+                    on_change=properties_changed,
+                    help="Select properties to retrieve"
+                )
             
-            select_all_properties = st.checkbox(
-                "Select All Properties",
-                on_change=select_all_properties,
-                key="properties_select_all",
-                disabled=st.session_state["properties_disabled"],
-            )
+                st.checkbox(
+                    "Select All Properties",
+                    on_change=select_all_properties,
+                    key="properties_select_all",
+                    disabled=st.session_state["properties_disabled"],
+                )
 
-            if st.session_state["properties"]:
-                
-                # Advanced options
-                with st.expander("⚙️ Advanced Options", expanded=True):
-                    additionals = st.multiselect(
-                        "📋 Additional Metadata",
-                        options=ADDITIONALS,
-                        disabled=st.session_state["properties_disabled"],
-                        key="additionals",
-                        default=["id"],
-                        help="Select additional metadata to include"
-                    )
-                    
-                    # Get current search type
-                    current_search_type = st.session_state.get("search_type", DEFAULT_SEARCH_TYPE)
-                    
-                    # Only show alpha and fusion for hybrid search
-                    if current_search_type == "hybrid":
+                # Reference properties are resolved into flattened `link.property` columns
+                if not federated and st.session_state["reference_options"]:
+                    with st.expander("🔗 References", expanded=False):
+                        for name, option in st.session_state["reference_options"].items():
+                            st.multiselect(
+                                f"↳ {name} ({', '.join(option['targets'])})",
+                                options=option["properties"],
+                                key=f"reference_{name}",
+                                disabled=st.session_state["properties_disabled"],
+                                help="Properties of the referenced objects to return"
+                            )
                         col1, col2 = st.columns(2)
                         with col1:
-                            alpha = st.slider(
-                                label="🎯 Alpha (Hybrid Balance)",
-                                min_value=0.0,
-                                max_value=1.0,
-                                value=0.7,
-                                step=0.01,
-                                key="alpha",
-                                disabled=st.session_state["properties_disabled"],
-                                help="Balance between keyword (0) and vector (1) search"
+                            st.number_input(
+                                "Depth",
+                                min_value=1,
+                                max_value=REFERENCE_DEPTH_MAX,
+                                value=1,
+                                key="reference_depth",
+                                help="Levels of references to follow; deeper levels return all properties"
                             )
-                        
                         with col2:
-                            fusion = st.selectbox(
-                                "🔀 Fusion Type",
-                                options=FUSION_TYPES,
-                                disabled=st.session_state["properties_disabled"],
-                                key="fusion",
-                                help="Method for combining search results"
+                            st.radio(
+                                "Resolve",
+                                options=list(REFERENCE_MODES),
+                                format_func=REFERENCE_MODES.get,
+                                index=list(REFERENCE_MODES).index(DEFAULT_REFERENCE_MODE),
+                                key="reference_mode",
+                                help="Batched lookup fetches each referenced object once per target collection and caches it"
                             )
-                    else:
-                        # For non-hybrid searches, set defaults and show info
-                        st.info(f"ℹ️ Using {SEARCH_TYPES[current_search_type]['label']} - Alpha and fusion settings not applicable")
-                        # Set default values in session state if not present
-                        if "alpha" not in st.session_state:
-                            st.session_state["alpha"] = 0.7
-                        if "fusion" not in st.session_state:
-                            st.session_state["fusion"] = "ranked"
+
+                if st.session_state["properties"]:
+                
+                    # Advanced options
+                    with st.expander("⚙️ Advanced Options", expanded=True):
+                        additionals = st.multiselect(
+                            "📋 Additional Metadata",
+                            options=ADDITIONALS,
+                            disabled=st.session_state["properties_disabled"],
+                            key="additionals",
+                            default=["id"],
+                            help="Select additional metadata to include"
+                        )
+                    
+                        # Get current search type
+                        current_search_type = st.session_state.get("search_type", DEFAULT_SEARCH_TYPE)
+                    
+                        # Only show alpha and fusion for hybrid search
+                        if current_search_type == "hybrid":
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                alpha = st.slider(
+                                    label="🎯 Alpha (Hybrid Balance)",
+                                    min_value=0.0,
+                                    max_value=1.0,
+                                    value=0.7,
+                                    step=0.01,
+                                    key="alpha",
+                                    disabled=st.session_state["properties_disabled"],
+                                    help="Balance between keyword (0) and vector (1) search"
+                                )
+                        
+                            with col2:
+                                fusion = st.selectbox(
+                                    "🔀 Fusion Type",
+                                    options=FUSION_TYPES,
+                                    disabled=st.session_state["properties_disabled"],
+                                    key="fusion",
+                                    help="Method for combining search results"
+                                )
+                        else:
+                            # For non-hybrid searches, set defaults and show info
+                            st.info(f"ℹ️ Using {SEARCH_TYPES[current_search_type]['label']} - Alpha and fusion settings not applicable")
+                            # Set default values in session state if not present
+                            if "alpha" not in st.session_state:
+                                st.session_state["alpha"] = 0.7
+                            if "fusion" not in st.session_state:
+                                st.session_state["fusion"] = "ranked"
                     
-                    limit = st.number_input(
-                        "📊 Result Limit",
-                        min_value=LIMIT_MIN_VALUE, 
-                        max_value=LIMIT_MAX_VALUE,  
-                        value=LIMIT_DEFAULT_VALUE,  
+                        # Collapse chunk-level hits into their documents on the server
+                        if SEARCH_TYPES[current_search_type]["group_by"] and not federated:
+                            group_by_enabled = st.checkbox(
+                                "🗂️ Group results",
+                                key="group_by_enabled",
+                                help="Return the top groups (e.g. documents) instead of individual objects (e.g. chunks)"
+                            )
+                            if group_by_enabled:
+                                st.selectbox(
+                                    "Group by property",
+                                    options=st.session_state["properties_options"],
+                                    key="group_by_property"
+                                )
+                                col1, col2 = st.columns(2)
+                                with col1:
+                                    st.number_input("Groups", min_value=1, max_value=LIMIT_MAX_VALUE, value=GROUP_BY_DEFAULT_GROUPS, key="group_by_groups")
+                                with col2:
+                                    st.number_input("Objects per group", min_value=1, max_value=LIMIT_MAX_VALUE, value=GROUP_BY_DEFAULT_OBJECTS, key="group_by_objects")
+
+                        limit = st.number_input(
+                            "📊 Result Limit",
+                            min_value=LIMIT_MIN_VALUE, 
+                            max_value=LIMIT_MAX_VALUE,  
+                            value=LIMIT_DEFAULT_VALUE,  
+                            disabled=st.session_state["properties_disabled"],
+                            key="limit",
+                            help="Maximum number of results to return"
+                        )
+                
+                    # Query input
+                    prompt = st.text_area(
+                        "🔍 Search Query",
                         disabled=st.session_state["properties_disabled"],
-                        key="limit",
-                        help="Maximum number of results to return"
+                        key="prompt",
+                        placeholder="Enter your search query here...",
+                        help="Enter your search query (leave empty for wildcard search)",
+                        height=100
                     )
                 
-                # Query input
-                prompt = st.text_area(
-                    "🔍 Search Query",
-                    disabled=st.session_state["properties_disabled"],
-                    key="prompt",
-                    placeholder="Enter your search query here...",
-                    help="Enter your search query (leave empty for wildcard search)",
-                    height=100
-                )
-                
-                # Submit button
-                apply_button = st.button(
-                    label="🚀 Execute Search",
-                    on_click=apply,
-                    disabled=st.session_state["properties_disabled"],
-                    use_container_width=True,
-                    type="primary"
-                )
+                    # Submit button; the search result needs a full rerun to reach the main area
+                    if st.button(
+                        label="🚀 Execute Search",
+                        disabled=st.session_state["properties_disabled"],
+                        use_container_width=True,
+                        type="primary"
+                    ):
+                        apply_federated() if federated else apply()
+                        st.rerun()
 
-        st.markdown('</div>', unsafe_allow_html=True)
+            st.markdown('</div>', unsafe_allow_html=True)
 
-    # Main content area
-    if not st.session_state["df"].empty:
-        # Statistics cards
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{len(st.session_state["df"])}</div>
-                <div class="metric-label">Results Found</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            avg_score = st.session_state["df"]['score'].mean() if 'score' in st.session_state["df"].columns else 0
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{avg_score:.3f}</div>
-                <div class="metric-label">Avg Score</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{st.session_state["query_stats"]["total_queries"]}</div>
-                <div class="metric-label">Total Queries</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col4:
-            avg_time = st.session_state["query_stats"]["avg_response_time"]
-            st.markdown(f"""
-            <div class="metric-card">
-                <div class="metric-value">{avg_time:.2f}s</div>
-                <div class="metric-label">Avg Response</div>
-            </div>
-            """, unsafe_allow_html=True)
+    @st.fragment
+    def snapshot_configuration():
+        st.markdown("### 📦 Snapshot Query")
+        st.caption("Filters and group-bys run locally on the snapshot; nothing is sent to Weaviate.")
+        columns = snapshot.columns
+        st.multiselect("🏷️ Columns", options=columns, key="snapshot_columns", help="Leave empty for all columns")
+        st.caption("🧮 Filters (all must match)")
+        filters = st.data_editor(
+            pd.DataFrame({"column": pd.Series(dtype="object"), "operator": pd.Series(dtype="object"), "value": pd.Series(dtype="object")}),
+            num_rows="dynamic",
+            use_container_width=True,
+            hide_index=True,
+            key="snapshot_filters",
+            column_config={
+                "column": st.column_config.SelectboxColumn("Column", options=columns),
+                "operator": st.column_config.SelectboxColumn("Operator", options=FILTER_OPERATORS),
+                "value": st.column_config.TextColumn("Value", help="Compared after conversion to the column's type"),
+            }
+        )
+        st.session_state["snapshot_filters_value"] = filters.to_dict("records")
+        st.text_input("🔍 Contains text", key="snapshot_search", help="Case-insensitive match in any text column")
 
-        st.markdown("---")
+        with st.expander("🗂️ Group & Aggregate", expanded=False):
+            st.multiselect("Group by", options=columns, key="snapshot_group_by")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.selectbox("Aggregate column", options=columns, key="snapshot_aggregate_column")
+            with col2:
+                st.multiselect("Functions", options=AGGREGATIONS, default=["count"], key="snapshot_aggregations")
 
-        # Enhanced tabs for results
-        tab1, tab2, tab3, tab4 = st.tabs(["📊 Data Table", "📈 Visualizations", "📋 Export & History", "🔍 Data Insights"])
+        if sql_available():
+            with st.expander("🦆 SQL", expanded=False):
+                st.text_area("DuckDB SQL", key="snapshot_sql", placeholder="SELECT * FROM snapshot LIMIT 10",
+                             help="Runs instead of the filters above; the snapshot is the table `snapshot`")
 
-        with tab1:
+        st.number_input("📊 Row Limit", min_value=1, value=min(SNAPSHOT_DEFAULT_LIMIT, max(1, snapshot.num_rows)), key="snapshot_limit")
+        if st.button("🚀 Run Query", use_container_width=True, type="primary"):
+            apply_snapshot()
+            st.rerun()
+
+    # Sidebar with enhanced styling
+    with st.sidebar:
+        if offline:
+            snapshot_configuration()
+        else:
+            query_configuration(weaviate.get_classes())
+
+    @st.fragment
+    def results_table(result):
+        with timed_section("results_table"):
             st.markdown("### 📊 Query Results")
             
             # Search and filter options
@@ -342,14 +657,33 @@ def home():
             with col2:
                 show_all = st.checkbox("Show all columns", value=True)
             
-            # Filter dataframe based on search
-            display_df = st.session_state["df"]
+            if GROUP_COLUMN in result.columns and st.toggle("🗂️ Group view", value=True, key="group_view"):
+                grouped_results(*result.group_head(GROUP_COLUMN, GROUP_VIEW_MAX_GROUPS, search_term))
+                return
+
+            if result.spilled:
+                st.caption(f"💾 {result.nbytes / 1024 / 1024:.0f} MB result exceeds the session memory budget and is served from disk")
+
+            # Filter dataframe based on search, otherwise page through the stored result
             if search_term:
-                mask = display_df.astype(str).apply(lambda x: x.str.contains(search_term, case=False, na=False)).any(axis=1)
-                display_df = display_df[mask]
-            
-            # Display dataframe
-            st.dataframe(
+                display_df = result.filter(search_term)
+            else:
+                page_col1, page_col2 = st.columns([1, 3])
+                with page_col1:
+                    page_size = st.selectbox("Rows per page", options=RESULT_PAGE_SIZES, key="page_size")
+                page_count = max(1, -(-result.num_rows // page_size))
+                with page_col2:
+                    page_number = st.number_input(
+                        f"Page (of {page_count})",
+                        min_value=1,
+                        max_value=page_count,
+                        value=1,
+                        key="page_number"
+                    )
+                display_df = result.page((page_number - 1) * page_size, page_size)
+
+            # Display dataframe; selecting a row offers a similarity search from it
+            event = st.dataframe(
                 display_df, 
                 use_container_width=True, 
                 height=600, 
@@ -361,13 +695,43 @@ def home():
                         min_value=0,
                         max_value=1,
                     ),
-                }
+                },
+                on_select="rerun",
+                selection_mode="single-row",
+                key="results_selection"
             )
 
-        with tab2:
+            selected_rows = [position for position in event.selection.rows if position < len(display_df)]
+            if selected_rows and not offline:
+                row = display_df.iloc[selected_rows[0]].to_dict()
+                if "id" not in row:
+                    st.caption("🧲 Add `id` to Additional Metadata to search for objects similar to a row")
+                elif st.button(
+                    "🧲 More like this",
+                    help="Search the same collection with this object's stored vector; no embedding API call is made"
+                ):
+                    more_like_this(row)
+                    st.rerun()
+
+    def grouped_results(df, group_count, object_count):
+        groups = list(df.groupby(GROUP_COLUMN, sort=False))
+        st.caption(f"{group_count} groups, {object_count} objects")
+        for name, members in groups:
+            best = f" · best distance {members['distance'].min():.4f}" if "distance" in members.columns else ""
+            with st.expander(f"🗂️ {name} · {int(members[GROUP_SIZE_COLUMN].iloc[0])} objects{best}"):
+                st.dataframe(members.drop(columns=[GROUP_COLUMN, GROUP_SIZE_COLUMN]), use_container_width=True, hide_index=True)
+        if group_count > GROUP_VIEW_MAX_GROUPS:
+            st.caption(f"Showing the first {GROUP_VIEW_MAX_GROUPS} groups; switch off Group view to page through all rows")
+
+    @st.fragment
+    def visualizations(result):
+        with timed_section("visualizations"):
+            px = timed_import("plotly.express")
+
             st.markdown("### 📈 Data Visualizations")
             
-            if 'score' in st.session_state["df"].columns:
+            # Snapshot results are charted by any column, search results need a score to rank by
+            if 'score' in result.columns or offline:
                 col1, col2 = st.columns([1, 3])
                 
                 with col1:
@@ -379,32 +743,35 @@ def home():
                     
                     x_axis = st.selectbox(
                         "X-Axis",
-                        options=st.session_state["df"].columns,
-                        index=st.session_state['df'].columns.get_loc('index') if 'index' in st.session_state['df'].columns else 0
+                        options=result.columns,
+                        index=result.columns.index('index') if 'index' in result.columns else 0
                     )
                     
                     y_axis = st.selectbox(
                         "Y-Axis", 
-                        options=st.session_state["df"].columns,
-                        index=st.session_state['df'].columns.get_loc('score') if 'score' in st.session_state['df'].columns else 0
+                        options=result.columns,
+                        index=result.columns.index('score') if 'score' in result.columns else 0
                     )
                 
                 with col2:
+                    # Only the plotted columns are read back from the stored result
+                    chart_df = result.to_df(list(dict.fromkeys([x_axis, y_axis])))
+
                     # Create visualizations based on selection
                     if viz_type == "Line Chart":
-                        fig = px.line(st.session_state["df"], x=x_axis, y=y_axis, 
+                        fig = px.line(chart_df, x=x_axis, y=y_axis, 
                                      title=f"{y_axis} vs {x_axis}")
                     elif viz_type == "Bar Chart":
-                        fig = px.bar(st.session_state["df"], x=x_axis, y=y_axis,
+                        fig = px.bar(chart_df, x=x_axis, y=y_axis,
                                     title=f"{y_axis} by {x_axis}")
                     elif viz_type == "Scatter Plot":
-                        fig = px.scatter(st.session_state["df"], x=x_axis, y=y_axis,
+                        fig = px.scatter(chart_df, x=x_axis, y=y_axis,
                                         title=f"{y_axis} vs {x_axis}")
                     elif viz_type == "Histogram":
-                        fig = px.histogram(st.session_state["df"], x=y_axis,
+                        fig = px.histogram(chart_df, x=y_axis,
                                           title=f"Distribution of {y_axis}")
                     elif viz_type == "Box Plot":
-                        fig = px.box(st.session_state["df"], y=y_axis,
+                        fig = px.box(chart_df, y=y_axis,
                                     title=f"Box Plot of {y_axis}")
                     
                     fig.update_layout(
@@ -416,16 +783,22 @@ def home():
             else:
                 st.info("📊 Please choose Score column in Advanced Options for Visualizations.")
 
-        with tab3:
+    @st.fragment
+    def export_and_history(result):
+        with timed_section("export_and_history"):
             col1, col2 = st.columns(2)
             
             with col1:
                 st.markdown("### 📥 Export Data")
-                if not st.session_state["df"].empty:
-                    export_data()
-                    
-                    # Export as JSON
-                    json_data = st.session_state["df"].to_json(orient='records', indent=2)
+                # Export strings are only built on request, not on every rerun
+                if st.button("📦 Prepare export files", use_container_width=True):
+                    export_df = result.to_df()
+                    with profile_memory("export"):
+                        export_data(export_df)
+                        
+                        # Export as JSON
+                        json_data = export_df.to_json(orient='records', indent=2)
+                    EXPORT_BYTES.inc(len(json_data.encode()), format="json")
                     st.download_button(
                         label="📄 Download JSON",
                         data=json_data,
@@ -434,7 +807,10 @@ def home():
                         use_container_width=True
                     )
                 else:
-                    st.info("No data to export. Run a query first!")
+                    st.caption("Builds CSV and JSON downloads of the current results.")
+
+                if not offline:
+                    save_result_snapshot(result)
             
             with col2:
                 st.markdown("### 📋 Search History")
@@ -442,44 +818,191 @@ def home():
                     for i, entry in enumerate(st.session_state["search_history"]):
                         with st.expander(f"🔍 {entry['query'][:30]}... ({entry['timestamp']})"):
                             st.write(f"**Class:** {entry['class']}")
+                            if entry.get("search_type"):
+                                st.write(f"**Search Type:** {SEARCH_TYPES[entry['search_type']]['label']}")
                             st.write(f"**Results:** {entry['results']}")
                             st.write(f"**Response Time:** {entry['response_time']:.2f}s")
                             st.write(f"**Query:** {entry['query']}")
                 else:
                     st.info("No search history yet. Run some queries!")
 
-        with tab4:
+    def save_result_snapshot(result):
+        with st.expander("💾 Save as snapshot"):
+            source = st.session_state.get("result_source") or "results"
+            name_key = f"result_snapshot_name_{source}"
+            if name_key not in st.session_state:
+                st.session_state[name_key] = default_snapshot_name(source)
+            name = st.text_input("Snapshot name", key=name_key)
+            st.caption("Stores the current results locally so they can be explored offline.")
+            if st.button("💾 Save snapshot", use_container_width=True):
+                try:
+                    # Typed schema of the searched collection; federated results have none
+                    schema = {}
+                    if st.session_state.get("result_source"):
+                        properties = collection_properties(weaviate.client.collections.get(source))
+                        schema = {prop: data_type for prop, data_type in properties.items() if prop in result.columns}
+                    manifest = save_result(result.to_df(), name, source, schema, query=(st.session_state["search_history"] or [{}])[0].get("query"))
+                    st.success(f"✅ Saved {manifest['rows']:,} rows to `{name}`")
+                except Exception as e:
+                    st.error(f"Snapshot failed: {e}")
+
+    @st.fragment
+    def data_insights(result):
+        with timed_section("data_insights"):
+            px = timed_import("plotly.express")
+
             st.markdown("### 🔍 Data Insights")
             
-            if not st.session_state["df"].empty:
+            # Computed once per result and kept on it; spilled results are summarized in Arrow
+            insights = result.insights()
+            if insights is not None:
                 col1, col2 = st.columns(2)
                 
                 with col1:
                     st.markdown("#### 📊 Data Summary")
-                    st.write(st.session_state["df"].describe())
+                    st.write(insights["summary"])
                 
                 with col2:
                     st.markdown("#### 🏷️ Column Information")
-                    info_data = []
-                    for col in st.session_state["df"].columns:
-                        info_data.append({
-                            "Column": col,
-                            "Type": str(st.session_state["df"][col].dtype),
-                            "Non-Null": st.session_state["df"][col].count(),
-                            "Unique": st.session_state["df"][col].nunique()
-                        })
-                    st.dataframe(pd.DataFrame(info_data), hide_index=True)
+                    st.dataframe(insights["columns"], hide_index=True)
                 
                 # Score distribution if available
-                if 'score' in st.session_state["df"].columns:
+                if 'score' in result.columns:
                     st.markdown("#### 📈 Score Distribution")
-                    fig = px.histogram(st.session_state["df"], x='score', nbins=20,
+                    fig = px.histogram(result.to_df(['score']), x='score', nbins=20,
                                       title="Distribution of Relevance Scores")
                     fig.update_layout(template="plotly_white", height=400)
                     st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info("🔍 Run a query to see data insights!")
 
+    def search_jobs_panel(polling):
+        jobs = st.session_state["search_jobs"]
+        shown = st.session_state["shown_job"]
+        running = sum(job.running for job in jobs)
+        if polling and not running:
+            # Stop polling once every job has ended
+            st.rerun()
+
+        # The first page and the end of the job on screen need a full rerun to reach the results area
+        for job in jobs:
+            if shown and job.id == shown["id"] and not shown["final"] and ((job.row_count and not shown["rows"]) or not job.running):
+                show_job(job)
+                st.rerun()
+
+        with st.expander(f"⏳ Search Jobs ({running} running)", expanded=bool(running)):
+            for job in jobs:
+                status = f"queued, position {job.position}" if job.status == "queued" and job.position else job.status
+                icon = {"queued": "🚦", "running": "⏳", "done": "✅", "cancelled": "⏹️", "failed": "❌"}[job.status]
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    st.markdown(
+                        f"{icon} **{job.label}** · `{(job.query_kwargs['query'] or '*')[:40]}` · {status} · "
+                        f"{job.row_count:,} of {job.limit:,} rows · {job.elapsed:.1f}s"
+                    )
+                    if job.error:
+                        st.caption(job.error)
+                with col2:
+                    if job.running:
+                        if st.button("⏹️ Cancel", key=f"cancel_job_{job.id}", use_container_width=True):
+                            # The job on screen keeps its rows until show_job stores them; others drop theirs
+                            if shown and job.id == shown["id"]:
+                                job.cancel()
+                            else:
+                                job.release()
+                    elif not job.released and (not shown or job.id != shown["id"]):
+                        if st.button("📊 Show", key=f"show_job_{job.id}", use_container_width=True):
+                            show_job(job)
+                            st.rerun()
+                # Progressive results: load what has arrived so far without waiting for the rest
+                if job.running and shown and job.id == shown["id"] and job.row_count > shown["rows"]:
+                    if st.button(f"🔄 Show {job.row_count:,} rows fetched so far", key=f"refresh_job_{job.id}"):
+                        show_job(job)
+                        st.rerun()
+
+    # Main content area
+    if st.session_state["search_jobs"]:
+        # Poll only while a job is running
+        running = any(job.running for job in st.session_state["search_jobs"])
+        st.fragment(run_every=JOB_POLL_INTERVAL if running else None)(search_jobs_panel)(running)
+
+    for level, message in st.session_state["search_messages"]:
+        getattr(st, level)(message)
+    st.session_state["search_messages"] = []
+
+    result = st.session_state["result"]
+    if result is not None and result.evicted:
+        st.warning("♻️ Your previous results were released to free memory. Run the search again to reload them.")
+        st.session_state["result"] = result = None
+
+    if result is not None and not result.empty:
+        # Plotting is only needed once there are results to show
+        px = timed_import("plotly.express")
+
+        # Statistics cards
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-value">{result.num_rows}</div>
+                <div class="metric-label">Results Found</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col2:
+            avg_score = result.to_df(['score'])['score'].mean() if 'score' in result.columns else 0
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-value">{avg_score:.3f}</div>
+                <div class="metric-label">Avg Score</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col3:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-value">{st.session_state["query_stats"]["total_queries"]}</div>
+                <div class="metric-label">Total Queries</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col4:
+            avg_time = st.session_state["query_stats"]["avg_response_time"]
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-value">{avg_time:.2f}s</div>
+                <div class="metric-label">Avg Response</div>
+            </div>
+            """, unsafe_allow_html=True)
+
+        if st.session_state["federated_stats"]:
+            source_stats = pd.DataFrame(st.session_state["federated_stats"])
+            with st.expander(f"🌐 Source Latency ({len(source_stats)} sources, slowest {source_stats['latency'].max():.2f}s)"):
+                source_stats["source"] = source_stats["collection"] + " / " + source_stats["tenant"]
+                fig = px.bar(source_stats, x="latency", y="source", orientation="h", color="error",
+                             title="Per-source latency (s)")
+                fig.update_layout(template="plotly_white", height=max(250, 30 * len(source_stats)), showlegend=False)
+                st.plotly_chart(fig, use_container_width=True)
+                st.dataframe(source_stats.drop(columns=["source"]), hide_index=True, use_container_width=True)
+
+        st.markdown("---")
+
+        # Enhanced tabs for results
+        tab1, tab2, tab3, tab4 = st.tabs(["📊 Data Table", "📈 Visualizations", "📋 Export & History", "🔍 Data Insights"])
+
+        with tab1:
+            results_table(result)
+
+        with tab2:
+            visualizations(result)
+
+        with tab3:
+            export_and_history(result)
+
+        with tab4:
+            data_insights(result)
+
     else:
         # Welcome screen when no data
         st.markdown("""
@@ -0,0 +1,122 @@
+from datetime import datetime
+
+import streamlit as st
+
+from constants import LOADGEN_CONCURRENCY, LOADGEN_DURATION, LOADGEN_RATE, LOADGEN_UI_MAX_DURATION
+from utility.loadgen import MODES, dump_corpus, load_corpus, run_load
+from utility.metrics import EXPORT_BYTES
+from utility.startup import timed_import
+from utility.tracing import span
+from utility.weaviate import get_session_weaviate
+
+
+def history_corpus() -> list:
+    """Query arguments of this session's Data Explorer searches, oldest first"""
+    return [entry["params"] for entry in reversed(st.session_state.get("search_history", [])) if entry.get("params")]
+
+
+def loadtest():
+    weaviate = get_session_weaviate()
+
+    st.markdown("### 🏋️ Load Test")
+    st.caption(
+        "Replays a corpus of searches against the connected cluster at a fixed rate (open loop) or with a fixed number "
+        "of searches in flight (closed loop), bypassing admission control and result sharing. For longer runs or more "
+        "load than one process can generate, run `python -m utility.loadgen` headless."
+    )
+
+    source = st.radio("📚 Query corpus", options=["Search history", "Upload"], horizontal=True, key="loadtest_source")
+    corpus = []
+    if source == "Search history":
+        corpus = history_corpus()
+        if not corpus:
+            st.info("Run some searches in the Data Explorer first, or upload a corpus.")
+    else:
+        upload = st.file_uploader("JSON lines of Weaviate.query arguments", type=["jsonl", "json"], key="loadtest_upload")
+        if upload is not None:
+            try:
+                corpus = load_corpus(upload)
+            except ValueError as e:
+                st.error(f"Invalid corpus: {e}")
+    if corpus:
+        search_types = sorted({params.get("search_type", "keyword") for params in corpus})
+        st.caption(f"{len(corpus)} queries · {', '.join(search_types)}")
+        # Export strings are only built on request, not on every rerun
+        if st.button("📦 Prepare corpus file", help="Input for python -m utility.loadgen --corpus"):
+            data = dump_corpus(corpus)
+            EXPORT_BYTES.inc(len(data.encode()), format="jsonl")
+            st.download_button("📥 Download corpus", data=data, file_name=f"queries_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+                               mime="application/jsonl", help="Input for python -m utility.loadgen --corpus")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        mode = st.radio("Mode", options=MODES, format_func={"open": "Open loop (rate)", "closed": "Closed loop (concurrency)"}.get, key="loadtest_mode")
+    with col2:
+        rate = st.number_input("⚡ Queries / second", min_value=0.1, value=LOADGEN_RATE, disabled=mode != "open", key="loadtest_rate")
+    with col3:
+        concurrency = st.number_input("🧵 Concurrency", min_value=1, max_value=256, value=LOADGEN_CONCURRENCY, key="loadtest_concurrency")
+    with col4:
+        duration = st.number_input("⏱️ Duration (s)", min_value=1, max_value=LOADGEN_UI_MAX_DURATION, value=int(LOADGEN_DURATION), key="loadtest_duration")
+
+    confirmed = st.checkbox("I understand this sends real load to the cluster, shared with its other users", key="loadtest_confirm")
+    if st.button("🏋️ Run load test", type="primary", use_container_width=True, disabled=not (corpus and confirmed)):
+        progress = st.progress(0.0)
+        try:
+            with span("loadtest", mode=mode, rate=rate, concurrency=concurrency, duration=duration, queries=len(corpus)):
+                st.session_state["loadtest_report"] = run_load(
+                    weaviate, corpus, mode, rate, concurrency, duration,
+                    on_progress=lambda elapsed, requests, errors: progress.progress(
+                        min(1.0, elapsed / duration), text=f"{elapsed:.0f}s · {requests:,} queries · {errors:,} errors"
+                    )
+                )
+        except Exception as e:
+            st.error(f"Load test failed: {e}")
+        progress.empty()
+
+    report = st.session_state.get("loadtest_report")
+    if report is None or report.samples.empty:
+        return
+
+    px = timed_import("plotly.express")
+    summary = report.summary()
+    total = summary.iloc[-1]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Queries", f"{report.requests:,}")
+    col2.metric("Throughput", f"{report.requests / report.duration:.1f}/s")
+    col3.metric("Error rate", f"{report.error_rate:.1%}")
+    col4.metric("p95 latency", f"{total['p95_ms']:.0f} ms")
+    target = f"{report.rate:g} queries/s on {report.concurrency} threads" if report.mode == "open" else f"{report.concurrency} in flight"
+    st.caption(f"{report.mode.title()} loop · {target} · {report.duration:g}s")
+    st.dataframe(summary, hide_index=True, use_container_width=True)
+
+    timeline = report.timeline()
+    col1, col2 = st.columns(2)
+    with col1:
+        fig = px.line(timeline, x="second", y="throughput", color="search_type", title="Throughput (queries/s)")
+        fig.update_layout(template="plotly_white", height=350)
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        fig = px.line(timeline, x="second", y=["p50_ms", "p95_ms", "p99_ms"], line_dash="search_type" if timeline["search_type"].nunique() > 1 else None,
+                      title="Latency over time (ms)")
+        fig.update_layout(template="plotly_white", height=350)
+        st.plotly_chart(fig, use_container_width=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        fig = px.bar(report.histogram(), x="bucket", y="requests", color="search_type", barmode="group", title="Latency histogram (ms)")
+        fig.update_layout(template="plotly_white", height=350)
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        fig = px.line(timeline, x="second", y="error_rate", color="search_type", title="Error rate")
+        fig.update_layout(template="plotly_white", height=350)
+        st.plotly_chart(fig, use_container_width=True)
+
+    errors = report.samples[~report.samples["ok"]]
+    if not errors.empty:
+        st.markdown("#### ❌ Errors")
+        st.dataframe(errors.groupby(["search_type", "error"]).size().rename("count").reset_index(), hide_index=True, use_container_width=True)
+
+    if st.button("📦 Prepare samples file", use_container_width=True):
+        csv = report.samples.to_csv(index=False)
+        EXPORT_BYTES.inc(len(csv.encode()), format="csv")
+        st.download_button("📥 Download samples", data=csv, file_name=f"loadtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                           mime="text/csv", use_container_width=True)
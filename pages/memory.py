@@ -0,0 +1,145 @@
+import pandas as pd
+import streamlit as st
+
+from env import ADMISSION_MAX_CONCURRENT, ADMISSION_MAX_INFLIGHT_MB, MEMORY_RSS_INTERVAL, SESSION_IDLE_TIMEOUT, SESSION_MEMORY_BUDGET_MB, USER_MAX_ROWS, USER_QUERIES_PER_MINUTE
+from utility.admission import get_admission_controller
+from utility.base import get_session_id
+from utility.memory import evict_idle_results, session_memory_report
+from utility.memprofile import (
+    MEMORY_PROFILING_ENABLED,
+    has_baseline,
+    rss_bytes,
+    rss_history,
+    session_state_sizes,
+    set_baseline,
+    stage_report,
+    top_allocations,
+)
+from utility.startup import import_report, timed_import
+from utility.weaviate import query_flight
+
+def memory():
+    st.markdown("### 🧠 Session Memory")
+    st.caption(
+        f"Results above {SESSION_MEMORY_BUDGET_MB:.0f} MB per session are spilled to memory-mapped files on disk. "
+        f"Results idle for more than {SESSION_IDLE_TIMEOUT // 60} minutes can be evicted."
+    )
+
+    report = session_memory_report()
+    current_session = get_session_id()
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Sessions with results", len(report))
+    with col2:
+        st.metric("Resident (MB)", f"{sum(row['resident_mb'] for row in report):.1f}")
+    with col3:
+        st.metric("Spilled to disk (MB)", f"{sum(row['spilled_mb'] for row in report):.1f}")
+
+    if report:
+        report_df = pd.DataFrame(report)
+        report_df["session"] = [
+            f"{session[:8]} (you)" if session == current_session else session[:8]
+            for session in report_df["session"]
+        ]
+        st.dataframe(report_df, hide_index=True, use_container_width=True)
+    else:
+        st.info("No session currently holds search results.")
+
+    idle_minutes = st.number_input(
+        "Evict results idle for more than (minutes)",
+        min_value=0,
+        value=SESSION_IDLE_TIMEOUT // 60,
+        key="evict_idle_minutes"
+    )
+    if st.button("♻️ Evict idle results", type="primary"):
+        evicted = evict_idle_results(max_idle=idle_minutes * 60)
+        st.success(f"✅ Released results of {evicted} idle session(s)")
+
+    st.markdown("---")
+    st.markdown("### 🚦 Search Admission")
+    st.caption(
+        f"At most {ADMISSION_MAX_CONCURRENT} searches and {ADMISSION_MAX_INFLIGHT_MB:.0f} MB of estimated results in flight; "
+        f"each session may run {USER_QUERIES_PER_MINUTE} searches per minute of up to {USER_MAX_ROWS:,} rows."
+    )
+    admission = get_admission_controller().snapshot()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("In flight", admission["in_flight"])
+    with col2:
+        st.metric("Estimated in flight (MB)", f"{admission['in_flight_mb']:.1f}")
+    with col3:
+        st.metric("Queued", f"{admission['queued']} ({admission['queued_users']} sessions)")
+
+    st.caption("Identical searches running at the same time, from any session, share one request to Weaviate.")
+    flight = query_flight()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Searches sent", f"{flight.calls:,}")
+    with col2:
+        st.metric("Coalesced", f"{flight.coalesced:,}")
+    with col3:
+        st.metric("Sharing now", flight.in_flight())
+
+    st.markdown("### ⏱️ Startup Import Cost")
+    st.caption("First-import time of each lazily loaded module in this process, including its own imports.")
+    report = import_report()
+    if report:
+        st.dataframe(pd.DataFrame(report), hide_index=True, use_container_width=True)
+
+    st.markdown("### ⏱️ Rerun Timings (this session)")
+    st.caption("Wall time of full reruns and of each fragment rerun on the Data Explorer page.")
+    timings = st.session_state.get("rerun_timings", {})
+    if timings:
+        st.dataframe(
+            pd.DataFrame([
+                {"section": name, "runs": len(samples), "last_ms": samples[-1] * 1000, "avg_ms": sum(samples) / len(samples) * 1000}
+                for name, samples in timings.items()
+            ]),
+            hide_index=True,
+            use_container_width=True
+        )
+
+    st.markdown("### 🔬 Memory Profiling")
+    if not MEMORY_PROFILING_ENABLED:
+        st.info("Set MEMORY_PROFILING=true to trace allocations per search stage and rerun. It is off by default and costs nothing while off.")
+        return
+    st.caption(
+        "Traced allocations left behind by each search stage and page section, process-wide: searches of other sessions "
+        f"running at the same time are counted too. RSS is sampled every {MEMORY_RSS_INTERVAL:g}s."
+    )
+    rss = rss_bytes()
+    st.metric("Process RSS (MB)", f"{rss / 2 ** 20:.1f}" if rss is not None else "n/a")
+    history = rss_history()
+    if len(history) > 1:
+        px = timed_import("plotly.express")
+        fig = px.line(history, x="time", y=["rss_mb", "traced_mb"], title="Process memory (MB)")
+        fig.update_layout(template="plotly_white", height=300)
+        st.plotly_chart(fig, use_container_width=True)
+
+    stages = stage_report()
+    if not stages.empty:
+        st.dataframe(stages, hide_index=True, use_container_width=True)
+
+    st.markdown("#### 📍 Top Allocation Sites")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("📌 Set baseline", use_container_width=True, help="Later listings show the growth since now"):
+            set_baseline()
+    with col2:
+        show_sites = st.button("📍 List allocation sites", use_container_width=True)
+    if show_sites:
+        # A full tracemalloc snapshot, only taken on request
+        st.caption("Growth since the baseline." if has_baseline() else "Largest live allocations; set a baseline to see growth instead.")
+        st.dataframe(top_allocations(), hide_index=True, use_container_width=True)
+
+    st.markdown("#### 🗂️ Session State Sizes")
+    if st.button("🗂️ Measure session state", use_container_width=True):
+        sizes = session_state_sizes()
+        sizes["session"] = [f"{session[:8]} (you)" if session == current_session else session[:8] for session in sizes["session"]]
+        st.dataframe(
+            sizes.groupby("session", as_index=False)["size_mb"].sum().sort_values("size_mb", ascending=False),
+            hide_index=True,
+            use_container_width=True
+        )
+        st.dataframe(sizes, hide_index=True, use_container_width=True)
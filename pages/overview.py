@@ -0,0 +1,82 @@
+import pandas as pd
+import streamlit as st
+
+from constants import OVERVIEW_CACHE_TTL, OVERVIEW_MAX_TENANTS, OVERVIEW_POLL_INTERVAL
+from utility.overview import clear_overview_cache, collection_stats, collection_summaries
+from utility.weaviate import get_session_weaviate
+
+
+def collections_table(weaviate, summaries: list, polling: bool):
+    """Counts and schema facts of every collection; polls for counts still running"""
+    stats = collection_stats(weaviate, {row["collection"]: row["multi_tenant"] for row in summaries}, deadline=0)
+    pending = sum(value is None for value in stats.values())
+    if polling and not pending:
+        # All counts are in: a full rerun stops the polling
+        st.rerun()
+
+    rows = []
+    for summary in summaries:
+        counts = stats[summary["collection"]]
+        row = {**summary, "objects": None, "tenants": None, "status": ""}
+        if counts is None:
+            row["status"] = "⏳ counting"
+        elif isinstance(counts, Exception):
+            row["status"] = f"❌ {type(counts).__name__}: {counts}"
+        else:
+            row["objects"], row["tenants"] = counts["objects"], counts["tenants"]
+            if counts["counted_tenants"] == 0 and counts["tenants"]:
+                row["status"] = f"more than {OVERVIEW_MAX_TENANTS} active tenants, not counted"
+        rows.append(row)
+    df = pd.DataFrame(rows, columns=[
+        "collection", "objects", "properties", "references", "vectorizer", "index_type", "named_vectors",
+        "multi_tenant", "tenants", "status", "description",
+    ])
+    df["objects"] = pd.to_numeric(df["objects"])
+    df["tenants"] = pd.to_numeric(df["tenants"])
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Collections", f"{len(df):,}")
+    col2.metric("Objects", f"{int(df['objects'].sum()):,}", help="Sum of the collections counted so far")
+    col3.metric("Multi-tenant", f"{int(df['multi_tenant'].sum()):,}")
+    col4.metric("Still counting", f"{pending:,}")
+
+    search = st.text_input("🔎 Filter collections", placeholder="Name, vectorizer or description", key="overview_filter")
+    if search:
+        text = df["collection"] + " " + df["vectorizer"] + " " + df["description"]
+        df = df[text.str.contains(search, case=False, regex=False)]
+    st.dataframe(
+        df,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "objects": st.column_config.NumberColumn("objects", format="%d"),
+            "tenants": st.column_config.NumberColumn("tenants", format="%d"),
+            "multi_tenant": st.column_config.CheckboxColumn("multi-tenant"),
+        }
+    )
+
+
+def overview():
+    weaviate = get_session_weaviate()
+
+    st.markdown("### 🗂️ Collections Overview")
+    st.caption(
+        "Size and shape of every collection. Object counts are requested for all collections at once and cached "
+        f"for {OVERVIEW_CACHE_TTL}s; the table fills in as they arrive."
+    )
+    if st.button("🔄 Refresh", help="Drop cached counts and schema"):
+        clear_overview_cache()
+
+    try:
+        summaries = collection_summaries(weaviate)
+    except Exception as e:
+        st.error(f"Error listing collections: {str(e)}")
+        return
+    if not summaries:
+        st.info("No classes found in this Weaviate instance.")
+        return
+
+    # Waits up to OVERVIEW_DEADLINE for the counts, then renders and polls for the rest
+    stats = collection_stats(weaviate, {row["collection"]: row["multi_tenant"] for row in summaries})
+    polling = any(value is None for value in stats.values())
+    st.fragment(run_every=OVERVIEW_POLL_INTERVAL if polling else None)(collections_table)(weaviate, summaries, polling)
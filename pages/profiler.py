@@ -0,0 +1,133 @@
+import pandas as pd
+import streamlit as st
+
+from constants import PROFILE_DEFAULT_OBJECT_BUDGET, PROFILE_DEFAULT_TIME_BUDGET, PROFILE_QUANTILES, PROFILE_RESERVOIR_SIZE
+from utility.profiler import collection_properties, profile_collection
+from utility.tracing import span
+from utility.weaviate import get_session_weaviate
+
+QUANTILE_COLUMNS = [f"p{round(p * 100):02d}" for p in PROFILE_QUANTILES]
+
+
+def format_value(value) -> str:
+    # Numbers and ISO dates share the range columns, so everything is shown as text
+    if value is None or value != value:
+        return ""
+    return f"{value:,.6g}" if isinstance(value, float) else str(value)
+
+
+def render_profile(profile, total: int = None):
+    """Overview, value ranges and lengths of a profile, which may still be filling"""
+    progress = f"{profile.objects:,}" + (f" of {total:,}" if total else "") + f" objects in {profile.elapsed:.1f}s"
+    if profile.stopped_by:
+        progress += f", stopped by the {profile.stopped_by}"
+    st.caption(f"📡 {progress}")
+    if total:
+        st.progress(min(1.0, profile.objects / total))
+
+    summary = pd.DataFrame(profile.summary())
+    if summary.empty:
+        return
+    summary["kinds"] = [", ".join(profile.properties[name].kinds) for name in summary["property"]]
+
+    st.markdown("#### 🧾 Overview")
+    st.dataframe(
+        summary[["property", "data_type", "kinds", "null_rate", "distinct"]],
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "null_rate": st.column_config.ProgressColumn("Null rate", min_value=0, max_value=1, format="%.3f"),
+            "distinct": st.column_config.NumberColumn("Distinct ≈", help="HyperLogLog estimate, about 1.6% standard error"),
+        }
+    )
+
+    numeric = summary[summary["min"].notna()]
+    if not numeric.empty:
+        st.markdown("#### 📏 Value Ranges")
+        st.caption("Quantiles are streaming P² estimates; dates are shown in UTC.")
+        ranges = numeric[["property", "min", *QUANTILE_COLUMNS, "max", "mean"]]
+        st.dataframe(ranges.map(format_value), hide_index=True, use_container_width=True)
+
+    lengths = summary[summary["length_min"].notna()]
+    if not lengths.empty:
+        st.markdown("#### 🔤 String and Array Lengths")
+        st.dataframe(lengths[["property", "length_min", "length_p50", "length_max", "length_mean"]], hide_index=True, use_container_width=True)
+
+
+def profiler():
+    weaviate = get_session_weaviate()
+
+    st.markdown("### 🧬 Collection Profiler")
+    st.caption(
+        "Streams a collection with the cursor iterator and keeps fixed-size sketches per property "
+        "(reservoir sample, HyperLogLog distinct count, streaming quantiles), so memory does not grow with the collection."
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        class_name = st.selectbox("📊 Weaviate Class", options=weaviate.get_classes(), key="profile_class")
+    if not class_name:
+        st.info("No classes found in this Weaviate instance.")
+        return
+    tenants = weaviate.get_tenants(class_name)
+    with col2:
+        tenant = st.selectbox("🏢 Tenant", options=tenants, key="profile_tenant") if tenants else None
+
+    collection = weaviate.client.collections.get(class_name)
+    if tenant:
+        collection = collection.with_tenant(tenant)
+    schema = collection_properties(collection)
+
+    properties = st.multiselect("🏷️ Properties", options=list(schema), key="profile_properties", help="Leave empty to profile all properties")
+    col1, col2 = st.columns(2)
+    with col1:
+        time_budget = st.number_input("⏱️ Time budget (s)", min_value=1, value=PROFILE_DEFAULT_TIME_BUDGET, key="profile_time_budget")
+    with col2:
+        object_budget = st.number_input("📦 Object budget", min_value=1, value=PROFILE_DEFAULT_OBJECT_BUDGET, step=10000, key="profile_object_budget")
+
+    if st.button("🧬 Profile", type="primary", use_container_width=True):
+        try:
+            total = collection.aggregate.over_all(total_count=True).total_count
+        except Exception:
+            total = None
+        budget = min(total, object_budget) if total else object_budget
+        placeholder = st.empty()
+
+        def on_progress(profile):
+            with placeholder.container():
+                render_profile(profile, budget)
+
+        try:
+            with span("profile_collection", collection=class_name, tenant=tenant):
+                st.session_state["profile"] = profile_collection(
+                    collection,
+                    {name: schema[name] for name in properties} if properties else schema,
+                    time_budget=time_budget,
+                    object_budget=object_budget,
+                    on_progress=on_progress
+                )
+            st.session_state["profile_total"] = budget
+        except Exception as e:
+            st.error(f"Profiling failed: {e}")
+            return
+        placeholder.empty()
+
+    profile = st.session_state.get("profile")
+    if profile is None:
+        return
+    render_profile(profile, st.session_state.get("profile_total"))
+
+    st.markdown("#### 🎲 Sampled Values")
+    name = st.selectbox("Property", options=list(profile.properties), key="profile_sample_property")
+    st.caption(f"Most frequent values in a uniform sample of up to {PROFILE_RESERVOIR_SIZE:,} non-null values.")
+    top_values = pd.DataFrame(profile.properties[name].top_values())
+    if top_values.empty:
+        st.info("No non-null values seen.")
+    else:
+        top_values["value"] = top_values["value"].astype(str)
+        st.dataframe(
+            top_values,
+            hide_index=True,
+            use_container_width=True,
+            column_config={"sample_share": st.column_config.ProgressColumn("Share of sample", min_value=0, max_value=1, format="%.3f")}
+        )
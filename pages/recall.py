@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from constants import RECALL_DEFAULT_QUERIES, RECALL_EF_VALUES, RECALL_K, RECALL_MAX_OBJECTS
+from utility.recall import exact_neighbors, index_config, load_vectors, measure_recall, recall_curve, summarize, vector_names
+from utility.startup import timed_import
+from utility.tracing import span
+from utility.weaviate import get_session_weaviate
+
+
+def build_baseline(collection, target_vector, distance, queries, k, max_objects, seed):
+    """Sampled query vectors and their exact neighbours; the corpus itself is not kept"""
+    status = st.empty()
+    status.info("📥 Loading vectors...")
+    ids, corpus = load_vectors(collection, target_vector, max_objects, on_progress=lambda n: status.info(f"📥 Loaded {n:,} vectors..."))
+    if not ids:
+        status.empty()
+        raise ValueError("the collection has no vectors for this target")
+    sample = np.random.default_rng(seed).choice(len(ids), size=min(queries, len(ids)), replace=False)
+    status.info(f"🧮 Exact top-{k} of {len(sample)} queries over {len(ids):,} vectors...")
+    neighbors = exact_neighbors(corpus, corpus[sample], k, distance)
+    status.empty()
+    return {
+        "corpus_size": len(ids),
+        "query_ids": [ids[i] for i in sample],
+        "query_vectors": corpus[sample].copy(),
+        "exact_ids": [[ids[j] for j in row] for row in neighbors],
+    }
+
+
+def recall():
+    weaviate = get_session_weaviate()
+
+    st.markdown("### 🎯 Index Recall")
+    st.caption(
+        "Samples objects, computes their exact nearest neighbours locally by brute force, then runs the same "
+        "near_vector queries through the index to measure recall@k and latency."
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        class_name = st.selectbox("📊 Weaviate Class", options=weaviate.get_classes(), key="recall_class")
+    if not class_name:
+        st.info("No classes found in this Weaviate instance.")
+        return
+    collection = weaviate.client.collections.get(class_name)
+    tenants = weaviate.get_tenants(class_name)
+    tenant = None
+    with col2:
+        if tenants:
+            tenant = st.selectbox("🏢 Tenant", options=tenants, key="recall_tenant")
+            collection = collection.with_tenant(tenant)
+        names = vector_names(collection)
+        target_vector = st.selectbox("🧭 Vector", options=names, format_func=lambda name: name or "default", key="recall_vector")
+
+    settings = index_config(collection, target_vector)
+    st.markdown("#### ⚙️ Index Configuration")
+    st.dataframe(pd.DataFrame([settings]), hide_index=True, use_container_width=True)
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        queries = st.number_input("🔢 Queries", min_value=1, value=RECALL_DEFAULT_QUERIES, key="recall_queries")
+    with col2:
+        k = st.number_input("🎯 k", min_value=1, max_value=1000, value=RECALL_K, key="recall_k")
+    with col3:
+        max_objects = st.number_input("📦 Max vectors", min_value=1, value=RECALL_MAX_OBJECTS, step=10000, key="recall_max_objects",
+                                      help="Exact neighbours are only exact if the whole collection fits")
+    with col4:
+        seed = st.number_input("🎲 Seed", min_value=0, value=0, key="recall_seed")
+
+    baseline_key = (weaviate.connection_key, class_name, tenant, target_vector, queries, k, max_objects, seed)
+
+    def baseline():
+        # Reused by later runs with the same sample, e.g. the ef sweep after a first measurement
+        cached = st.session_state.get("recall_baseline")
+        if cached is None or cached[0] != baseline_key:
+            with span("recall.baseline", collection=class_name, queries=queries, k=k):
+                cached = (baseline_key, build_baseline(collection, target_vector, settings["distance"], queries, k, max_objects, seed))
+            st.session_state["recall_baseline"] = cached
+        return cached[1]
+
+    if st.button("🎯 Measure current settings", type="primary", use_container_width=True):
+        try:
+            data = baseline()
+            with st.spinner(f"Running {len(data['query_ids'])} queries..."), span("recall.measure", collection=class_name):
+                results = measure_recall(collection, data["query_ids"], data["query_vectors"], data["exact_ids"], k, target_vector)
+            st.session_state["recall_result"] = {**summarize(settings.get("ef"), results), "per_query": results, "corpus_size": data["corpus_size"]}
+        except Exception as e:
+            st.error(f"Recall measurement failed: {e}")
+
+    if settings["index_type"] == "hnsw":
+        with st.expander("📈 ef sweep"):
+            st.warning("ef is an index setting: the sweep changes it for every user of this collection while it runs, then restores it.")
+            ef_text = st.text_input("ef values", value=", ".join(map(str, RECALL_EF_VALUES)), key="recall_ef_values",
+                                    help="Comma-separated; -1 means dynamic ef")
+            try:
+                ef_values = sorted({int(value) for value in ef_text.split(",") if value.strip()})
+            except ValueError:
+                st.error("ef values must be integers")
+                ef_values = []
+            confirmed = st.checkbox("I understand the collection's ef is changed during the sweep", key="recall_confirm")
+            if st.button("📈 Run sweep", disabled=not (ef_values and confirmed), use_container_width=True):
+                try:
+                    data = baseline()
+                    progress = st.progress(0.0)
+                    with span("recall.sweep", collection=class_name, ef_values=str(ef_values)):
+                        st.session_state["recall_curve"] = recall_curve(
+                            collection, ef_values, data["query_ids"], data["query_vectors"], data["exact_ids"], k, target_vector,
+                            on_progress=lambda done: progress.progress(done / len(ef_values))
+                        )
+                    progress.empty()
+                except Exception as e:
+                    st.error(f"ef sweep failed: {e}")
+
+    result = st.session_state.get("recall_result")
+    if result is not None:
+        st.markdown("#### 📊 Current Settings")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric(f"Recall@{k}", f"{result['recall_mean']:.3f}")
+        col2.metric("Worst query", f"{result['recall_min']:.3f}")
+        col3.metric("p50 latency", f"{result['latency_p50_ms']:.1f} ms")
+        col4.metric("p95 latency", f"{result['latency_p95_ms']:.1f} ms")
+        st.caption(f"Baseline over {result['corpus_size']:,} vectors.")
+        per_query = pd.DataFrame(result["per_query"]).sort_values("recall")
+        per_query["latency"] = per_query["latency"] * 1000
+        st.dataframe(
+            per_query.rename(columns={"latency": "latency_ms"}),
+            hide_index=True,
+            use_container_width=True,
+            column_config={"recall": st.column_config.ProgressColumn("Recall", min_value=0, max_value=1, format="%.2f")}
+        )
+
+    curve = st.session_state.get("recall_curve")
+    if curve:
+        px = timed_import("plotly.express")
+        st.markdown("#### 📈 Recall / Latency Curve")
+        curve_df = pd.DataFrame([{key: value for key, value in point.items() if key != "per_query"} for point in curve])
+        fig = px.line(curve_df, x="latency_p50_ms", y="recall_mean", text="ef", markers=True,
+                      labels={"latency_p50_ms": "p50 latency (ms)", "recall_mean": f"Recall@{k}"})
+        fig.update_traces(textposition="top center")
+        fig.update_layout(template="plotly_white", height=450)
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(curve_df, hide_index=True, use_container_width=True)
@@ -0,0 +1,91 @@
+import pandas as pd
+import streamlit as st
+
+from env import SNAPSHOT_DIR
+from utility.snapshot import default_snapshot_name, delete_snapshot, list_snapshots, save_collection
+from utility.tracing import span
+from utility.weaviate import get_session_weaviate
+
+
+def snapshots():
+    st.markdown("### 📦 Snapshots")
+    st.caption(
+        f"Local Parquet copies of collections and search results in `{SNAPSHOT_DIR}`. "
+        "Open one from the connection page to browse, filter and aggregate it in the Data Explorer without a cluster."
+    )
+
+    if st.session_state.get("offline_snapshot"):
+        st.info(f"📦 Working offline on `{st.session_state['offline_snapshot']}`. Connect to Weaviate to take new snapshots.")
+    else:
+        weaviate = get_session_weaviate()
+        st.markdown("#### 📸 Snapshot a Collection")
+        col1, col2 = st.columns(2)
+        with col1:
+            class_name = st.selectbox("📊 Weaviate Class", options=weaviate.get_classes(), key="snapshot_class")
+        tenants = weaviate.get_tenants(class_name) if class_name else []
+        with col2:
+            tenant = st.selectbox("🏢 Tenant", options=tenants, key="snapshot_tenant") if tenants else None
+        col1, col2 = st.columns(2)
+        with col1:
+            # The timestamped default is fixed once per class so the field keeps what the user types
+            name_key = f"snapshot_name_{class_name}"
+            if name_key not in st.session_state:
+                st.session_state[name_key] = default_snapshot_name(class_name or "snapshot")
+            name = st.text_input("Snapshot name", key=name_key)
+        with col2:
+            max_objects = st.number_input("📦 Max objects (0 = all)", min_value=0, value=0, step=10000, key="snapshot_max_objects")
+
+        if st.button("📸 Take snapshot", type="primary", use_container_width=True, disabled=not class_name):
+            collection = weaviate.client.collections.get(class_name)
+            if tenant:
+                collection = collection.with_tenant(tenant)
+            progress = st.empty()
+            try:
+                with span("snapshot.collection", collection=class_name, tenant=tenant):
+                    manifest = save_collection(
+                        collection, name, class_name, tenant=tenant, max_objects=max_objects or None,
+                        on_progress=lambda rows: progress.info(f"📥 Saved {rows:,} objects...")
+                    )
+                progress.success(f"✅ Saved {manifest['rows']:,} objects to `{name}`")
+            except Exception as e:
+                progress.empty()
+                st.error(f"Snapshot failed: {e}")
+
+    st.markdown("#### 🗄️ Saved Snapshots")
+    manifests = list_snapshots()
+    if not manifests:
+        st.info("No snapshots saved yet.")
+        return
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "name": manifest["name"],
+                "kind": manifest["kind"],
+                "source": manifest["source"],
+                "tenant": manifest.get("tenant"),
+                "rows": manifest["rows"],
+                "columns": len(manifest["schema"]),
+                "created": manifest["created"],
+            }
+            for manifest in manifests
+        ]),
+        hide_index=True,
+        use_container_width=True
+    )
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        selected = st.selectbox("Snapshot", options=[manifest["name"] for manifest in manifests], key="snapshot_selected")
+    with col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        in_use = selected == st.session_state.get("offline_snapshot")
+        if st.button("🗑️ Delete", use_container_width=True, disabled=in_use, help="The snapshot open offline cannot be deleted"):
+            delete_snapshot(selected)
+            st.rerun()
+    manifest = next(manifest for manifest in manifests if manifest["name"] == selected)
+    with st.expander("🧾 Schema"):
+        st.dataframe(
+            pd.DataFrame([{"property": prop, "data_type": data_type} for prop, data_type in manifest["schema"].items()]),
+            hide_index=True,
+            use_container_width=True
+        )
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from utility.admission import (
+    AdmissionCancelledError,
+    AdmissionController,
+    AdmissionTimeoutError,
+    QuotaExceededError,
+)
+
+
+def controller(**kwargs):
+    return AdmissionController(**{"max_concurrent": 1, "max_inflight_bytes": 1000, "max_rows": 0, "queries_per_minute": 0, **kwargs})
+
+
+def queue(admission, user, label, admitted, timeout=5):
+    """Queue a search on a thread; it records `label` when admitted and releases right away"""
+    queued = admission.snapshot()["queued"]
+
+    def run():
+        with admission.admit(user, 10, 10, timeout=timeout):
+            admitted.append(label)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    while admission.snapshot()["queued"] == queued:
+        time.sleep(0.001)
+    return thread
+
+
+def test_users_are_served_round_robin():
+    admission = controller()
+    holder = admission.acquire("holder", 10, 10)
+    admitted = []
+    threads = [queue(admission, user, label, admitted) for user, label in (("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1"), ("c", "c1"))]
+
+    admission.release(holder)
+    for thread in threads:
+        thread.join()
+    assert admitted == ["a1", "b1", "c1", "a2", "a3"]
+
+
+def test_searches_wait_for_slots_and_bytes():
+    admission = controller(max_concurrent=2)
+    first = admission.acquire("a", 10, 600)
+    # Fits the slots but not the byte budget
+    with pytest.raises(AdmissionTimeoutError):
+        admission.acquire("b", 10, 500, timeout=0.05)
+    second = admission.acquire("b", 10, 400, timeout=0.05)
+    # Out of slots
+    with pytest.raises(AdmissionTimeoutError):
+        admission.acquire("c", 10, 0, timeout=0.05)
+    admission.release(first)
+    admission.release(second)
+
+    # Larger than the whole budget: runs alone
+    alone = admission.acquire("a", 10, 5000, timeout=0.05)
+    assert admission.snapshot()["in_flight"] == 1
+    admission.release(alone)
+
+
+def test_timed_out_and_cancelled_searches_leave_the_queue():
+    admission = controller()
+    holder = admission.acquire("holder", 10, 10)
+    with pytest.raises(AdmissionTimeoutError):
+        admission.acquire("a", 10, 10, timeout=0.05)
+
+    cancelled = threading.Event()
+    threading.Timer(0.05, cancelled.set).start()
+    with pytest.raises(AdmissionCancelledError):
+        admission.acquire("b", 10, 10, timeout=5, cancelled=cancelled)
+    assert admission.snapshot()["queued"] == 0
+
+    admission.release(holder)
+    admission.release(admission.acquire("c", 10, 10, timeout=0.05))
+    assert admission.snapshot() == {"in_flight": 0, "in_flight_mb": 0, "queued": 0, "queued_users": 0}
+
+
+def test_quota_counts_dispatched_searches_only():
+    admission = controller(max_rows=100, queries_per_minute=2)
+    with pytest.raises(QuotaExceededError):
+        admission.acquire("a", 1000, 10)
+
+    holder = admission.acquire("holder", 10, 10)
+    with pytest.raises(AdmissionTimeoutError):
+        admission.acquire("a", 10, 10, timeout=0.05)
+    admission.release(holder)
+
+    # Neither the rejected nor the timed-out search used up the quota
+    for _ in range(2):
+        admission.release(admission.acquire("a", 10, 10, timeout=0.05))
+    with pytest.raises(QuotaExceededError):
+        admission.acquire("a", 10, 10)
@@ -0,0 +1,55 @@
+import math
+import random
+
+import pytest
+
+from utility.profiler import HyperLogLog, P2Quantile, Reservoir
+
+
+@pytest.mark.parametrize("distinct", [10, 1000, 10000, 200000])
+def test_hyperloglog_within_three_standard_errors(distinct):
+    sketch = HyperLogLog(precision=12)
+    for i in range(distinct):
+        # Repeats must not count again
+        sketch.add(f"value-{i}")
+        sketch.add(f"value-{i}")
+    standard_error = 1.04 / math.sqrt(1 << 12)
+    assert abs(sketch.count() / distinct - 1) <= 3 * standard_error
+
+
+@pytest.mark.parametrize("distribution, inverse_cdf, tolerance", [
+    ("uniform", lambda p: p, 0.01),
+    ("exponential", lambda p: -math.log(1 - p), 0.05),
+])
+def test_p2_quantiles_close_to_exact(distribution, inverse_cdf, tolerance):
+    rng = random.Random(7)
+    draw = rng.random if distribution == "uniform" else lambda: rng.expovariate(1)
+    estimators = [P2Quantile(p) for p in (0.05, 0.25, 0.5, 0.75, 0.95)]
+    for _ in range(20000):
+        x = draw()
+        for estimator in estimators:
+            estimator.add(x)
+    for estimator in estimators:
+        exact = inverse_cdf(estimator.p)
+        assert abs(estimator.value() - exact) <= tolerance * max(1, exact)
+
+
+def test_p2_with_fewer_than_five_values_is_exact():
+    estimator = P2Quantile(0.5)
+    for x in (5, 1, 3):
+        estimator.add(x)
+    assert estimator.value() == 3
+    assert P2Quantile(0.5).value() is None
+
+
+def test_reservoir_keeps_a_bounded_uniform_sample():
+    counts = [0] * 10
+    for seed in range(2000):
+        reservoir = Reservoir(size=3, rng=random.Random(seed))
+        for item in range(10):
+            reservoir.add(item)
+        assert len(reservoir.items) == 3 and reservoir.seen == 10
+        for item in reservoir.items:
+            counts[item] += 1
+    # Every item is kept with probability 3/10
+    assert all(abs(count / 2000 - 0.3) < 0.05 for count in counts)
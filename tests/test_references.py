@@ -0,0 +1,70 @@
+import types
+import uuid
+
+from utility.references import flatten_references, resolve_references_batched
+
+PROPERTIES = {"Article": ["title"], "Person": ["name", "age"], "Place": ["name", "country"]}
+REFERENCES = {"Article": {"mentions": ["Person", "Place"]}, "Person": {}, "Place": {}}
+
+
+def ref_object(collection, properties=None, references=None):
+    return types.SimpleNamespace(uuid=uuid.uuid4(), collection=collection, properties=properties or {}, references=references)
+
+
+class FakeWeaviate:
+    """Multi-target `mentions` link; fetches return only the objects in `stored`"""
+
+    def __init__(self, stored):
+        self.connection_key = uuid.uuid4().hex
+        self.stored = stored
+        self.client = types.SimpleNamespace(collections=types.SimpleNamespace(get=self._collection))
+
+    def _collection(self, name):
+        def fetch_objects(filters, limit, return_properties, return_references):
+            objects = [obj for obj in self.stored if obj.collection == name and str(obj.uuid) in filters.value]
+            return types.SimpleNamespace(objects=objects)
+        return types.SimpleNamespace(query=types.SimpleNamespace(fetch_objects=fetch_objects))
+
+    def get_properties(self, name):
+        return PROPERTIES[name]
+
+    def get_references(self, name):
+        return REFERENCES[name]
+
+    def get_tenants(self, name):
+        return []
+
+
+def test_flatten_keeps_multi_target_columns_parallel():
+    # The person has no age, the place has no age and the person no country
+    person = ref_object("Person", {"name": "Ada"})
+    place = ref_object("Place", {"name": "Paris", "country": "FR"})
+
+    columns = flatten_references(
+        {"mentions": types.SimpleNamespace(objects=[person, place])},
+        properties={"mentions": ["name", "age", "country"]}
+    )
+
+    assert columns == {
+        "mentions.id": [str(person.uuid), str(place.uuid)],
+        "mentions.name": ["Ada", "Paris"],
+        "mentions.age": [None, None],
+        "mentions.country": [None, "FR"],
+    }
+
+
+def test_batched_resolution_keeps_columns_parallel():
+    person = ref_object("Person", {"name": "Ada"})
+    place = ref_object("Place", {"name": "Paris", "country": "FR"})
+    # Referenced, but gone by the time it is fetched
+    missing = ref_object("Person")
+    article = types.SimpleNamespace(references={"mentions": types.SimpleNamespace(objects=[missing, person, place])})
+
+    [columns] = resolve_references_batched(FakeWeaviate([person, place]), "Article", [article], {"mentions": ["name", "age", "country"]})
+
+    assert columns == {
+        "mentions.id": [str(missing.uuid), str(person.uuid), str(place.uuid)],
+        "mentions.name": [None, "Ada", "Paris"],
+        "mentions.age": [None, None, None],
+        "mentions.country": [None, None, "FR"],
+    }
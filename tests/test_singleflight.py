@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from utility.singleflight import SingleFlight
+
+
+def run_concurrently(flight, key, function, callers):
+    """Call `flight.do` from `callers` threads at once; returns their (result, shared) pairs or exceptions"""
+    outcomes = []
+    lock = threading.Lock()
+
+    def call():
+        try:
+            outcome = flight.do(key, function)
+        except Exception as e:
+            outcome = e
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return {"rows": 3}
+
+    threads, outcomes = run_concurrently(flight, "key", slow, 8)
+    while flight.coalesced < 7:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [shared for _, shared in outcomes].count(False) == 1
+    # Everyone gets the leader's result object itself
+    assert all(result is outcomes[0][0] for result, _ in outcomes)
+    assert flight.in_flight() == 0
+
+
+def test_error_reaches_every_waiter_and_is_not_kept():
+    flight = SingleFlight("test")
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError("cluster unavailable")
+
+    threads, outcomes = run_concurrently(flight, "key", failing, 5)
+    while flight.coalesced < 4:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(outcomes) == 5 and all(isinstance(outcome, ValueError) for outcome in outcomes)
+    # The next call runs again instead of replaying the failure
+    assert flight.do("key", lambda: "ok") == ("ok", False)
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight = SingleFlight("test")
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    with pytest.raises(KeyError):
+        flight.do("c", lambda: {}["missing"])
+    assert flight.calls == 3 and flight.coalesced == 0
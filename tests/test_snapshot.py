@@ -0,0 +1,34 @@
+import types
+import uuid
+
+import utility.snapshot as snapshot
+import utility.snapshot_catalog as snapshot_catalog
+
+
+class FakeCollection:
+    """Collection with uuid and uuid[] properties, returned as uuid.UUID objects like weaviate-client does"""
+
+    def __init__(self, objects):
+        self.objects = objects
+        properties = [types.SimpleNamespace(name=name, data_type=data_type) for name, data_type in (("title", "text"), ("owner", "uuid"), ("related", "uuid[]"))]
+        self.config = types.SimpleNamespace(get=lambda: types.SimpleNamespace(properties=properties, to_dict=lambda: {}))
+
+    def iterator(self, include_vector=False, return_properties=None):
+        return iter(self.objects)
+
+
+def test_save_collection_with_uuid_properties(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_catalog, "SNAPSHOT_DIR", str(tmp_path))
+    owner, related = uuid.uuid4(), [uuid.uuid4(), uuid.uuid4()]
+    objects = [
+        types.SimpleNamespace(uuid=uuid.uuid4(), properties={"title": "a", "owner": owner, "related": related}),
+        types.SimpleNamespace(uuid=uuid.uuid4(), properties={"title": "b", "owner": None, "related": None}),
+    ]
+
+    manifest = snapshot.save_collection(FakeCollection(objects), "uuids", "Articles")
+
+    assert manifest["rows"] == 2
+    df, matched = snapshot.open_snapshot("uuids").query()
+    assert matched == 2
+    assert df["owner"].tolist() == [str(owner), None]
+    assert list(df["related"][0]) == [str(value) for value in related]
@@ -1 +1,8 @@
-from utility.weaviate import * # noqa
+import importlib
+
+
+def __getattr__(name):
+    # Keep `from utility import Weaviate` working without importing the client at package import
+    if name == "Weaviate":
+        return importlib.import_module("utility.weaviate").Weaviate
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
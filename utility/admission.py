@@ -0,0 +1,209 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from constants import ADMISSION_BYTES_PER_VALUE
+from env import (
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_MAX_INFLIGHT_MB,
+    ADMISSION_QUEUE_TIMEOUT,
+    USER_MAX_ROWS,
+    USER_QUERIES_PER_MINUTE,
+)
+from utility.metrics import ERRORS, Gauge
+
+
+class AdmissionError(Exception):
+    """A search was not admitted"""
+
+
+class QuotaExceededError(AdmissionError):
+    pass
+
+
+class AdmissionTimeoutError(AdmissionError):
+    pass
+
+
+class AdmissionCancelledError(AdmissionError):
+    pass
+
+
+def estimate_result_bytes(rows: int, property_count: int) -> int:
+    """Rough size of a result before it exists: rows x (properties + metadata) x average value size"""
+    return int(rows) * (max(1, property_count) + 1) * ADMISSION_BYTES_PER_VALUE
+
+
+class _Ticket:
+    __slots__ = ("user", "rows", "estimated_bytes", "admitted")
+
+    def __init__(self, user: str, rows: int, estimated_bytes: int) -> None:
+        self.user = user
+        self.rows = rows
+        self.estimated_bytes = estimated_bytes
+        self.admitted = False
+
+
+class AdmissionController:
+    """Caps concurrent searches and their estimated result bytes across all sessions
+
+    Searches that don't fit wait in one queue per user, served round-robin, so a user with many
+    queued searches can't push everyone else back. Per-user quotas are checked before queueing; only
+    searches that are dispatched count towards the per-minute quota.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        max_inflight_bytes: int = int(ADMISSION_MAX_INFLIGHT_MB * 1024 * 1024),
+        max_rows: int = USER_MAX_ROWS,
+        queries_per_minute: int = USER_QUERIES_PER_MINUTE
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_inflight_bytes = max_inflight_bytes
+        self.max_rows = max_rows
+        self.queries_per_minute = queries_per_minute
+        self.in_flight = 0
+        self.in_flight_bytes = 0
+        self._queues = OrderedDict()  # user -> deque of waiting tickets; order is the round-robin turn
+        self._recent = {}  # user -> deque of dispatch times within the last minute
+        self._condition = threading.Condition()
+
+    def _check_quota(self, user: str, rows: int):
+        if self.max_rows and rows > self.max_rows:
+            raise QuotaExceededError(f"{rows:,} rows exceeds the per-search limit of {self.max_rows:,}")
+        if not self.queries_per_minute:
+            return
+        recent = self._recent.setdefault(user, deque())
+        now = time.monotonic()
+        while recent and now - recent[0] > 60:
+            recent.popleft()
+        # Searches count once dispatched; the user's queued ones are counted too, so a burst cannot queue past the quota
+        if len(recent) + len(self._queues.get(user, ())) >= self.queries_per_minute:
+            retry_in = f", retry in {60 - (now - recent[0]):.0f}s" if recent else ""
+            raise QuotaExceededError(f"limit of {self.queries_per_minute} searches per minute reached{retry_in}")
+
+    def _order(self) -> list:
+        # Service order: first ticket of every user in turn, then the second of every user, ...
+        queues = [list(tickets) for tickets in self._queues.values()]
+        return [ticket for round_ in itertools.zip_longest(*queues) for ticket in round_ if ticket is not None]
+
+    def _fits(self, ticket: _Ticket) -> bool:
+        if self.in_flight >= self.max_concurrent:
+            return False
+        # A search larger than the whole byte budget still runs, alone
+        return self.in_flight == 0 or self.in_flight_bytes + ticket.estimated_bytes <= self.max_inflight_bytes
+
+    def _dispatch(self):
+        for ticket in self._order():
+            if not self._fits(ticket):
+                break
+            self._queues[ticket.user].popleft()
+            if self._queues[ticket.user]:
+                self._queues.move_to_end(ticket.user)
+            else:
+                del self._queues[ticket.user]
+            ticket.admitted = True
+            if self.queries_per_minute:
+                self._recent.setdefault(ticket.user, deque()).append(time.monotonic())
+            self.in_flight += 1
+            self.in_flight_bytes += ticket.estimated_bytes
+        self._condition.notify_all()
+
+    def _withdraw(self, ticket: _Ticket):
+        tickets = self._queues.get(ticket.user)
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del self._queues[ticket.user]
+        self._dispatch()
+
+    def acquire(self, user: str, rows: int, estimated_bytes: int, timeout: float = ADMISSION_QUEUE_TIMEOUT, on_position=None, cancelled=None) -> _Ticket:
+        """Block until the search may run; `on_position` is called with the 1-based queue position when it changes
+
+        `cancelled` is an optional threading.Event that withdraws the search from the queue when set.
+        """
+        with self._condition:
+            self._check_quota(user, rows)
+            ticket = _Ticket(user, rows, estimated_bytes)
+            self._queues.setdefault(user, deque()).append(ticket)
+            self._dispatch()
+
+            deadline = time.monotonic() + timeout
+            last_position = None
+            while not ticket.admitted:
+                position = self._order().index(ticket) + 1
+                if on_position is not None and position != last_position:
+                    on_position(position)
+                    last_position = position
+                if cancelled is not None and cancelled.is_set():
+                    self._withdraw(ticket)
+                    raise AdmissionCancelledError("cancelled while queued")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._withdraw(ticket)
+                    raise AdmissionTimeoutError(f"still queued at position {position} after {timeout:g}s, try again later")
+                self._condition.wait(min(remaining, 1.0))
+            return ticket
+
+    def release(self, ticket: _Ticket):
+        with self._condition:
+            self.in_flight -= 1
+            self.in_flight_bytes -= ticket.estimated_bytes
+            self._dispatch()
+
+    @contextmanager
+    def admit(self, user: str, rows: int, estimated_bytes: int, timeout: float = ADMISSION_QUEUE_TIMEOUT, on_position=None, cancelled=None):
+        ticket = self.acquire(user, rows, estimated_bytes, timeout, on_position, cancelled)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def snapshot(self) -> dict:
+        with self._condition:
+            return {
+                "in_flight": self.in_flight,
+                "in_flight_mb": self.in_flight_bytes / 1024 / 1024,
+                "queued": sum(len(tickets) for tickets in self._queues.values()),
+                "queued_users": len(self._queues),
+            }
+
+
+_controller = AdmissionController()
+Gauge("admission_in_flight", "Searches currently admitted", function=lambda: _controller.snapshot()["in_flight"])
+Gauge("admission_queued", "Searches waiting for admission", function=lambda: _controller.snapshot()["queued"])
+
+
+def get_admission_controller() -> AdmissionController:
+    return _controller
+
+
+@contextmanager
+def admission_slot(rows: int, property_count: int):
+    """Admit a search of the current session, showing its queue position while it waits"""
+    ctx = get_script_run_ctx()
+    placeholder = st.empty()
+
+    def on_position(position):
+        placeholder.info(f"🚦 Waiting for a search slot: position {position} in queue")
+
+    try:
+        with _controller.admit(
+            ctx.session_id if ctx else "headless",
+            rows,
+            estimate_result_bytes(rows, property_count),
+            on_position=on_position
+        ) as ticket:
+            placeholder.empty()
+            yield ticket
+    except AdmissionError as e:
+        ERRORS.inc(operation="admission", error_type=type(e).__name__)
+        raise
+    finally:
+        placeholder.empty()
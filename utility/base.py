@@ -1,6 +1,10 @@
 import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
+from utility.tracing import traced
+
+@traced("convert_response_to_df", lambda args: {"rows": len(args["data"]) if args["data"] is not None else None})
 def convert_response_to_df(data: dict) -> pd.DataFrame:
     """Convert Weaviate response to pandas DataFrame with enhanced error handling"""
     try:
@@ -47,3 +51,8 @@ def get_data_insights(df: pd.DataFrame) -> dict:
         insights['min_score'] = df['score'].min()
     
     return insights
+
+def get_session_id() -> str:
+    """Return the id of the Streamlit session running the current script"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "headless"
@@ -0,0 +1,67 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+def _timed_query(weaviate, search_type: str, query_kwargs: dict) -> dict:
+    start = time.perf_counter()
+    try:
+        rows = weaviate.query(search_type=search_type, **query_kwargs)
+        error = None if rows is not None else "query failed"
+    except Exception as e:
+        rows, error = None, f"{type(e).__name__}: {e}"
+    return {"rows": rows or [], "latency": time.perf_counter() - start, "error": error}
+
+
+def compare_search_types(weaviate, search_types: list, **query_kwargs) -> dict:
+    """Run the same query with every search type concurrently; returns rows, latency and error per type"""
+    # Object ids are needed to measure overlap between the result lists
+    with_additional = list(query_kwargs.pop("with_additional", []))
+    if "id" not in with_additional:
+        with_additional.append("id")
+    query_kwargs["with_additional"] = with_additional
+
+    with ThreadPoolExecutor(max_workers=max(1, len(search_types))) as executor:
+        # Each search type runs in a copy of this context, so its query spans nest under the caller's span
+        futures = {
+            search_type: executor.submit(contextvars.copy_context().run, _timed_query, weaviate, search_type, query_kwargs)
+            for search_type in search_types
+        }
+        return {search_type: future.result() for search_type, future in futures.items()}
+
+
+def overlap_metrics(ranked_ids: dict, k: int):
+    """Pairwise Jaccard@k and Spearman rank correlation between ranked id lists
+
+    Each list is cut to its top k. Ids missing from a list get rank k + 1,
+    so lists that disagree on membership also disagree on rank.
+    """
+    labels = list(ranked_ids)
+    top_k = [list(ranked_ids[label])[:k] for label in labels]
+    universe = {uid: i for i, uid in enumerate(dict.fromkeys(uid for ids in top_k for uid in ids))}
+
+    membership = np.zeros((len(labels), len(universe)), dtype=np.float32)
+    ranks = np.full((len(labels), len(universe)), k + 1, dtype=np.float64)
+    for row, ids in enumerate(top_k):
+        columns = np.fromiter((universe[uid] for uid in ids), dtype=np.int64, count=len(ids))
+        membership[row, columns] = 1.0
+        ranks[row, columns] = np.arange(1, len(ids) + 1)
+
+    intersection = membership @ membership.T
+    sizes = membership.sum(axis=1)
+    union = sizes[:, None] + sizes[None, :] - intersection
+    jaccard = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+    # Spearman correlation is Pearson correlation of the rank vectors
+    centered = ranks - ranks.mean(axis=1, keepdims=True)
+    norms = np.sqrt((centered ** 2).sum(axis=1))
+    denominator = norms[:, None] * norms[None, :]
+    spearman = np.divide(centered @ centered.T, denominator, out=np.ones_like(denominator), where=denominator > 0)
+
+    return (
+        pd.DataFrame(jaccard, index=labels, columns=labels),
+        pd.DataFrame(spearman, index=labels, columns=labels),
+    )
@@ -0,0 +1,342 @@
+"""Near-duplicate detection over the vectors of a collection
+
+Vectors are streamed with the cursor iterator, normalised and written to a disk-backed float32
+matrix, so resident memory stays bounded by the blocks being compared. Pairs above a cosine
+threshold are found either exactly, with blocked all-pairs matrix products, or with random
+hyperplane LSH: vectors that share a band of signature bits are compared exactly, band by band
+on a thread pool (NumPy releases the GIL in matrix products).
+
+Headless usage:
+
+    python -m utility.dedup --class Articles --threshold 0.95 --display title --out duplicates.csv
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from constants import (
+    DEDUP_BAND_BITS,
+    DEDUP_BANDS,
+    DEDUP_BLOCK_SIZE,
+    DEDUP_DEFAULT_THRESHOLD,
+    DEDUP_EXACT_MAX_OBJECTS,
+    DEDUP_FETCH_BATCH,
+    DEDUP_MAX_PAIRS,
+    DEDUP_STREAM_CHUNK,
+)
+from env import SPILL_DIR
+
+METHODS = ["auto", "exact", "lsh"]
+
+
+class DuplicateReport:
+    """Clusters of near-duplicate objects, largest and most similar first"""
+
+    def __init__(self, ids: list, clusters: list, pairs: int, truncated: bool, method: str, threshold: float, elapsed: float) -> None:
+        self.ids = ids
+        self.clusters = clusters
+        self.pairs = pairs
+        self.truncated = truncated
+        self.method = method
+        self.threshold = threshold
+        self.elapsed = elapsed
+
+    @property
+    def duplicates(self) -> int:
+        """Objects that could be removed, keeping one per cluster"""
+        return sum(cluster["size"] - 1 for cluster in self.clusters)
+
+
+class _StrongestPairs:
+    """The `limit` most similar distinct pairs seen so far; weaker ones are dropped as blocks come in"""
+
+    def __init__(self, n: int, limit: int = DEDUP_MAX_PAIRS) -> None:
+        self.n = n
+        self.limit = limit
+        self.truncated = False
+        # Once full, only pairs at least as similar as the weakest kept one can still make it
+        self.floor = -np.inf
+        self._parts = []
+        self._buffered = 0
+        self._lock = threading.Lock()
+
+    def add(self, left: np.ndarray, right: np.ndarray, similarities: np.ndarray):
+        with self._lock:
+            self._parts.append((left, right, similarities))
+            self._buffered += len(left)
+            # Buffered up to twice the limit, so compaction runs once per `limit` new pairs at most
+            if self._buffered > 2 * self.limit:
+                self._compact()
+
+    def _compact(self):
+        left, right, similarities = (np.concatenate(parts) for parts in zip(*self._parts))
+        # A pair found in several bands is counted once
+        _, first = np.unique(left * self.n + right, return_index=True)
+        left, right, similarities = left[first], right[first], similarities[first]
+        if len(left) > self.limit:
+            self.truncated = True
+            strongest = np.argpartition(-similarities, self.limit - 1)[:self.limit]
+            left, right, similarities = left[strongest], right[strongest], similarities[strongest]
+            self.floor = float(similarities.min())
+        self._parts = [(left, right, similarities)]
+        self._buffered = len(left)
+
+    def result(self) -> tuple:
+        """(i, j, similarity) arrays of the kept pairs"""
+        with self._lock:
+            if not self._parts:
+                return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float32)
+            self._compact()
+            return self._parts[0]
+
+
+def _pairs_within(vectors: np.ndarray, indices: np.ndarray, threshold: float, pairs: _StrongestPairs, block_size: int = DEDUP_BLOCK_SIZE):
+    """Add all pairs i < j of sorted `indices` with similarity >= threshold to `pairs`"""
+    for a in range(0, len(indices), block_size):
+        rows = indices[a:a + block_size]
+        row_vectors = vectors[rows]
+        for b in range(a, len(indices), block_size):
+            columns = indices[b:b + block_size]
+            similarities = row_vectors @ (row_vectors if b == a else vectors[columns]).T
+            if b == a:
+                # Diagonal block: upper triangle only, without self-pairs
+                similarities = np.triu(similarities, 1)
+            r, c = np.nonzero(similarities >= max(threshold, pairs.floor))
+            if len(r):
+                pairs.add(rows[r], columns[c], similarities[r, c])
+
+
+def _band_pairs(vectors: np.ndarray, keys: np.ndarray, threshold: float, pairs: _StrongestPairs):
+    """Add the exact pairs among vectors sharing one LSH band key to `pairs`"""
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+    for bucket in np.split(order, boundaries):
+        if len(bucket) > 1:
+            _pairs_within(vectors, bucket, threshold, pairs)
+
+
+def _clusters(n: int, left: np.ndarray, right: np.ndarray) -> dict:
+    """Connected components of the pair graph: {root: [member indices]}, singletons left out"""
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in zip(left.tolist(), right.tolist()):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    components = {}
+    for index in np.unique(np.concatenate([left, right])).tolist():
+        components.setdefault(find(index), []).append(index)
+    return components
+
+
+def stream_vectors(collection, path: str, target_vector: str = None, max_objects: int = None, lsh_seed: int = None, on_progress=None):
+    """Write normalised vectors to `path` as raw float32; returns ids, dimensions and LSH band keys
+
+    Band keys are only computed when `lsh_seed` is given; the random hyperplanes are drawn from it
+    once the dimensions are known.
+    """
+    ids, keys, chunk = [], [], []
+    dimensions = None
+    planes = None
+    include_vector = [target_vector] if target_vector else True
+
+    with open(path, "wb") as f:
+        def flush():
+            matrix = np.asarray(chunk, dtype=np.float32)
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            f.write(matrix.tobytes())
+            if planes is not None:
+                keys.append(_band_keys(matrix, planes))
+            chunk.clear()
+            if on_progress is not None:
+                on_progress("stream", len(ids), max_objects)
+
+        for obj in collection.iterator(include_vector=include_vector, return_properties=[]):
+            vector = obj.vector.get(target_vector or "default")
+            if vector is None:
+                continue
+            if dimensions is None:
+                dimensions = len(vector)
+                if lsh_seed is not None:
+                    planes = np.random.default_rng(lsh_seed).standard_normal((dimensions, DEDUP_BANDS * DEDUP_BAND_BITS)).astype(np.float32)
+            ids.append(str(obj.uuid))
+            chunk.append(vector)
+            if len(chunk) == DEDUP_STREAM_CHUNK:
+                flush()
+            if max_objects and len(ids) >= max_objects:
+                break
+        if chunk:
+            flush()
+    return ids, dimensions, np.concatenate(keys) if keys else None
+
+
+def _band_keys(matrix: np.ndarray, planes: np.ndarray) -> np.ndarray:
+    """One integer key per band from the signs of random projections (SimHash)"""
+    bands = planes.shape[1] // DEDUP_BAND_BITS
+    bits = (matrix @ planes > 0).reshape(len(matrix), bands, DEDUP_BAND_BITS)
+    return (bits * (1 << np.arange(DEDUP_BAND_BITS, dtype=np.int32))).sum(axis=2, dtype=np.int32)
+
+
+def find_duplicates(
+    collection,
+    threshold: float,
+    target_vector: str = None,
+    method: str = "auto",
+    max_objects: int = None,
+    max_workers: int = None,
+    seed: int = 0,
+    on_progress=None
+) -> DuplicateReport:
+    """Cluster objects whose vectors have cosine similarity >= threshold
+
+    `method` "exact" compares all pairs, "lsh" only pairs that share an LSH band and may miss some;
+    "auto" is exact up to DEDUP_EXACT_MAX_OBJECTS vectors. `on_progress(stage, done, total)` reports progress.
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError("threshold must be in (0, 1]")
+    start = time.monotonic()
+    os.makedirs(SPILL_DIR, exist_ok=True)
+    path = os.path.join(SPILL_DIR, f"dedup-{uuid.uuid4().hex}.f32")
+    vectors = None
+    try:
+        # Band keys are cheap next to streaming, so "auto" computes them and decides on the actual count
+        ids, dimensions, keys = stream_vectors(collection, path, target_vector, max_objects, None if method == "exact" else seed, on_progress)
+        if not ids:
+            return DuplicateReport([], [], 0, False, method, threshold, time.monotonic() - start)
+        vectors = np.memmap(path, dtype=np.float32, mode="r", shape=(len(ids), dimensions))
+
+        # Capped while collecting, so memory stays bounded however many pairs pass the threshold
+        pairs = _StrongestPairs(len(ids))
+        use_lsh = method == "lsh" or (method == "auto" and len(ids) > DEDUP_EXACT_MAX_OBJECTS)
+        if use_lsh:
+            bands = keys.shape[1]
+            done = 0
+            with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+                for _ in executor.map(lambda band: _band_pairs(vectors, keys[:, band], threshold, pairs), range(bands)):
+                    done += 1
+                    if on_progress is not None:
+                        on_progress("compare", done, bands)
+        else:
+            if on_progress is not None:
+                on_progress("compare", 0, 1)
+            _pairs_within(vectors, np.arange(len(ids)), threshold, pairs)
+            if on_progress is not None:
+                on_progress("compare", 1, 1)
+        left, right, similarities = pairs.result()
+        truncated = pairs.truncated
+
+        clusters = []
+        for members in _clusters(len(ids), left, right).values():
+            # The first object seen is kept; the others are measured against it
+            keeper = members[0]
+            member_similarities = vectors[members] @ vectors[keeper]
+            clusters.append({
+                "size": len(members),
+                "members": members,
+                "similarities": member_similarities.tolist(),
+                "max_similarity": float(np.max(member_similarities[1:])),
+                "min_similarity": float(np.min(member_similarities[1:])),
+            })
+        clusters.sort(key=lambda cluster: (-cluster["size"], -cluster["max_similarity"]))
+        return DuplicateReport(ids, clusters, int(len(left)), truncated, "lsh" if use_lsh else "exact", threshold, time.monotonic() - start)
+    finally:
+        # The mapping is unmapped with its last reference, before its file goes, also after an error
+        vectors = None
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def report_rows(collection, report: DuplicateReport, display_properties: list = None) -> pd.DataFrame:
+    """One row per clustered object with its cluster, role and chosen properties, for review and export"""
+    from weaviate.classes.query import Filter
+
+    rows = []
+    for number, cluster in enumerate(report.clusters, start=1):
+        for position, (member, similarity) in enumerate(zip(cluster["members"], cluster["similarities"])):
+            rows.append({
+                "cluster": number,
+                "cluster_size": cluster["size"],
+                "role": "keep" if position == 0 else "duplicate",
+                "similarity": similarity,
+                "uuid": report.ids[member],
+            })
+
+    if display_properties and rows:
+        values = {}
+        ids = [row["uuid"] for row in rows]
+        for start in range(0, len(ids), DEDUP_FETCH_BATCH):
+            batch = ids[start:start + DEDUP_FETCH_BATCH]
+            response = collection.query.fetch_objects(
+                filters=Filter.by_id().contains_any(batch),
+                limit=len(batch),
+                return_properties=display_properties
+            )
+            values.update({str(obj.uuid): obj.properties for obj in response.objects})
+        for row in rows:
+            row.update({name: values.get(row["uuid"], {}).get(name) for name in display_properties})
+    return pd.DataFrame(rows)
+
+
+def main(argv=None) -> int:
+    from env import TRANSPORT_PROFILE, WEAVIATE_API_KEY, WEAVIATE_HOST, WEAVIATE_PORT
+    from utility.weaviate import Weaviate
+
+    parser = argparse.ArgumentParser(prog="python -m utility.dedup", description=__doc__.splitlines()[0])
+    parser.add_argument("--class", dest="class_name", required=True, help="Collection to scan")
+    parser.add_argument("--tenant", default=None)
+    parser.add_argument("--vector", default=None, help="Named vector (default: the collection's only vector)")
+    parser.add_argument("--threshold", type=float, default=DEDUP_DEFAULT_THRESHOLD, help="Minimum cosine similarity")
+    parser.add_argument("--method", default="auto", choices=METHODS)
+    parser.add_argument("--max-objects", type=int, default=None)
+    parser.add_argument("--display", nargs="*", default=[], help="Properties to include in the output")
+    parser.add_argument("--out", default="duplicates.csv")
+    parser.add_argument("--host", default=WEAVIATE_HOST)
+    parser.add_argument("--port", default=WEAVIATE_PORT or "8080")
+    parser.add_argument("--api-key", default=WEAVIATE_API_KEY)
+    parser.add_argument("--transport-profile", default=TRANSPORT_PROFILE)
+    args = parser.parse_args(argv)
+
+    weaviate = Weaviate(args.host, args.port, args.api_key, None, None, args.transport_profile)
+    weaviate.client = weaviate.create_client()
+    try:
+        collection = weaviate.client.collections.get(args.class_name)
+        if args.tenant:
+            collection = collection.with_tenant(args.tenant)
+
+        def progress(stage, done, total):
+            print(f"\r{stage}: {done:,}" + (f"/{total:,}" if total else ""), end="", file=sys.stderr, flush=True)
+
+        report = find_duplicates(collection, args.threshold, args.vector, args.method, args.max_objects, on_progress=progress)
+        print(file=sys.stderr)
+        rows = report_rows(collection, report, args.display)
+    finally:
+        weaviate.close()
+
+    rows.to_csv(args.out, index=False)
+    print(
+        f"{len(report.clusters):,} clusters, {report.duplicates:,} duplicates among {len(report.ids):,} objects "
+        f"({report.method}, {report.elapsed:.1f}s); written to {args.out}",
+        file=sys.stderr
+    )
+    if report.truncated:
+        print(f"Only the {DEDUP_MAX_PAIRS:,} most similar pairs were kept; raise the threshold for a complete result", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
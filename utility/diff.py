@@ -0,0 +1,248 @@
+"""Object-level diff of two collections, e.g. before and after a reindex or a migration to another cluster
+
+Both sides are read with the cursor iterator, which returns objects in UUID order, and merge-joined
+on their ids. Each object is reduced to a digest of its properties (and optionally its vectors) as
+it streams past, so memory holds one cursor page per reader plus a bounded sample of differences,
+whatever the collection size. The UUID space is split into ranges that are diffed concurrently,
+each range by its own pair of cursors.
+
+Headless usage:
+
+    python -m utility.diff --class Articles --target-host new-cluster --target-api-key ... --vectors
+"""
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from constants import DIFF_PAGE_SIZE, DIFF_READERS, DIFF_SAMPLE_SIZE
+
+KINDS = ["missing", "extra", "changed"]
+_UUID_SPACE = 1 << 128
+
+
+class DiffReport:
+    """Counts and id samples of objects missing from the target, extra in the target, and changed"""
+
+    def __init__(self, source_count: int, target_count: int, counts: dict, samples: dict, properties: list,
+                 schema: dict, include_vectors: bool, ranges: int, elapsed: float) -> None:
+        self.source_count = source_count
+        self.target_count = target_count
+        self.counts = counts
+        self.samples = samples
+        self.properties = properties
+        self.schema = schema
+        self.include_vectors = include_vectors
+        self.ranges = ranges
+        self.elapsed = elapsed
+
+    @property
+    def identical(self) -> bool:
+        # Properties present on one side only are reported in `schema` but not compared
+        return not any(self.counts.values())
+
+    def sample_rows(self) -> pd.DataFrame:
+        """One row per sampled difference, in UUID order within each kind"""
+        return pd.DataFrame(
+            [{"status": kind, "id": object_id, "difference": difference} for kind in KINDS for object_id, difference in self.samples[kind]],
+            columns=["status", "id", "difference"]
+        )
+
+
+def uuid_ranges(count: int) -> list:
+    """`count` equal (after, end) slices of the UUID space; `after` is the cursor start, `end` the exclusive bound"""
+    bounds = [_UUID_SPACE * i // count for i in range(count + 1)]
+    return [
+        (str(uuid.UUID(int=start - 1)) if start else None, end)
+        for start, end in zip(bounds, bounds[1:])
+    ]
+
+
+def _digest(payload: bytes) -> bytes:
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def property_digest(properties: dict) -> bytes:
+    # Canonical JSON; dates, UUIDs and geo coordinates compare by their text form
+    return _digest(json.dumps(properties, sort_keys=True, default=str).encode())
+
+
+def vector_digest(vectors: dict) -> bytes:
+    parts = [name.encode() + np.asarray(vectors[name], dtype=np.float32).tobytes() for name in sorted(vectors)]
+    return _digest(b"\0".join(parts))
+
+
+def _stream(collection, after, end: int, properties: list, include_vectors: bool, stop: threading.Event, counter: list, lock: threading.Lock):
+    """(uuid int, id, property digest, vector digest) of the objects in [after, end), in UUID order"""
+    previous = -1
+    scanned = 0
+    for obj in collection.iterator(include_vector=include_vectors, return_properties=properties, after=after, cache_size=DIFF_PAGE_SIZE):
+        key = obj.uuid.int if isinstance(obj.uuid, uuid.UUID) else uuid.UUID(str(obj.uuid)).int
+        if key >= end or stop.is_set():
+            break
+        if key <= previous:
+            raise ValueError("the cursor did not return objects in UUID order")
+        previous = key
+        scanned += 1
+        if scanned % DIFF_PAGE_SIZE == 0:
+            with lock:
+                counter[0] += DIFF_PAGE_SIZE
+        yield key, str(obj.uuid), property_digest(obj.properties), vector_digest(obj.vector) if include_vectors else None
+    with lock:
+        counter[0] += scanned % DIFF_PAGE_SIZE
+
+
+def _diff_range(source, target, after, end: int, properties: list, include_vectors: bool, sample_size: int, stop, counters, lock) -> dict:
+    """Merge-join the two cursors of one UUID range"""
+    counts = dict.fromkeys(KINDS, 0)
+    samples = {kind: [] for kind in KINDS}
+
+    def record(kind, object_id, difference):
+        counts[kind] += 1
+        if len(samples[kind]) < sample_size:
+            samples[kind].append((object_id, difference))
+
+    left = _stream(source, after, end, properties, include_vectors, stop, counters[0], lock)
+    right = _stream(target, after, end, properties, include_vectors, stop, counters[1], lock)
+    a, b = next(left, None), next(right, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[0] < b[0]):
+            record("missing", a[1], "only in source")
+            a = next(left, None)
+        elif a is None or b[0] < a[0]:
+            record("extra", b[1], "only in target")
+            b = next(right, None)
+        else:
+            changed = [name for name, x, y in (("properties", a[2], b[2]), ("vectors", a[3], b[3])) if x != y]
+            if changed:
+                record("changed", a[1], ", ".join(changed))
+            a, b = next(left, None), next(right, None)
+    return {"counts": counts, "samples": samples}
+
+
+def property_names(collection) -> list:
+    return [prop.name for prop in collection.config.get().properties]
+
+
+def diff_collections(
+    source,
+    target,
+    properties: list = None,
+    include_vectors: bool = False,
+    readers: int = DIFF_READERS,
+    sample_size: int = DIFF_SAMPLE_SIZE,
+    on_progress=None
+) -> DiffReport:
+    """Compare every object of two collections, which may live on different clusters
+
+    `properties` defaults to the properties both schemas share. `on_progress(source_scanned, target_scanned)`
+    is called from the calling thread while the range readers run.
+    """
+    start = time.monotonic()
+    source_properties, target_properties = property_names(source), property_names(target)
+    schema = {
+        "only_source": [name for name in source_properties if name not in target_properties],
+        "only_target": [name for name in target_properties if name not in source_properties],
+    }
+    if properties is None:
+        properties = [name for name in source_properties if name in target_properties]
+
+    ranges = uuid_ranges(max(1, readers))
+    counters = ([0], [0])
+    lock = threading.Lock()
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [
+            executor.submit(_diff_range, source, target, after, end, properties, include_vectors, sample_size, stop, counters, lock)
+            for after, end in ranges
+        ]
+        try:
+            pending = futures
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_EXCEPTION)
+                if on_progress is not None:
+                    on_progress(counters[0][0], counters[1][0])
+                for future in done:
+                    future.result()
+        finally:
+            # The first failing range stops the others at their next object
+            stop.set()
+        parts = [future.result() for future in futures]
+
+    # Ranges are in UUID order, so concatenating their samples keeps that order
+    counts = {kind: sum(part["counts"][kind] for part in parts) for kind in KINDS}
+    samples = {kind: [sample for part in parts for sample in part["samples"][kind]][:sample_size] for kind in KINDS}
+    return DiffReport(counters[0][0], counters[1][0], counts, samples, properties, schema, include_vectors, len(ranges), time.monotonic() - start)
+
+
+def main(argv=None) -> int:
+    from env import TRANSPORT_PROFILE, WEAVIATE_API_KEY, WEAVIATE_HOST, WEAVIATE_PORT
+    from utility.weaviate import Weaviate
+
+    parser = argparse.ArgumentParser(prog="python -m utility.diff", description=__doc__.splitlines()[0])
+    parser.add_argument("--class", dest="class_name", required=True, help="Source collection")
+    parser.add_argument("--tenant", default=None)
+    parser.add_argument("--target-class", default=None, help="Target collection (default: same name)")
+    parser.add_argument("--target-tenant", default=None, help="Target tenant (default: same tenant)")
+    parser.add_argument("--properties", nargs="*", default=None, help="Properties to compare (default: all shared)")
+    parser.add_argument("--vectors", action="store_true", help="Also compare vectors")
+    parser.add_argument("--readers", type=int, default=DIFF_READERS, help="Concurrent UUID range readers")
+    parser.add_argument("--samples", type=int, default=DIFF_SAMPLE_SIZE, help="Ids kept per kind of difference")
+    parser.add_argument("--out", default=None, help="CSV file for the sampled differences")
+    parser.add_argument("--host", default=WEAVIATE_HOST)
+    parser.add_argument("--port", default=WEAVIATE_PORT or "8080")
+    parser.add_argument("--api-key", default=WEAVIATE_API_KEY)
+    parser.add_argument("--target-host", default=None, help="Target cluster (default: the source cluster)")
+    parser.add_argument("--target-port", default=None)
+    parser.add_argument("--target-api-key", default=None)
+    parser.add_argument("--transport-profile", default=TRANSPORT_PROFILE)
+    args = parser.parse_args(argv)
+
+    source_weaviate = Weaviate(args.host, args.port, args.api_key, None, None, args.transport_profile)
+    source_weaviate.client = source_weaviate.create_client()
+    target_weaviate = source_weaviate
+    try:
+        if args.target_host:
+            target_weaviate = Weaviate(args.target_host, args.target_port or args.port, args.target_api_key or args.api_key, None, None, args.transport_profile)
+            target_weaviate.client = target_weaviate.create_client()
+        source = source_weaviate.client.collections.get(args.class_name)
+        target = target_weaviate.client.collections.get(args.target_class or args.class_name)
+        if args.tenant:
+            source = source.with_tenant(args.tenant)
+        if args.target_tenant or args.tenant:
+            target = target.with_tenant(args.target_tenant or args.tenant)
+
+        def progress(source_scanned, target_scanned):
+            print(f"\rsource: {source_scanned:,}  target: {target_scanned:,}", end="", file=sys.stderr, flush=True)
+
+        report = diff_collections(source, target, args.properties, args.vectors, args.readers, args.samples, on_progress=progress)
+        print(file=sys.stderr)
+    finally:
+        if target_weaviate is not source_weaviate:
+            target_weaviate.close()
+        source_weaviate.close()
+
+    if args.out:
+        report.sample_rows().to_csv(args.out, index=False)
+    for side in ("only_source", "only_target"):
+        if report.schema[side]:
+            print(f"Properties {side.replace('_', ' in ')}: {', '.join(report.schema[side])}", file=sys.stderr)
+    print(
+        f"{report.source_count:,} source and {report.target_count:,} target objects: "
+        + ", ".join(f"{report.counts[kind]:,} {kind}" for kind in KINDS)
+        + f" ({report.elapsed:.1f}s)" + (f"; samples written to {args.out}" if args.out else ""),
+        file=sys.stderr
+    )
+    # Non-zero when the collections differ, so the diff can gate a migration script
+    return 0 if report.identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
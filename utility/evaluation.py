@@ -0,0 +1,335 @@
+"""Offline relevance and latency evaluation of search configurations against labeled queries
+
+Headless usage against a running Weaviate:
+
+    python -m utility.evaluation --qrels qrels.csv --class Articles --limits 10 50
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from constants import (
+    DEFAULT_ALPHA,
+    DEFAULT_FUSION,
+    EVAL_ALPHAS,
+    EVAL_LIMITS,
+    EVAL_MAX_WORKERS,
+    FUSION_TYPES,
+    SEARCH_TYPES_LIST,
+)
+
+QUALITY_METRICS = ["recall", "mrr", "ndcg"]
+
+
+def load_qrels(source, file_format: str = None) -> dict:
+    """Read relevance judgments from CSV or JSONL
+
+    One row per judged document with columns query_id, query, doc_id and an optional
+    graded relevance (default 1). Returns {query_id: {"query": text, "relevant": {doc_id: grade}}}.
+    """
+    name = getattr(source, "name", source)
+    file_format = file_format or ("jsonl" if str(name).lower().endswith((".jsonl", ".json")) else "csv")
+    if file_format == "jsonl":
+        qrels_df = pd.read_json(source, lines=True, dtype={"query_id": str, "doc_id": str})
+    else:
+        qrels_df = pd.read_csv(source, dtype={"query_id": str, "doc_id": str})
+
+    missing = {"query_id", "query", "doc_id"} - set(qrels_df.columns)
+    if missing:
+        raise ValueError(f"qrels are missing column(s): {', '.join(sorted(missing))}")
+    if "relevance" not in qrels_df.columns:
+        qrels_df["relevance"] = 1
+
+    qrels = {}
+    for row in qrels_df.itertuples(index=False):
+        entry = qrels.setdefault(row.query_id, {"query": row.query, "relevant": {}})
+        if row.relevance > 0:
+            entry["relevant"][row.doc_id] = float(row.relevance)
+    return qrels
+
+
+def recall_at_k(ranked: list, relevant: dict, k: int) -> float:
+    if not relevant:
+        return 0.0
+    return len(set(ranked[:k]) & relevant.keys()) / len(relevant)
+
+
+def reciprocal_rank(ranked: list, relevant: dict, k: int) -> float:
+    for rank, doc_id in enumerate(ranked[:k], start=1):
+        if doc_id in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranked: list, relevant: dict, k: int) -> float:
+    """Normalized discounted cumulative gain with exponential gain for graded judgments"""
+    dcg = sum((2 ** relevant.get(doc_id, 0) - 1) / math.log2(rank + 2) for rank, doc_id in enumerate(ranked[:k]))
+    ideal = sorted(relevant.values(), reverse=True)[:k]
+    idcg = sum((2 ** grade - 1) / math.log2(rank + 2) for rank, grade in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+
+def build_grid(search_types: list, alphas: list, fusions: list, limits: list) -> list:
+    """Every distinct configuration; alpha and fusion only vary for hybrid search"""
+    grid = []
+    for search_type, alpha, fusion, limit in itertools.product(search_types, alphas, fusions, limits):
+        config = {
+            "search_type": search_type,
+            "alpha": alpha if search_type == "hybrid" else None,
+            "fusion": fusion if search_type == "hybrid" else None,
+            "limit": int(limit),
+        }
+        if config not in grid:
+            grid.append(config)
+    return grid
+
+
+class ResultCache:
+    """Ranked ids and latency of successful runs per configuration and query, optionally persisted as one JSON file per configuration"""
+
+    def __init__(self, cache_dir: str = None) -> None:
+        self.cache_dir = cache_dir
+        self._entries = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(connection_key: str, class_name: str, id_property: str, config: dict) -> str:
+        payload = json.dumps({"connection": connection_key, "class_name": class_name, "id_property": id_property, **config}, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def query_key(query_id: str, query: str) -> str:
+        # Another qrels file may reuse the ids for different query texts
+        return f"{query_id}:{hashlib.sha1(query.encode()).hexdigest()[:12]}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> dict:
+        if key not in self._entries:
+            self._entries[key] = {}
+            if self.cache_dir and os.path.exists(self._path(key)):
+                with open(self._path(key)) as f:
+                    self._entries[key] = json.load(f)
+        return self._entries[key]
+
+    def save(self, key: str):
+        if self.cache_dir:
+            with open(self._path(key), "w") as f:
+                json.dump(self._entries[key], f)
+
+
+def _run_query(weaviate, class_name: str, properties: list, id_property: str, config: dict, query: str) -> dict:
+    start = time.perf_counter()
+    try:
+        rows = weaviate.query(
+            class_name=class_name,
+            query=query,
+            properties=properties,
+            with_additional=["id"],
+            search_type=config["search_type"],
+            alpha=config["alpha"] if config["alpha"] is not None else DEFAULT_ALPHA,
+            fusion=config["fusion"] or DEFAULT_FUSION,
+            limit=config["limit"],
+        )
+        if rows is None:
+            raise RuntimeError("query failed")
+        return {"ids": [str(row.get(id_property)) for row in rows], "latency": time.perf_counter() - start, "error": None}
+    except Exception as e:
+        return {"ids": [], "latency": time.perf_counter() - start, "error": f"{type(e).__name__}: {e}"}
+
+
+def run_grid(
+    weaviate,
+    class_name: str,
+    qrels: dict,
+    grid: list,
+    id_property: str = None,
+    max_workers: int = EVAL_MAX_WORKERS,
+    cache: ResultCache = None,
+    progress=None
+) -> dict:
+    """Run every query under every configuration with bounded concurrency, skipping cached runs
+
+    Returns {cache key: {query_id: {ids, latency, error}}} aligned with `grid`. Failed runs are returned
+    but not cached, so the next run retries them.
+    """
+    cache = cache or ResultCache()
+    id_property = id_property or "id"
+    # Only the judged identifier is needed to score a ranking
+    properties = [id_property] if id_property != "id" else weaviate.get_properties(class_name)[:1]
+
+    keys = [cache.key(weaviate.connection_key, class_name, id_property, config) for config in grid]
+    runs = {key: {} for key in keys}
+    for key in keys:
+        for query_id, entry in qrels.items():
+            run = cache.get(key).get(cache.query_key(query_id, entry["query"]))
+            if run is not None:
+                runs[key][query_id] = run
+    pending = [
+        (key, config, query_id)
+        for key, config in zip(keys, grid)
+        for query_id in qrels
+        if query_id not in runs[key]
+    ]
+
+    done, total = len(grid) * len(qrels) - len(pending), len(grid) * len(qrels)
+    if progress:
+        progress(done, total)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(_run_query, weaviate, class_name, properties, id_property, config, qrels[query_id]["query"]): (key, query_id)
+            for key, config, query_id in pending
+        }
+        for future in as_completed(futures):
+            key, query_id = futures[future]
+            run = runs[key][query_id] = future.result()
+            if run["error"] is None:
+                cache.get(key)[cache.query_key(query_id, qrels[query_id]["query"])] = run
+            done += 1
+            if progress:
+                progress(done, total)
+
+    for key in dict.fromkeys(key for key, _, _ in pending):
+        cache.save(key)
+    return runs
+
+
+def summarize(qrels: dict, grid: list, runs: dict) -> pd.DataFrame:
+    """Mean quality metrics at each configuration's limit next to p50/p95 latency"""
+    records = []
+    for config, query_runs in zip(grid, runs.values()):
+        k = config["limit"]
+        scored = [(query_runs[query_id], entry["relevant"]) for query_id, entry in qrels.items() if query_id in query_runs]
+        ok = [(run, relevant) for run, relevant in scored if run["error"] is None]
+        latencies_ms = np.array([run["latency"] * 1000 for run, _ in ok]) if ok else np.array([np.nan])
+        records.append({
+            **config,
+            "queries": len(ok),
+            "errors": len(scored) - len(ok),
+            "recall": float(np.mean([recall_at_k(run["ids"], relevant, k) for run, relevant in ok])) if ok else np.nan,
+            "mrr": float(np.mean([reciprocal_rank(run["ids"], relevant, k) for run, relevant in ok])) if ok else np.nan,
+            "ndcg": float(np.mean([ndcg_at_k(run["ids"], relevant, k) for run, relevant in ok])) if ok else np.nan,
+            "p50_ms": float(np.percentile(latencies_ms, 50)),
+            "p95_ms": float(np.percentile(latencies_ms, 95)),
+        })
+    return pd.DataFrame(records)
+
+
+def pareto_frontier(summary: pd.DataFrame, quality: str = "ndcg", latency: str = "p95_ms") -> pd.Series:
+    """Mask of configurations no other configuration beats on both latency and quality"""
+    on_frontier = pd.Series(False, index=summary.index)
+    best_quality = -np.inf
+    for index, row in summary.dropna(subset=[quality, latency]).sort_values([latency, quality], ascending=[True, False]).iterrows():
+        if row[quality] > best_quality:
+            on_frontier[index] = True
+            best_quality = row[quality]
+    return on_frontier
+
+
+def config_label(config) -> str:
+    if config["search_type"] == "hybrid":
+        return f"hybrid α={config['alpha']:g} {config['fusion']} @{config['limit']}"
+    return f"{config['search_type']} @{config['limit']}"
+
+
+def frontier_chart(summary: pd.DataFrame, quality: str = "ndcg", latency: str = "p95_ms"):
+    """Scatter of latency against quality per configuration with the Pareto frontier drawn through it"""
+    import plotly.express as px
+
+    chart_df = summary.assign(
+        configuration=[config_label(row) for _, row in summary.iterrows()],
+        frontier=pareto_frontier(summary, quality, latency),
+    )
+    fig = px.scatter(
+        chart_df,
+        x=latency,
+        y=quality,
+        color="search_type",
+        symbol="frontier",
+        hover_name="configuration",
+        hover_data=["recall", "mrr", "ndcg", "p50_ms", "p95_ms"],
+        title=f"Latency vs quality ({quality} against {latency})",
+    )
+    frontier_df = chart_df[chart_df["frontier"]].sort_values(latency)
+    fig.add_scatter(x=frontier_df[latency], y=frontier_df[quality], mode="lines", name="frontier", line={"dash": "dash", "color": "#aaaaaa"})
+    fig.update_layout(plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)", font_color="#ffffff")
+    return fig
+
+
+def build_report(class_name: str, qrels: dict, summary: pd.DataFrame, quality: str = "ndcg", latency: str = "p95_ms") -> dict:
+    """Machine-readable evaluation report"""
+    frontier = pareto_frontier(summary, quality, latency)
+    configurations = summary.assign(frontier=frontier).replace({np.nan: None}).to_dict(orient="records")
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "class_name": class_name,
+        "queries": len(qrels),
+        "judgments": sum(len(entry["relevant"]) for entry in qrels.values()),
+        "frontier_axes": {"quality": quality, "latency": latency},
+        "configurations": configurations,
+    }
+
+
+def main(argv=None) -> int:
+    from env import TRANSPORT_PROFILE, WEAVIATE_API_KEY, WEAVIATE_HOST, WEAVIATE_PORT
+    from utility.weaviate import Weaviate
+
+    parser = argparse.ArgumentParser(prog="python -m utility.evaluation", description=__doc__.splitlines()[0])
+    parser.add_argument("--qrels", required=True, help="CSV or JSONL with query_id, query, doc_id[, relevance]")
+    parser.add_argument("--class", dest="class_name", required=True, help="Collection to search")
+    parser.add_argument("--id-property", default=None, help="Property holding doc_id (default: object UUID)")
+    parser.add_argument("--search-types", nargs="+", default=SEARCH_TYPES_LIST, choices=SEARCH_TYPES_LIST)
+    parser.add_argument("--alphas", nargs="+", type=float, default=EVAL_ALPHAS)
+    parser.add_argument("--fusions", nargs="+", default=FUSION_TYPES, choices=FUSION_TYPES)
+    parser.add_argument("--limits", nargs="+", type=int, default=EVAL_LIMITS)
+    parser.add_argument("--workers", type=int, default=EVAL_MAX_WORKERS, help="Concurrent queries")
+    parser.add_argument("--cache-dir", default=None, help="Reuse results of configurations that already ran")
+    parser.add_argument("--quality", default="ndcg", choices=QUALITY_METRICS, help="Quality axis of the frontier")
+    parser.add_argument("--report", default="evaluation_report.json")
+    parser.add_argument("--chart", default="evaluation_frontier.html")
+    parser.add_argument("--host", default=WEAVIATE_HOST)
+    parser.add_argument("--port", default=WEAVIATE_PORT or "8080")
+    parser.add_argument("--api-key", default=WEAVIATE_API_KEY)
+    parser.add_argument("--llm-provider", default=None, help="OpenAI or Gemini, needed for near_text and hybrid")
+    parser.add_argument("--llm-api-key", default=None)
+    parser.add_argument("--transport-profile", default=TRANSPORT_PROFILE)
+    args = parser.parse_args(argv)
+
+    qrels = load_qrels(args.qrels)
+    grid = build_grid(args.search_types, args.alphas, args.fusions, args.limits)
+
+    weaviate = Weaviate(args.host, args.port, args.api_key, args.llm_provider, args.llm_api_key, args.transport_profile)
+    weaviate.client = weaviate.create_client()
+    try:
+        def progress(done, total):
+            print(f"\r{done}/{total} queries", end="", file=sys.stderr, flush=True)
+
+        runs = run_grid(weaviate, args.class_name, qrels, grid, args.id_property, args.workers, ResultCache(args.cache_dir), progress)
+        print(file=sys.stderr)
+    finally:
+        weaviate.close()
+
+    summary = summarize(qrels, grid, runs)
+    with open(args.report, "w") as f:
+        json.dump(build_report(args.class_name, qrels, summary, args.quality), f, indent=2)
+    frontier_chart(summary, args.quality).write_html(args.chart)
+
+    print(summary.assign(frontier=pareto_frontier(summary, args.quality)).to_string(index=False, float_format="{:.3f}".format))
+    print(f"Report written to {args.report}, chart to {args.chart}", file=sys.stderr)
+    return 1 if summary["errors"].sum() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import contextvars
+import heapq
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import FEDERATED_MAX_WORKERS
+
+
+def normalize_scores(rows: list) -> list:
+    """Min-max normalize one source's relevance to [0, 1] so sources can be ranked together"""
+    if not rows:
+        return []
+
+    if all(row.get("score") is not None for row in rows):
+        raw = [float(row["score"]) for row in rows]
+    elif all(row.get("certainty") is not None for row in rows):
+        raw = [float(row["certainty"]) for row in rows]
+    elif all(row.get("distance") is not None for row in rows):
+        raw = [-float(row["distance"]) for row in rows]
+    else:
+        # No comparable metadata requested: fall back to rank within the source
+        raw = [-float(rank) for rank in range(len(rows))]
+
+    low, high = min(raw), max(raw)
+    span = high - low
+    return [(value - low) / span if span else 1.0 for value in raw]
+
+
+def _query_source(weaviate, class_name: str, tenant: str, properties: list, query_kwargs: dict) -> dict:
+    start = time.perf_counter()
+    try:
+        available = weaviate.get_properties(class_name)
+        source_properties = [prop for prop in properties if prop in available]
+        if not source_properties:
+            raise ValueError("none of the selected properties exist in this collection")
+        rows = weaviate.query(class_name=class_name, tenant=tenant, properties=source_properties, **query_kwargs)
+        error = None if rows is not None else "query failed"
+    except Exception as e:
+        rows, error = None, f"{type(e).__name__}: {e}"
+    return {
+        "collection": class_name,
+        "tenant": tenant,
+        "rows": rows or [],
+        "latency": time.perf_counter() - start,
+        "error": error,
+    }
+
+
+def federated_query(
+    weaviate,
+    sources: list,
+    properties: list,
+    limit: int,
+    max_workers: int = FEDERATED_MAX_WORKERS,
+    **query_kwargs
+):
+    """Run one query against every (collection, tenant) source concurrently and merge a global top-k
+
+    Returns the merged rows, tagged with their source, and one latency/error entry per source.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sources)))) as executor:
+        # Each source runs in a copy of this context, so its query spans nest under the caller's span
+        futures = [
+            executor.submit(contextvars.copy_context().run, _query_source, weaviate, class_name, tenant, properties, dict(query_kwargs, limit=limit))
+            for class_name, tenant in sources
+        ]
+        outcomes = [future.result() for future in futures]
+
+    def tagged_rows():
+        for outcome in outcomes:
+            for row, normalized in zip(outcome["rows"], normalize_scores(outcome["rows"])):
+                # Copy: rows of a coalesced search are shared with other sessions
+                yield {
+                    **row,
+                    "normalized_score": normalized,
+                    "source_collection": outcome["collection"],
+                    "source_tenant": outcome["tenant"],
+                }
+
+    # Bounded heap of size `limit` over all sources
+    merged = heapq.nlargest(limit, tagged_rows(), key=lambda row: row["normalized_score"])
+    source_stats = [
+        {
+            "collection": outcome["collection"],
+            "tenant": outcome["tenant"] or "-",
+            "results": len(outcome["rows"]),
+            "latency": outcome["latency"],
+            "error": outcome["error"] or "",
+        }
+        for outcome in outcomes
+    ]
+    return merged, source_stats
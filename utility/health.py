@@ -0,0 +1,225 @@
+import copy
+import threading
+import time
+from collections import deque
+
+from weaviate.exceptions import (
+    WeaviateConnectionError,
+    WeaviateGRPCUnavailableError,
+    WeaviateQueryError,
+    WeaviateRetryError,
+    WeaviateStartUpError,
+    WeaviateTimeoutError,
+)
+
+from env import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    HEALTH_CHECK_INTERVAL,
+    HEALTH_HISTORY_SIZE,
+    SESSION_IDLE_TIMEOUT,
+)
+from utility.replay import replaying
+
+# Process-wide registries keyed by Weaviate.connection_key
+_breakers = {}
+_monitors = {}
+_registry_lock = threading.RLock()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Weaviate while the cluster is known to be unhealthy"""
+
+    def __init__(self, retry_in: float) -> None:
+        super().__init__(f"Weaviate cluster is unhealthy, retrying in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether an error points at the cluster or network rather than at the request"""
+    if isinstance(error, (WeaviateConnectionError, WeaviateGRPCUnavailableError, WeaviateRetryError,
+                          WeaviateStartUpError, WeaviateTimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, WeaviateQueryError):
+        return any(code in str(error) for code in ("DEADLINE_EXCEEDED", "UNAVAILABLE"))
+    return False
+
+
+class CircuitBreaker:
+    """Closed while healthy, open after repeated failures, half-open to let one probe through"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_TIMEOUT) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        # When the half-open probe was let through; calls that never report back free the slot after reset_timeout
+        self.trial_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self):
+        with self._lock:
+            state, now = self._state(), time.monotonic()
+            if state == self.OPEN:
+                raise CircuitOpenError(self.reset_timeout - (now - self.opened_at))
+            if state == self.HALF_OPEN:
+                # One probe at a time; everyone else waits for its outcome
+                if self.trial_at is not None and now - self.trial_at < self.reset_timeout:
+                    raise CircuitOpenError(self.reset_timeout - (now - self.trial_at))
+                self.trial_at = now
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.trial_at = None
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self._state() == self.HALF_OPEN:
+                self.opened_at = time.monotonic()
+
+
+def get_breaker(connection_key: str) -> CircuitBreaker:
+    with _registry_lock:
+        if connection_key not in _breakers:
+            _breakers[connection_key] = CircuitBreaker()
+        return _breakers[connection_key]
+
+
+class HealthMonitor(threading.Thread):
+    """Pings a cluster in the background and keeps a ring buffer of round-trip latencies"""
+
+    def __init__(self, weaviate, interval: float = HEALTH_CHECK_INTERVAL, history_size: int = HEALTH_HISTORY_SIZE) -> None:
+        super().__init__(name=f"health-{weaviate.weaviate_host}", daemon=True)
+        # Own copy without the session's client, which must not outlive its rerun
+        self.weaviate = copy.copy(weaviate)
+        self.weaviate.__dict__.pop("client", None)
+        self.connection_key = weaviate.connection_key
+        self.breaker = get_breaker(self.connection_key)
+        self.interval = interval
+        # (timestamp, REST readiness ms, gRPC query ms, ok)
+        self.samples = deque(maxlen=history_size)
+        self.last_used = time.monotonic()
+        self._stop_event = threading.Event()
+        self._client = None
+        self._probe_collection = None
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _ping(self):
+        if self._client is None:
+            self._client = self.weaviate.create_client()
+
+        start = time.perf_counter()
+        ready = self._client.is_ready()
+        rest_ms = (time.perf_counter() - start) * 1000
+        if not ready:
+            raise WeaviateConnectionError("cluster reported not ready")
+        if replaying():
+            # Probes are rarely part of a recording, and a miss would open the breaker
+            return rest_ms, None
+
+        # Cheapest gRPC round trip available: fetch a single object id
+        if self._probe_collection is None:
+            self._probe_collection = next(iter(self._client.collections.list_all(simple=True)), "")
+        grpc_ms = None
+        if self._probe_collection:
+            start = time.perf_counter()
+            self._client.collections.get(self._probe_collection).query.fetch_objects(limit=1, return_properties=[])
+            grpc_ms = (time.perf_counter() - start) * 1000
+        return rest_ms, grpc_ms
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if time.monotonic() - self.last_used > SESSION_IDLE_TIMEOUT:
+                break
+            try:
+                rest_ms, grpc_ms = self._ping()
+                self.samples.append((time.time(), rest_ms, grpc_ms, True))
+                self.breaker.record_success()
+            except Exception:
+                self.samples.append((time.time(), None, None, False))
+                self.breaker.record_failure()
+                self._close_client()
+                self._probe_collection = None
+            self._stop_event.wait(self.interval)
+
+        self._close_client()
+        with _registry_lock:
+            if _monitors.get(self.connection_key) is self:
+                del _monitors[self.connection_key]
+
+    def _close_client(self):
+        if self._client is not None:
+            try:
+                self._client.close()
+            except Exception:
+                pass
+            self._client = None
+
+    def latest_latency(self):
+        """Most recent successful round-trip in ms, gRPC preferred"""
+        for _, rest_ms, grpc_ms, ok in reversed(self.samples):
+            if ok:
+                return grpc_ms if grpc_ms is not None else rest_ms
+        return None
+
+
+def get_monitor(weaviate) -> HealthMonitor:
+    """Return the running monitor for this connection, starting one if needed"""
+    with _registry_lock:
+        monitor = _monitors.get(weaviate.connection_key)
+        if monitor is None or not monitor.is_alive():
+            monitor = HealthMonitor(weaviate)
+            _monitors[weaviate.connection_key] = monitor
+            monitor.start()
+    monitor.touch()
+    return monitor
+
+
+def latency_sparkline(samples, width: int = 120, height: int = 24, color: str = "#4CAF50") -> str:
+    """Inline SVG sparkline of recent cluster latency; failed pings are marked in red"""
+    samples = list(samples)
+    if len(samples) < 2:
+        return ""
+    values = [(grpc_ms if grpc_ms is not None else rest_ms) if ok else None for _, rest_ms, grpc_ms, ok in samples]
+    known = [value for value in values if value is not None]
+    peak = max(known) if known else 1.0
+    step = width / (len(values) - 1)
+
+    points, failures = [], []
+    for i, value in enumerate(values):
+        x = i * step
+        if value is None:
+            failures.append(f'<circle cx="{x:.1f}" cy="{height - 2}" r="2" fill="#f44336"/>')
+        else:
+            points.append(f"{x:.1f},{height - 2 - (value / peak) * (height - 4):.1f}")
+
+    return (
+        f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}" style="vertical-align: middle;">'
+        f'<polyline fill="none" stroke="{color}" stroke-width="1.5" points="{" ".join(points)}"/>'
+        f'{"".join(failures)}</svg>'
+    )
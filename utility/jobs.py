@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+
+from constants import JOB_HISTORY_SIZE, JOB_PAGE_SIZE
+from utility.admission import AdmissionError, estimate_result_bytes, get_admission_controller
+from utility.memory import track_job
+from utility.memprofile import profile_memory
+from utility.metrics import ERRORS
+from utility.tracing import span
+
+
+class SearchJob:
+    """A search running on a background thread, fetched in pages so it can be cancelled between them
+
+    Rows arrive progressively: `snapshot()` returns what has been fetched so far while the job runs.
+    They are held until `release()`, once they have been handed to a ResultStore or the job is dropped.
+    """
+
+    def __init__(self, weaviate, user: str, label: str, query_kwargs: dict, page_size: int = JOB_PAGE_SIZE, search_id: str = None) -> None:
+        self.id = os.urandom(4).hex()
+        self.search_id = search_id
+        self.weaviate = weaviate
+        self.user = user
+        self.label = label
+        self.query_kwargs = query_kwargs
+        self.limit = query_kwargs["limit"]
+        # Groups are formed over the whole candidate set on the server, so grouped searches are one page
+        self.page_size = self.limit if query_kwargs.get("group_by") else page_size
+        # Without query text there is no ranking, so pages follow the object cursor. Ranked searches embed the
+        # query and rank offset + size candidates again for every page, so their pages double in size: about
+        # log2(limit / page_size) queries and at most about four times the server work of one full query
+        self.cursor = not query_kwargs.get("query") and query_kwargs.get("search_type", "keyword") == "keyword" and not query_kwargs.get("group_by")
+        self.status = "queued"
+        self.position = None
+        self.error = None
+        self.pages = 0
+        self.fetched = 0
+        self.released = False
+        self.submitted = time.monotonic()
+        self.finished = None
+        self._rows = []
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"search-job-{self.id}", daemon=True)
+
+    def start(self) -> "SearchJob":
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Stop after the page in flight; rows fetched so far are kept"""
+        self._cancelled.set()
+
+    def release(self):
+        """Stop after the page in flight and drop the fetched rows"""
+        self._cancelled.set()
+        with self._lock:
+            self.released = True
+            self._rows = []
+
+    @property
+    def running(self) -> bool:
+        return self.finished is None
+
+    @property
+    def row_count(self) -> int:
+        """Rows fetched so far, including released ones"""
+        return self.fetched
+
+    @property
+    def held_rows(self) -> int:
+        """Rows fetched and not yet released"""
+        return len(self._rows)
+
+    @property
+    def resident_bytes(self) -> int:
+        return estimate_result_bytes(self.held_rows, len(self.query_kwargs.get("properties") or [])) if self._rows else 0
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.submitted
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return list(self._rows)
+
+    def _on_position(self, position: int):
+        self.position = position
+
+    def _run(self):
+        properties = self.query_kwargs.get("properties") or []
+        with span("search_job", **{"session.id": self.user, "job.id": self.id, "search.id": self.search_id, "collection": self.label, "limit": self.limit}) as current:
+            try:
+                with get_admission_controller().admit(
+                    self.user,
+                    self.limit,
+                    estimate_result_bytes(self.limit, len(properties)),
+                    on_position=self._on_position,
+                    cancelled=self._cancelled
+                ):
+                    self.status = "running"
+                    query_kwargs, with_id = dict(self.query_kwargs), "id" in (self.query_kwargs.get("with_additional") or [])
+                    if self.cursor:
+                        # Object ids continue the listing; they are dropped again unless they were asked for
+                        query_kwargs.update(search_type="fetch", with_additional=list(dict.fromkeys([*(query_kwargs.get("with_additional") or []), "id"])))
+                    offset, after, size = 0, None, self.page_size
+                    while offset < self.limit and not self._cancelled.is_set():
+                        size = min(size, self.limit - offset)
+                        with profile_memory("search.page", session=self.user):
+                            paging = {"after": after} if self.cursor else {"offset": offset}
+                            page = self.weaviate.query(**{**query_kwargs, "limit": size, **paging})
+                            if page is None:
+                                raise RuntimeError("query failed")
+                            if self.cursor and page:
+                                after = page[-1]["id"]
+                                if not with_id:
+                                    # Copies: rows may be shared with other callers
+                                    page = [{key: value for key, value in row.items() if key != "id"} for row in page]
+                            with self._lock:
+                                if not self.released:
+                                    self._rows.extend(page)
+                                self.fetched += len(page)
+                        self.pages += 1
+                        # A short page is the last one
+                        if len(page) < size or self.query_kwargs.get("group_by"):
+                            break
+                        offset += size
+                        if not self.cursor:
+                            size *= 2
+            except AdmissionError as e:
+                ERRORS.inc(operation="admission", error_type=type(e).__name__)
+                self.error = f"Not admitted: {e}"
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+            finally:
+                if self._cancelled.is_set():
+                    self.status = "cancelled"
+                else:
+                    self.status = "failed" if self.error else "done"
+                current.set_attribute("status", self.status)
+                current.set_attribute("rows", self.row_count)
+                self.finished = time.monotonic()
+
+
+def submit_job(jobs: list, job: SearchJob, keep: int = JOB_HISTORY_SIZE) -> SearchJob:
+    """Start `job` and list it first in `jobs`; jobs beyond `keep` are cancelled, released and dropped"""
+    track_job(job)
+    jobs.insert(0, job.start())
+    for old in jobs[keep:]:
+        old.release()
+    del jobs[keep:]
+    return job
@@ -0,0 +1,308 @@
+"""Load generator for capacity testing a Weaviate endpoint with a corpus of `Weaviate.query` calls
+
+The corpus is JSON lines, one object of `Weaviate.query` keyword arguments per query, e.g. the
+corpus downloaded from the Load Test page's search history. Open loop issues queries at a target
+rate whatever the response times, and measures latency from each query's scheduled start, so a
+saturated cluster shows up as growing latency rather than as a lower request rate. Closed loop
+keeps a fixed number of queries in flight. Several worker processes can share the load when one
+process cannot generate enough.
+
+Headless usage, e.g. against a local container started with
+`docker run -p 8080:8080 -p 50051:50051 cr.weaviate.io/semitechnologies/weaviate`:
+
+    python -m utility.loadgen --corpus queries.jsonl --mode open --rate 50 --duration 60 --out samples.csv
+"""
+import argparse
+import inspect
+import itertools
+import json
+import multiprocessing
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from constants import LOADGEN_CONCURRENCY, LOADGEN_DURATION, LOADGEN_LATENCY_BUCKETS, LOADGEN_MAX_BACKLOG, LOADGEN_RATE
+
+MODES = ["open", "closed"]
+SAMPLE_COLUMNS = ["start", "latency", "search_type", "class_name", "ok", "error", "rows"]
+
+
+def query_parameters() -> list:
+    from utility.weaviate import Weaviate
+
+    return [name for name in inspect.signature(Weaviate.query).parameters if name not in ("self", "coalesce")]
+
+
+def load_corpus(lines) -> list:
+    """Query keyword arguments from JSON lines; every line needs a class_name"""
+    allowed = set(query_parameters())
+    corpus = []
+    for number, line in enumerate(lines, start=1):
+        line = line.decode() if isinstance(line, bytes) else line
+        if not line.strip():
+            continue
+        params = json.loads(line)
+        unknown = set(params) - allowed
+        if unknown:
+            raise ValueError(f"line {number}: unknown query parameter(s) {', '.join(sorted(unknown))}")
+        if not params.get("class_name"):
+            raise ValueError(f"line {number}: class_name is required")
+        corpus.append(params)
+    if not corpus:
+        raise ValueError("the query corpus is empty")
+    return corpus
+
+
+def dump_corpus(corpus: list) -> str:
+    return "".join(json.dumps(params, default=str) + "\n" for params in corpus)
+
+
+class LoadReport:
+    """Per-query samples of a load run, with throughput and latency summaries per search type"""
+
+    def __init__(self, samples: pd.DataFrame, mode: str, duration: float, rate: float = None, concurrency: int = None) -> None:
+        self.samples = samples
+        self.mode = mode
+        self.duration = duration
+        self.rate = rate
+        self.concurrency = concurrency
+
+    @property
+    def requests(self) -> int:
+        return len(self.samples)
+
+    @property
+    def error_rate(self) -> float:
+        return float((~self.samples["ok"]).mean()) if len(self.samples) else 0.0
+
+    def summary(self) -> pd.DataFrame:
+        """Throughput, error rate and latency percentiles (ms) per search type, plus a total row"""
+        def describe(group):
+            latencies = group["latency"].to_numpy() * 1000
+            sent = not np.isnan(latencies).all()
+            return {
+                "requests": len(group),
+                "errors": int((~group["ok"]).sum()),
+                "error_rate": float((~group["ok"]).mean()),
+                "throughput": len(group) / self.duration,
+                **{f"p{p}_ms": float(np.nanpercentile(latencies, p)) if sent else float("nan") for p in (50, 90, 95, 99)},
+                "max_ms": float(np.nanmax(latencies)) if sent else float("nan"),
+            }
+
+        if self.samples.empty:
+            return pd.DataFrame()
+        rows = [{"search_type": search_type, **describe(group)} for search_type, group in self.samples.groupby("search_type")]
+        if len(rows) > 1:
+            rows.append({"search_type": "all", **describe(self.samples)})
+        return pd.DataFrame(rows)
+
+    def timeline(self, interval: float = 1.0) -> pd.DataFrame:
+        """Requests per second, error rate and latency percentiles (ms) per interval and search type"""
+        if self.samples.empty:
+            return pd.DataFrame()
+        samples = self.samples.assign(second=(self.samples["start"] // interval) * interval, latency_ms=self.samples["latency"] * 1000)
+        grouped = samples.groupby(["second", "search_type"])
+        timeline = grouped.agg(requests=("ok", "size"), errors=("ok", lambda ok: int((~ok).sum())))
+        for p in (50, 95, 99):
+            timeline[f"p{p}_ms"] = grouped["latency_ms"].quantile(p / 100)
+        timeline["throughput"] = timeline["requests"] / interval
+        timeline["error_rate"] = timeline["errors"] / timeline["requests"]
+        return timeline.reset_index()
+
+    def histogram(self) -> pd.DataFrame:
+        """Query counts per latency bucket (upper bound in ms) and search type"""
+        bounds = list(LOADGEN_LATENCY_BUCKETS) + [float("inf")]
+        labels = [f"≤{bound * 1000:g}" for bound in LOADGEN_LATENCY_BUCKETS] + [f">{LOADGEN_LATENCY_BUCKETS[-1] * 1000:g}"]
+        buckets = pd.cut(self.samples["latency"], [0.0] + bounds, labels=labels, include_lowest=True)
+        histogram = self.samples.assign(bucket=buckets).groupby(["search_type", "bucket"], observed=False).size()
+        return histogram.rename("requests").reset_index()
+
+
+def _issue(weaviate, params: dict) -> tuple:
+    """(ok, error type, rows) of one query; identical in-flight queries are not coalesced under load"""
+    try:
+        rows = weaviate.query(**params, coalesce=False)
+    except Exception as e:
+        return False, type(e).__name__, 0
+    if rows is None:
+        return False, "QueryFailed", 0
+    return True, None, len(rows)
+
+
+def run_load(
+    weaviate,
+    corpus: list,
+    mode: str = "open",
+    rate: float = LOADGEN_RATE,
+    concurrency: int = LOADGEN_CONCURRENCY,
+    duration: float = LOADGEN_DURATION,
+    seed: int = None,
+    on_progress=None,
+    stop: threading.Event = None
+) -> LoadReport:
+    """Replay the corpus against `weaviate` for `duration` seconds with threads
+
+    Open loop schedules `rate` queries per second on `concurrency` threads; queries still waiting for a
+    thread LOADGEN_MAX_BACKLOG deep are dropped and counted as errors. Closed loop runs `concurrency`
+    threads back to back. `on_progress(elapsed, requests, errors)` is called about once a second.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    corpus = list(corpus)
+    if seed is not None:
+        random.Random(seed).shuffle(corpus)
+    stop = stop or threading.Event()
+    samples = []
+    counter = itertools.count()
+    start = time.perf_counter()
+
+    def record(scheduled, params, outcome):
+        ok, error, rows = outcome
+        samples.append((scheduled - start, time.perf_counter() - scheduled, params.get("search_type", "keyword"), params["class_name"], ok, error, rows))
+
+    def next_query():
+        return corpus[next(counter) % len(corpus)]
+
+    def closed_worker():
+        while not stop.is_set() and time.perf_counter() - start < duration:
+            params = next_query()
+            issued = time.perf_counter()
+            record(issued, params, _issue(weaviate, params))
+
+    def open_loop(executor):
+        backlog = threading.Semaphore(LOADGEN_MAX_BACKLOG + concurrency)
+
+        def task(params, scheduled):
+            try:
+                record(scheduled, params, _issue(weaviate, params))
+            finally:
+                backlog.release()
+
+        for i in itertools.count():
+            scheduled = start + i / rate
+            if scheduled - start >= duration or stop.is_set():
+                return
+            delay = scheduled - time.perf_counter()
+            if delay > 0 and stop.wait(delay):
+                return
+            params = next_query()
+            if backlog.acquire(blocking=False):
+                executor.submit(task, params, scheduled)
+            else:
+                # Never sent, so it has no latency
+                samples.append((scheduled - start, float("nan"), params.get("search_type", "keyword"), params["class_name"], False, "Dropped", 0))
+
+    with ThreadPoolExecutor(max_workers=concurrency + (mode == "open")) as executor:
+        if mode == "open":
+            driver = executor.submit(open_loop, executor)
+        else:
+            workers = [executor.submit(closed_worker) for _ in range(concurrency)]
+            driver = None
+        try:
+            while time.perf_counter() - start < duration and not stop.is_set():
+                stop.wait(min(1.0, max(0.0, duration - (time.perf_counter() - start))))
+                if on_progress is not None:
+                    on_progress(time.perf_counter() - start, len(samples), sum(not sample[4] for sample in samples))
+            if driver is not None:
+                driver.result()
+            else:
+                for worker in workers:
+                    worker.result()
+        finally:
+            stop.set()
+    return LoadReport(pd.DataFrame(samples, columns=SAMPLE_COLUMNS), mode, duration, rate if mode == "open" else None, concurrency)
+
+
+def _process_worker(settings: dict, corpus: list, mode: str, rate: float, concurrency: int, duration: float, seed: int, start_at: float):
+    from utility.weaviate import Weaviate
+
+    weaviate = Weaviate(**settings)
+    weaviate.client = weaviate.create_client()
+    try:
+        # Every process starts at the same wall-clock time so their timelines line up
+        time.sleep(max(0.0, start_at - time.time()))
+        report = run_load(weaviate, corpus, mode, rate, concurrency, duration, seed)
+    finally:
+        weaviate.close()
+    return report.samples
+
+
+def run_load_processes(settings: dict, corpus: list, processes: int, mode: str = "open", rate: float = LOADGEN_RATE,
+                       concurrency: int = LOADGEN_CONCURRENCY, duration: float = LOADGEN_DURATION, seed: int = 0) -> LoadReport:
+    """`run_load` split over worker processes, each with its own client and a share of the rate and concurrency
+
+    `settings` are the `Weaviate` constructor arguments.
+    """
+    shares = [(rate / processes, max(1, concurrency // processes), seed + i) for i in range(processes)]
+    start_at = time.time() + 2.0
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        parts = pool.starmap(_process_worker, [(settings, corpus, mode, share_rate, share_concurrency, duration, share_seed, start_at)
+                                               for share_rate, share_concurrency, share_seed in shares])
+    samples = pd.concat(parts, ignore_index=True).sort_values("start", ignore_index=True)
+    return LoadReport(samples, mode, duration, rate if mode == "open" else None, concurrency)
+
+
+def main(argv=None) -> int:
+    from env import TRANSPORT_PROFILE, WEAVIATE_API_KEY, WEAVIATE_HOST, WEAVIATE_PORT
+    from utility.weaviate import Weaviate
+
+    parser = argparse.ArgumentParser(prog="python -m utility.loadgen", description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", required=True, help="JSON lines of Weaviate.query keyword arguments")
+    parser.add_argument("--mode", default="open", choices=MODES, help="open: fixed rate, closed: fixed concurrency")
+    parser.add_argument("--rate", type=float, default=LOADGEN_RATE, help="Queries per second in open loop")
+    parser.add_argument("--concurrency", type=int, default=LOADGEN_CONCURRENCY, help="Worker threads (in-flight queries in closed loop)")
+    parser.add_argument("--duration", type=float, default=LOADGEN_DURATION, help="Seconds")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes sharing rate and concurrency")
+    parser.add_argument("--seed", type=int, default=None, help="Shuffle the corpus")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds per timeline row")
+    parser.add_argument("--max-error-rate", type=float, default=None, help="Exit non-zero above this error rate")
+    parser.add_argument("--out", default=None, help="CSV file for the per-query samples")
+    parser.add_argument("--timeline", default=None, help="CSV file for the per-interval timeline")
+    parser.add_argument("--host", default=WEAVIATE_HOST)
+    parser.add_argument("--port", default=WEAVIATE_PORT or "8080")
+    parser.add_argument("--api-key", default=WEAVIATE_API_KEY)
+    parser.add_argument("--llm-provider", default=None, help="OpenAI or Gemini, needed for near_text and hybrid")
+    parser.add_argument("--llm-api-key", default=None)
+    parser.add_argument("--transport-profile", default=TRANSPORT_PROFILE)
+    args = parser.parse_args(argv)
+
+    with open(args.corpus) as f:
+        corpus = load_corpus(f)
+    settings = dict(weaviate_host=args.host, weaviate_port=args.port, weaviate_api_key=args.api_key,
+                    llm_provider=args.llm_provider, llm_api_key=args.llm_api_key, transport_profile=args.transport_profile)
+
+    if args.processes > 1:
+        print(f"Running {args.processes} worker processes for {args.duration:g}s...", file=sys.stderr)
+        report = run_load_processes(settings, corpus, args.processes, args.mode, args.rate, args.concurrency, args.duration, args.seed or 0)
+    else:
+        weaviate = Weaviate(**settings)
+        weaviate.client = weaviate.create_client()
+        try:
+            def progress(elapsed, requests, errors):
+                print(f"\r{elapsed:5.0f}s  {requests:,} queries  {errors:,} errors", end="", file=sys.stderr, flush=True)
+
+            report = run_load(weaviate, corpus, args.mode, args.rate, args.concurrency, args.duration, args.seed, on_progress=progress)
+            print(file=sys.stderr)
+        finally:
+            weaviate.close()
+
+    timeline = report.timeline(args.interval)
+    if args.out:
+        report.samples.to_csv(args.out, index=False)
+    if args.timeline:
+        timeline.to_csv(args.timeline, index=False)
+    print(timeline.to_string(index=False, float_format="{:.1f}".format), file=sys.stderr)
+    print(report.summary().to_string(index=False, float_format="{:.3f}".format))
+    if args.max_error_rate is not None and report.error_rate > args.max_error_rate:
+        print(f"Error rate {report.error_rate:.1%} is above {args.max_error_rate:.1%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+import atexit
+import os
+import threading
+import time
+import uuid
+import weakref
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from env import SESSION_IDLE_TIMEOUT, SESSION_MEMORY_BUDGET_MB, SPILL_DIR
+
+# Process-wide view of every session's current result, keyed by session id
+_results = {}
+_results_lock = threading.Lock()
+# Background search jobs, whose fetched rows stay resident until the job is released
+_jobs = weakref.WeakSet()
+
+
+def budget_bytes() -> int:
+    """Per-session in-memory budget for search results"""
+    return int(SESSION_MEMORY_BUDGET_MB * 1024 * 1024)
+
+
+class ResultStore:
+    """Search result of one session, held in memory or spilled to a memory-mapped Arrow file"""
+
+    def __init__(self, df: pd.DataFrame, session_id: str) -> None:
+        self.session_id = session_id
+        self.num_rows = len(df)
+        self.columns = list(df.columns)
+        self.nbytes = int(df.memory_usage(deep=True).sum())
+        self.created = time.time()
+        self.last_access = self.created
+        self.path = None
+        self.evicted = False
+        self._df = df
+        self._mapped = None
+        self._insights = None
+
+        if self.nbytes > budget_bytes():
+            self._spill()
+
+        with _results_lock:
+            previous = _results.get(session_id)
+            _results[session_id] = self
+        if previous is not None and previous is not self:
+            previous.release()
+
+    @property
+    def spilled(self) -> bool:
+        return self.path is not None
+
+    @property
+    def resident_bytes(self) -> int:
+        return 0 if self.spilled or self.evicted else self.nbytes
+
+    @property
+    def empty(self) -> bool:
+        return self.evicted or self.num_rows == 0
+
+    def _spill(self):
+        os.makedirs(SPILL_DIR, exist_ok=True)
+        path = os.path.join(SPILL_DIR, f"{self.session_id}-{uuid.uuid4().hex}.arrow")
+        table = pa.Table.from_pandas(self._df, preserve_index=False)
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        self.path = path
+        self._df = None
+
+    def _table(self) -> pa.Table:
+        # Zero-copy: buffers point straight into the file, mapped once for the life of the result
+        if self._mapped is None:
+            source = pa.memory_map(self.path, "r")
+            self._mapped = (source, pa.ipc.open_file(source).read_all())
+        return self._mapped[1]
+
+    def to_df(self, columns: list = None) -> pd.DataFrame:
+        """Return the result, or only the given columns, as a DataFrame"""
+        self.last_access = time.time()
+        df = self._df
+        if self.evicted or (df is None and not self.spilled):
+            return pd.DataFrame()
+        if not self.spilled:
+            return df if columns is None else df[columns]
+        table = self._table()
+        if columns is not None:
+            table = table.select(columns)
+        return table.to_pandas()
+
+    def page(self, offset: int, limit: int) -> pd.DataFrame:
+        """Return `limit` rows starting at `offset` without loading the rest"""
+        self.last_access = time.time()
+        df = self._df
+        if self.evicted or (df is None and not self.spilled):
+            return pd.DataFrame()
+        if not self.spilled:
+            return df.iloc[offset:offset + limit]
+        return self._table().slice(offset, limit).to_pandas()
+
+    def filter(self, term: str) -> pd.DataFrame:
+        """Return rows where any column contains `term` (case-insensitive)"""
+        self.last_access = time.time()
+        df = self._df
+        if self.evicted or (df is None and not self.spilled):
+            return pd.DataFrame()
+        if not self.spilled:
+            # Column by column so only one string copy is alive at a time
+            mask = pd.Series(False, index=df.index)
+            for col in df.columns:
+                mask |= df[col].astype(str).str.contains(term, case=False, na=False, regex=False)
+            return df[mask]
+
+        table = self._table()
+        mask = None
+        for col in table.column_names:
+            try:
+                matches = pc.match_substring(pc.cast(table[col], pa.string()), term, ignore_case=True)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                continue
+            matches = pc.fill_null(matches, False)
+            mask = matches if mask is None else pc.or_(mask, matches)
+        if mask is None:
+            return table.slice(0, 0).to_pandas()
+        return table.filter(mask).to_pandas()
+
+    def group_head(self, column: str, count: int, term: str = None) -> tuple:
+        """Rows of the first `count` groups in result order, plus the number of groups and rows"""
+        self.last_access = time.time()
+        if term:
+            df = self.filter(term)
+        elif self.spilled and not self.evicted:
+            # Only the group column is read to pick the groups, then only their rows
+            table = self._table()
+            groups = pc.unique(table[column])
+            rows = table.filter(pc.is_in(table[column], value_set=groups.slice(0, count))).to_pandas()
+            return rows, len(groups), self.num_rows
+        else:
+            df = self.to_df()
+        if df.empty:
+            return df, 0, 0
+        groups = df[column].unique()
+        return df[df[column].isin(groups[:count])], len(groups), len(df)
+
+    def insights(self) -> dict:
+        """Numeric summary and per-column type, non-null and distinct counts, computed once per result"""
+        if self._insights is None and not self.empty:
+            self._insights = _arrow_insights(self._table()) if self.spilled else _pandas_insights(self._df)
+        return self._insights
+
+    def release(self):
+        """Drop the in-memory data and delete any spill file"""
+        self.evicted = True
+        self._df = None
+        self._insights = None
+        if self._mapped is not None:
+            self._mapped[0].close()
+            self._mapped = None
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        with _results_lock:
+            if _results.get(self.session_id) is self:
+                del _results[self.session_id]
+
+
+def _distinct(series: pd.Series) -> int:
+    try:
+        return series.nunique()
+    except TypeError:
+        # Lists, e.g. reference columns, are not hashable
+        return series.dropna().astype(str).nunique()
+
+
+def _pandas_insights(df: pd.DataFrame) -> dict:
+    columns = pd.DataFrame([
+        {"Column": col, "Type": str(df[col].dtype), "Non-Null": int(df[col].count()), "Unique": _distinct(df[col])}
+        for col in df.columns
+    ])
+    numeric = df.select_dtypes("number")
+    return {"summary": numeric.describe() if not numeric.empty else pd.DataFrame(), "columns": columns}
+
+
+def _arrow_insights(table: pa.Table) -> dict:
+    # Column by column with Arrow compute, so a spilled result is never loaded into pandas
+    rows, summary = [], {}
+    for field in table.schema:
+        column = table[field.name]
+        try:
+            unique = pc.count_distinct(column).as_py()
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            unique = None
+        rows.append({"Column": field.name, "Type": str(field.type), "Non-Null": len(column) - column.null_count, "Unique": unique})
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type):
+            min_max = pc.min_max(column).as_py()
+            quartiles = pc.quantile(column, q=[0.25, 0.5, 0.75]).to_pylist() if len(column) > column.null_count else [None] * 3
+            summary[field.name] = [
+                len(column) - column.null_count, pc.mean(column).as_py(), pc.stddev(column, ddof=1).as_py(),
+                min_max["min"], *quartiles, min_max["max"],
+            ]
+    index = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+    columns = pd.DataFrame(rows).astype({"Unique": "Int64"})
+    return {"summary": pd.DataFrame(summary, index=index), "columns": columns}
+
+
+def track_job(job):
+    """Count a search job's fetched rows towards its session until the job is released"""
+    with _results_lock:
+        _jobs.add(job)
+
+
+def session_memory_report() -> list:
+    """Per-session memory accounting across the whole process; resident memory includes rows held by search jobs"""
+    now = time.time()
+    with _results_lock:
+        stores = list(_results.values())
+        jobs = list(_jobs)
+    report = {
+        store.session_id: {
+            "session": store.session_id,
+            "rows": store.num_rows,
+            "columns": len(store.columns),
+            "resident_mb": store.resident_bytes / 1024 / 1024,
+            "spilled_mb": store.nbytes / 1024 / 1024 if store.spilled else 0.0,
+            "spilled": store.spilled,
+            "job_rows": 0,
+            "job_mb": 0.0,
+            "idle_seconds": int(now - store.last_access),
+        }
+        for store in stores
+    }
+    for job in jobs:
+        nbytes = job.resident_bytes
+        if not nbytes:
+            continue
+        row = report.setdefault(job.user, {
+            "session": job.user, "rows": 0, "columns": 0, "resident_mb": 0.0, "spilled_mb": 0.0, "spilled": False,
+            "job_rows": 0, "job_mb": 0.0, "idle_seconds": None,
+        })
+        row["job_rows"] += job.held_rows
+        row["job_mb"] += nbytes / 1024 / 1024
+        row["resident_mb"] += nbytes / 1024 / 1024
+    return list(report.values())
+
+
+def evict_idle_results(max_idle: int = SESSION_IDLE_TIMEOUT) -> int:
+    """Release results of sessions idle for longer than `max_idle` seconds, and rows of jobs finished as long ago"""
+    cutoff = time.time() - max_idle
+    with _results_lock:
+        idle = [store for store in _results.values() if store.last_access < cutoff]
+        # Job times are monotonic
+        jobs = [job for job in _jobs if job.finished is not None and time.monotonic() - job.finished > max_idle and job.resident_bytes]
+    for store in idle:
+        store.release()
+    for job in jobs:
+        job.release()
+    return len({store.session_id for store in idle} | {job.user for job in jobs})
+
+
+@atexit.register
+def _cleanup_spill_files():
+    with _results_lock:
+        stores = list(_results.values())
+    for store in stores:
+        store.release()
@@ -0,0 +1,213 @@
+"""Opt-in memory profiling: allocation deltas per search stage and rerun, allocation sites and session state sizes
+
+Enabled with MEMORY_PROFILING=true. tracemalloc then traces every allocation from startup,
+`profile_memory(stage)` records how much traced memory and RSS a stage left behind, and a daemon
+thread samples RSS so slow growth over a day shows up. Deltas are process-wide: allocations of
+other sessions running at the same time are attributed to whichever stages are open. When disabled,
+`profile_memory` hands out one shared no-op context manager and nothing is traced. pandas is only
+imported by the reports, so the hooks keep the login screen free of it.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from constants import MEMORY_RSS_HISTORY, MEMORY_SIZE_DEPTH, MEMORY_STAGE_HISTORY, MEMORY_TOP_SITES
+from env import MEMORY_PROFILE_FRAMES, MEMORY_PROFILING, MEMORY_RSS_INTERVAL
+
+MEMORY_PROFILING_ENABLED = MEMORY_PROFILING
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_DISABLED = nullcontext()
+_stages = deque(maxlen=MEMORY_STAGE_HISTORY)
+_rss = deque(maxlen=MEMORY_RSS_HISTORY)
+_session_states = weakref.WeakValueDictionary()
+_baseline = None
+_started = False
+_start_lock = threading.Lock()
+
+
+def rss_bytes():
+    """Resident set size of this process, None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _sample_rss():
+    while True:
+        _rss.append((time.time(), rss_bytes(), tracemalloc.get_traced_memory()[0]))
+        time.sleep(MEMORY_RSS_INTERVAL)
+
+
+def start_memory_profiling():
+    """Start tracing and RSS sampling once per process, and track this session's state; called on every rerun"""
+    global _started
+    if not MEMORY_PROFILING_ENABLED:
+        return
+    with _start_lock:
+        if not _started:
+            tracemalloc.start(MEMORY_PROFILE_FRAMES)
+            threading.Thread(target=_sample_rss, name="rss-sampler", daemon=True).start()
+            _started = True
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        _session_states[ctx.session_id] = ctx.session_state
+
+
+@contextmanager
+def _measure(stage: str, session: str):
+    before, rss_before = tracemalloc.get_traced_memory()[0], rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        after, rss_after = tracemalloc.get_traced_memory()[0], rss_bytes()
+        _stages.append({
+            "time": time.time(),
+            "session": session,
+            "stage": stage,
+            "seconds": time.perf_counter() - start,
+            "allocated_bytes": after - before,
+            "rss_bytes": rss_after - rss_before if rss_before is not None else None,
+        })
+
+
+def profile_memory(stage: str, session: str = None):
+    """Context manager recording the memory a stage leaves behind; `session` defaults to the current session"""
+    if not MEMORY_PROFILING_ENABLED or not tracemalloc.is_tracing():
+        return _DISABLED
+    if session is None:
+        ctx = get_script_run_ctx()
+        session = ctx.session_id if ctx is not None else None
+    return _measure(stage, session)
+
+
+def stage_report():
+    """Traced and RSS growth per stage, largest average allocation first"""
+    import pandas as pd
+
+    samples = pd.DataFrame(list(_stages), columns=["time", "session", "stage", "seconds", "allocated_bytes", "rss_bytes"])
+    if samples.empty:
+        return pd.DataFrame(columns=["stage", "runs", "avg_allocated_mb", "max_allocated_mb", "total_allocated_mb", "avg_rss_mb", "avg_ms"])
+    report = samples.groupby("stage").agg(
+        runs=("stage", "size"),
+        avg_allocated_mb=("allocated_bytes", "mean"),
+        max_allocated_mb=("allocated_bytes", "max"),
+        total_allocated_mb=("allocated_bytes", "sum"),
+        avg_rss_mb=("rss_bytes", "mean"),
+        avg_ms=("seconds", "mean"),
+    ).reset_index()
+    for column in ("avg_allocated_mb", "max_allocated_mb", "total_allocated_mb", "avg_rss_mb"):
+        report[column] = report[column] / 2 ** 20
+    report["avg_ms"] *= 1000
+    return report.sort_values("avg_allocated_mb", ascending=False, ignore_index=True)
+
+
+def rss_history():
+    import pandas as pd
+
+    history = pd.DataFrame(list(_rss), columns=["time", "rss_bytes", "traced_bytes"])
+    history["time"] = pd.to_datetime(history["time"], unit="s")
+    history["rss_mb"] = history.pop("rss_bytes") / 2 ** 20
+    history["traced_mb"] = history.pop("traced_bytes") / 2 ** 20
+    return history
+
+
+def _short(filename: str) -> str:
+    if filename.startswith(ROOT + os.sep):
+        return os.path.relpath(filename, ROOT)
+    marker = f"{os.sep}site-packages{os.sep}"
+    return filename.split(marker, 1)[1] if marker in filename else filename
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+
+def set_baseline():
+    """Remember the current allocations; later site reports show the growth since"""
+    global _baseline
+    _baseline = _snapshot()
+
+
+def has_baseline() -> bool:
+    return _baseline is not None
+
+
+def top_allocations(limit: int = MEMORY_TOP_SITES):
+    """Largest allocation sites, or the largest growth since the baseline, with the app code that led there"""
+    import pandas as pd
+
+    snapshot = _snapshot()
+    stats = snapshot.compare_to(_baseline, "traceback") if _baseline is not None else snapshot.statistics("traceback")
+    rows = []
+    for stat in stats[:limit]:
+        frames = list(stat.traceback)
+        # Newest frame is where the memory was allocated; the newest app frame is what to look at
+        site = frames[-1]
+        caller = next((frame for frame in reversed(frames) if frame.filename.startswith(ROOT + os.sep)), None)
+        rows.append({
+            "site": f"{_short(site.filename)}:{site.lineno}",
+            "app_caller": f"{_short(caller.filename)}:{caller.lineno}" if caller else "",
+            "size_mb": stat.size / 2 ** 20,
+            "blocks": stat.count,
+            "growth_mb": getattr(stat, "size_diff", stat.size) / 2 ** 20,
+            "new_blocks": getattr(stat, "count_diff", stat.count),
+        })
+    return pd.DataFrame(rows, columns=["site", "app_caller", "size_mb", "blocks", "growth_mb", "new_blocks"])
+
+
+def retained_size(obj, depth: int = MEMORY_SIZE_DEPTH, seen: set = None) -> int:
+    """Approximate bytes reachable from `obj`; DataFrames and arrays report their buffers"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    # Nothing can be a DataFrame or an array before pandas or numpy is imported, so neither is imported here
+    pd, np = sys.modules.get("pandas"), sys.modules.get("numpy")
+    if pd is not None and isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if np is not None and isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is not None else 0)
+    size = sys.getsizeof(obj)
+    if depth <= 0 or isinstance(obj, (str, bytes, bytearray, type)) or callable(obj):
+        return size
+    if isinstance(obj, dict):
+        children = [*obj.keys(), *obj.values()]
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        children = obj
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type(sys)):
+        children = [vars(obj)]
+    else:
+        return size
+    return size + sum(retained_size(child, depth - 1, seen) for child in children)
+
+
+def session_state_sizes():
+    """Retained size of every session state entry of the sessions seen since profiling started
+
+    Objects shared between entries are counted once per entry.
+    """
+    import pandas as pd
+
+    rows = []
+    for session, state in list(_session_states.items()):
+        for key, value in state.filtered_state.items():
+            rows.append({"session": session, "key": key, "type": type(value).__name__, "size_mb": retained_size(value) / 2 ** 20})
+    sizes = pd.DataFrame(rows, columns=["session", "key", "type", "size_mb"])
+    return sizes.sort_values("size_mb", ascending=False, ignore_index=True)
@@ -0,0 +1,203 @@
+import bisect
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from env import METRICS_ENABLED, METRICS_HOST, METRICS_PORT, SESSION_IDLE_TIMEOUT
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+logger = logging.getLogger(__name__)
+
+# Every metric of the process, in exposition order
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self) -> list:
+        lines = [f"# TYPE {self.name} {self.kind}", f"# HELP {self.name} {_escape(self.documentation)}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield f"{self.name}_total", _format_labels(self.labelnames, key), value
+
+
+class Gauge(_Metric):
+    """Gauge set explicitly or, with `function`, read at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), function=None) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        if self.function is not None:
+            yield self.name, "", self.function()
+            return
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # Per label set: non-cumulative bucket counts (last one is +Inf), sum
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, key, f'le="{le}"'), cumulative
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), total
+
+
+def render_metrics() -> str:
+    """All metrics in OpenMetrics text format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+# Sessions seen by their last rerun, for the active session gauge
+_session_last_seen = {}
+
+
+def record_session():
+    """Mark the current Streamlit session as active; called on every rerun"""
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        _session_last_seen[ctx.session_id] = time.monotonic()
+
+
+def active_session_count() -> int:
+    cutoff = time.monotonic() - SESSION_IDLE_TIMEOUT
+    for session_id, last_seen in list(_session_last_seen.items()):
+        if last_seen < cutoff:
+            _session_last_seen.pop(session_id, None)
+    return len(_session_last_seen)
+
+
+QUERY_DURATION = Histogram(
+    "weaviate_query_duration_seconds",
+    "Round-trip time of Weaviate searches",
+    ("collection", "search_type"),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+QUERY_ROWS = Histogram(
+    "weaviate_query_result_rows",
+    "Rows returned per Weaviate search",
+    ("collection", "search_type"),
+    buckets=(0, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000),
+)
+ERRORS = Counter("weaviate_errors", "Failed Weaviate operations by error type", ("operation", "error_type"))
+CONNECTIONS_CREATED = Counter("weaviate_connections_created", "Weaviate clients created")
+EXPORT_BYTES = Counter("export_bytes", "Bytes of result exports prepared for download", ("format",))
+CACHE_REQUESTS = Counter("cache_requests", "Cache lookups by cache and outcome", ("cache", "result"))
+ACTIVE_SESSIONS = Gauge("active_sessions", "Streamlit sessions that reran within the idle timeout", function=active_session_count)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT):
+    """Serve /metrics from a daemon thread, once per process; a port already in use disables it"""
+    global _server
+    with _server_lock:
+        if _server is not None or not METRICS_ENABLED:
+            return _server
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            logger.warning("Metrics endpoint disabled, cannot bind %s:%s: %s", host, port, e)
+            _server = False
+            return _server
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
@@ -0,0 +1,151 @@
+"""Summary of every collection for the overview page
+
+Schema facts of all collections come from a single `list_all(simple=False)` call. Object and tenant
+counts take one request per collection (per active tenant for multi-tenant collections), so they run
+on a process-wide pool of OVERVIEW_MAX_WORKERS threads and are cached for OVERVIEW_CACHE_TTL seconds.
+The page waits at most OVERVIEW_DEADLINE for them; counts still running keep going in the background
+and are picked up from the cache by a later rerun. Counts run on a client of this module, one per
+cluster and credentials, since they are shared by sessions that each reconnect and close their own.
+"""
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+
+from constants import OVERVIEW_CACHE_SIZE, OVERVIEW_CACHE_TTL, OVERVIEW_DEADLINE, OVERVIEW_MAX_TENANTS, OVERVIEW_MAX_WORKERS
+from utility.cache import TTLCache
+from utility.health import get_breaker, is_transient_error
+
+_executor = ThreadPoolExecutor(max_workers=OVERVIEW_MAX_WORKERS, thread_name_prefix="overview")
+_schema_cache = TTLCache("overview_schema", OVERVIEW_CACHE_SIZE, OVERVIEW_CACHE_TTL)
+_stats_cache = TTLCache("overview_stats", OVERVIEW_CACHE_SIZE, OVERVIEW_CACHE_TTL)
+# Counts in flight, shared by every session looking at the same cluster
+_pending = {}
+_pending_lock = threading.Lock()
+# Clients of this module keyed by connection_key, kept for the life of the process
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _value(setting):
+    return getattr(setting, "value", setting)
+
+
+def _index_type(vector_index) -> str:
+    # Same naming as utility.recall.index_config: _VectorIndexConfigHNSW -> hnsw
+    return type(vector_index).__name__.replace("_VectorIndexConfig", "").lower()
+
+
+def collection_summary(config) -> dict:
+    """Name, property count, vectorizer(s), index type(s) and multi-tenancy of one collection config"""
+    if config.vector_config:
+        vectorizers = sorted({str(_value(named.vectorizer.vectorizer)) for named in config.vector_config.values()})
+        index_types = sorted({_index_type(named.vector_index_config) for named in config.vector_config.values()})
+    else:
+        vectorizers = [str(_value(config.vectorizer))] if config.vectorizer else []
+        index_types = [str(_value(config.vector_index_type))] if config.vector_index_type else []
+    return {
+        "collection": config.name,
+        "properties": len(config.properties),
+        "references": len(config.references),
+        "vectorizer": ", ".join(vectorizers) or "none",
+        "index_type": ", ".join(index_types),
+        "named_vectors": len(config.vector_config or {}),
+        "multi_tenant": config.multi_tenancy_config.enabled,
+        "description": config.description or "",
+    }
+
+
+def collection_summaries(weaviate) -> list:
+    """Summaries of every collection, sorted by name, from one cached schema listing"""
+    summaries = _schema_cache.get(weaviate.connection_key)
+    if summaries is None:
+        configs = weaviate.client.collections.list_all(simple=False)
+        summaries = sorted((collection_summary(config) for config in configs.values()), key=lambda row: row["collection"].lower())
+        _schema_cache.set(weaviate.connection_key, summaries)
+    return summaries
+
+
+def _active(tenant) -> bool:
+    return str(_value(tenant.activity_status)) in ("ACTIVE", "HOT")
+
+
+def _client(weaviate):
+    with _clients_lock:
+        client = _clients.get(weaviate.connection_key)
+        # Reconnects once the cluster dropped the connection
+        if client is None or not client.is_connected():
+            if client is not None:
+                client.close()
+            client = _clients[weaviate.connection_key] = weaviate.create_client()
+        return client
+
+
+def _collection_stats(weaviate, breaker, name: str, multi_tenant: bool) -> dict:
+    # Fail fast instead of queueing hundreds of timeouts while the cluster is unhealthy
+    breaker.before_call()
+    try:
+        stats = _count(_client(weaviate), name, multi_tenant)
+    except Exception as e:
+        if is_transient_error(e):
+            breaker.record_failure()
+        raise
+    breaker.record_success()
+    return stats
+
+
+def _count(client, name: str, multi_tenant: bool) -> dict:
+    collection = client.collections.get(name)
+    if not multi_tenant:
+        return {"objects": collection.aggregate.over_all(total_count=True).total_count, "tenants": None, "counted_tenants": None}
+    tenants = collection.tenants.get()
+    active = [tenant_name for tenant_name, tenant in tenants.items() if _active(tenant)]
+    if len(active) > OVERVIEW_MAX_TENANTS:
+        return {"objects": None, "tenants": len(tenants), "counted_tenants": 0}
+    objects = sum(collection.with_tenant(tenant_name).aggregate.over_all(total_count=True).total_count for tenant_name in active)
+    return {"objects": objects, "tenants": len(tenants), "counted_tenants": len(active)}
+
+
+def _finished(key, future):
+    with _pending_lock:
+        _pending.pop(key, None)
+    # Failures are not cached, so the next rerun asks again
+    if future.exception() is None:
+        _stats_cache.set(key, future.result())
+
+
+def collection_stats(weaviate, collections: dict, deadline: float = OVERVIEW_DEADLINE) -> dict:
+    """Object and tenant counts of `collections` ({name: multi-tenant}), waiting at most `deadline` seconds
+
+    Maps each name to its stats, to None while it is still being counted, or to the exception that stopped it.
+    """
+    breaker = get_breaker(weaviate.connection_key)
+    # Own copy without the session's client, which may be closed while the counts are still running
+    connection = copy.copy(weaviate)
+    connection.__dict__.pop("client", None)
+    stats, futures = {}, {}
+    for name, multi_tenant in collections.items():
+        key = (weaviate.connection_key, name)
+        cached = _stats_cache.get(key)
+        if cached is not None:
+            stats[name] = cached
+            continue
+        with _pending_lock:
+            future = _pending.get(key)
+            submitted = future is None
+            if submitted:
+                future = _pending[key] = _executor.submit(_collection_stats, connection, breaker, name, multi_tenant)
+        if submitted:
+            # Outside the lock: a future that is already done runs the callback right here
+            future.add_done_callback(partial(_finished, key))
+        futures[name] = future
+    if futures and deadline > 0:
+        wait(list(futures.values()), timeout=deadline)
+    for name, future in futures.items():
+        stats[name] = (future.exception() or future.result()) if future.done() else None
+    return stats
+
+
+def clear_overview_cache():
+    _schema_cache.clear()
+    _stats_cache.clear()
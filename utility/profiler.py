@@ -0,0 +1,260 @@
+"""Bounded-memory profile of a collection, built in one streaming pass over its objects
+
+Every property keeps a fixed-size set of sketches however many objects are read: a reservoir
+sample of values, a HyperLogLog distinct count and P² streaming quantiles of numeric values
+and of string and array lengths.
+"""
+import bisect
+import hashlib
+import math
+import random
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from constants import (
+    PROFILE_HLL_PRECISION,
+    PROFILE_PAGE_SIZE,
+    PROFILE_PROGRESS_EVERY,
+    PROFILE_QUANTILES,
+    PROFILE_RESERVOIR_SIZE,
+    PROFILE_SAMPLE_CHARS,
+)
+
+
+class Reservoir:
+    """Uniform random sample of at most `size` items of a stream (Algorithm R)"""
+
+    def __init__(self, size: int = PROFILE_RESERVOIR_SIZE, rng: random.Random = None) -> None:
+        self.size = size
+        self.seen = 0
+        self.items = []
+        self._rng = rng or random.Random()
+
+    def add(self, item):
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(item)
+            return
+        slot = self._rng.randrange(self.seen)
+        if slot < self.size:
+            self.items[slot] = item
+
+
+class HyperLogLog:
+    """Approximate distinct count in 2^precision one-byte registers; standard error is 1.04 / sqrt(2^precision)"""
+
+    def __init__(self, precision: int = PROFILE_HLL_PRECISION) -> None:
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        x = int.from_bytes(hashlib.blake2b(repr(value).encode(), digest_size=8).digest(), "big")
+        index = x >> (64 - self.precision)
+        rest = x & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        # Small cardinalities: linear counting over the empty registers is more accurate
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile from five markers (Jain & Chlamtac P² algorithm)"""
+
+    def __init__(self, p: float) -> None:
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x: float):
+        q, n = self.heights, self.positions
+        if len(q) < 5:
+            bisect.insort(q, x)
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def value(self):
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            return self.heights[int(round((len(self.heights) - 1) * self.p))]
+        return self.heights[2]
+
+
+class StreamingSummary:
+    """Count, min, max, mean and PROFILE_QUANTILES of a numeric stream in constant memory"""
+
+    def __init__(self, quantiles: tuple = PROFILE_QUANTILES) -> None:
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.mean = 0.0
+        self.quantiles = [P2Quantile(p) for p in quantiles]
+
+    def add(self, x: float):
+        self.count += 1
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+        self.mean += (x - self.mean) / self.count
+        for quantile in self.quantiles:
+            quantile.add(x)
+
+    def quantile_values(self) -> dict:
+        return {quantile.p: quantile.value() for quantile in self.quantiles}
+
+
+class PropertyProfile:
+    """Sketches of one property's values"""
+
+    def __init__(self, name: str, data_type: str, rng: random.Random = None) -> None:
+        self.name = name
+        self.data_type = data_type
+        self.nulls = 0
+        self.values = 0
+        self.kinds = Counter()
+        self.distinct = HyperLogLog()
+        self.sample = Reservoir(rng=rng)
+        self.numbers = StreamingSummary()
+        self.lengths = StreamingSummary()
+
+    def add(self, value):
+        if value is None:
+            self.nulls += 1
+            return
+        self.values += 1
+        if isinstance(value, bool):
+            self.kinds["boolean"] += 1
+        elif isinstance(value, (int, float)):
+            self.kinds["number"] += 1
+            self.numbers.add(float(value))
+        elif isinstance(value, datetime):
+            self.kinds["date"] += 1
+            self.numbers.add(value.timestamp())
+        elif isinstance(value, (str, list)):
+            self.kinds["text" if isinstance(value, str) else "array"] += 1
+            self.lengths.add(len(value))
+        else:
+            self.kinds[type(value).__name__] += 1
+        self.distinct.add(value)
+        self.sample.add(value[:PROFILE_SAMPLE_CHARS] if isinstance(value, str) else value)
+
+    def _format(self, value):
+        if value is not None and self.kinds.most_common(1)[0][0] == "date":
+            return datetime.fromtimestamp(value, tz=timezone.utc).isoformat()
+        return value
+
+    def summary(self, objects: int) -> dict:
+        quantiles = self.numbers.quantile_values()
+        lengths = self.lengths.quantile_values()
+        return {
+            "property": self.name,
+            "data_type": self.data_type,
+            "null_rate": self.nulls / objects if objects else None,
+            "distinct": min(self.distinct.count(), self.values) if self.values else 0,
+            "min": self._format(self.numbers.min),
+            **{f"p{round(p * 100):02d}": self._format(value) for p, value in quantiles.items()},
+            "max": self._format(self.numbers.max),
+            "mean": self.numbers.mean if self.numbers.count and "date" not in self.kinds else None,
+            "length_min": self.lengths.min,
+            "length_p50": lengths.get(0.5),
+            "length_max": self.lengths.max,
+            "length_mean": self.lengths.mean if self.lengths.count else None,
+        }
+
+    def top_values(self, n: int = 10) -> list:
+        """Most frequent values in the reservoir sample, with their share of it"""
+        counts = Counter(repr(value) if isinstance(value, (list, dict)) else value for value in self.sample.items)
+        total = len(self.sample.items)
+        return [{"value": value, "sample_share": count / total} for value, count in counts.most_common(n)]
+
+
+class CollectionProfile:
+    def __init__(self, properties: dict, seed: int = None) -> None:
+        rng = random.Random(seed)
+        self.properties = {name: PropertyProfile(name, data_type, rng) for name, data_type in properties.items()}
+        self.objects = 0
+        self.elapsed = 0.0
+        self.stopped_by = None
+
+    def add(self, values: dict):
+        self.objects += 1
+        for name, profile in self.properties.items():
+            profile.add(values.get(name))
+
+    def summary(self) -> list:
+        return [profile.summary(self.objects) for profile in self.properties.values()]
+
+
+def collection_properties(collection) -> dict:
+    """{property name: data type} from the collection schema"""
+    return {prop.name: getattr(prop.data_type, "value", str(prop.data_type)) for prop in collection.config.get().properties}
+
+
+def profile_collection(
+    collection,
+    properties: dict = None,
+    time_budget: float = None,
+    object_budget: int = None,
+    on_progress=None,
+    progress_every: int = PROFILE_PROGRESS_EVERY,
+    seed: int = None
+) -> CollectionProfile:
+    """Stream the collection with the cursor iterator until it ends or a budget runs out
+
+    `on_progress` is called with the profile every `progress_every` objects and once at the end.
+    `stopped_by` on the result is "time budget", "object budget" or None when every object was read.
+    """
+    properties = properties or collection_properties(collection)
+    profile = CollectionProfile(properties, seed)
+    start = time.monotonic()
+    for obj in collection.iterator(include_vector=False, return_properties=list(properties), cache_size=PROFILE_PAGE_SIZE):
+        profile.add(obj.properties)
+        profile.elapsed = time.monotonic() - start
+        if object_budget and profile.objects >= object_budget:
+            profile.stopped_by = "object budget"
+            break
+        if time_budget and profile.elapsed >= time_budget:
+            profile.stopped_by = "time budget"
+            break
+        if on_progress is not None and profile.objects % progress_every == 0:
+            on_progress(profile)
+    profile.elapsed = time.monotonic() - start
+    if on_progress is not None:
+        on_progress(profile)
+    return profile
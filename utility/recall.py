@@ -0,0 +1,143 @@
+"""Recall of a collection's vector index measured against exact neighbours computed locally
+
+The exact top-k comes from blocked float32 matrix products over every vector in the collection,
+so peak memory is the corpus plus one (query block x corpus block) score matrix.
+"""
+import time
+
+import numpy as np
+from weaviate.classes.config import Reconfigure
+
+from constants import RECALL_CORPUS_BLOCK, RECALL_QUERY_BLOCK
+
+
+def index_config(collection, target_vector: str = None) -> dict:
+    """Vector index settings of the collection, or of one of its named vectors"""
+    config = collection.config.get()
+    if target_vector and config.vector_config:
+        vector_index = config.vector_config[target_vector].vector_index_config
+    else:
+        vector_index = config.vector_index_config
+    settings = {
+        "index_type": type(vector_index).__name__.replace("_VectorIndexConfig", "").lower(),
+        "distance": getattr(vector_index.distance_metric, "value", vector_index.distance_metric),
+        "quantizer": type(vector_index.quantizer).__name__.strip("_").replace("Config", "") if vector_index.quantizer else None,
+    }
+    for setting in ("ef", "ef_construction", "max_connections", "dynamic_ef_min", "dynamic_ef_max", "dynamic_ef_factor"):
+        if hasattr(vector_index, setting):
+            settings[setting] = getattr(vector_index, setting)
+    return settings
+
+
+def vector_names(collection) -> list:
+    """Named vectors of the collection; [None] for a collection with a single unnamed vector"""
+    config = collection.config.get()
+    return list(config.vector_config) if config.vector_config else [None]
+
+
+def load_vectors(collection, target_vector: str = None, max_objects: int = None, on_progress=None):
+    """Stream (ids, float32 matrix) of up to `max_objects` vectors with the cursor iterator"""
+    ids, vectors = [], []
+    include_vector = [target_vector] if target_vector else True
+    for obj in collection.iterator(include_vector=include_vector, return_properties=[]):
+        vector = obj.vector.get(target_vector or "default")
+        if vector is None:
+            continue
+        ids.append(str(obj.uuid))
+        vectors.append(np.asarray(vector, dtype=np.float32))
+        if on_progress is not None and len(ids) % RECALL_CORPUS_BLOCK == 0:
+            on_progress(len(ids))
+        if max_objects and len(ids) >= max_objects:
+            break
+    matrix = np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+    return ids, matrix
+
+
+def exact_neighbors(corpus: np.ndarray, queries: np.ndarray, k: int, distance: str = "cosine") -> np.ndarray:
+    """Row indices into `corpus` of each query's k nearest vectors, nearest first
+
+    Scores are computed block by block and merged into a running top-k, so the full
+    (queries x corpus) score matrix never exists at once.
+    """
+    if distance not in ("cosine", "dot", "l2-squared"):
+        raise ValueError(f"Distance {distance!r} is not supported by the local baseline")
+    corpus = corpus.astype(np.float32, copy=False)
+    queries = queries.astype(np.float32, copy=False)
+    if distance == "cosine":
+        corpus = corpus / np.maximum(np.linalg.norm(corpus, axis=1, keepdims=True), 1e-12)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    k = min(k, len(corpus))
+
+    neighbors = np.empty((len(queries), k), dtype=np.int64)
+    for q_start in range(0, len(queries), RECALL_QUERY_BLOCK):
+        block = queries[q_start:q_start + RECALL_QUERY_BLOCK]
+        best_scores = np.full((len(block), 0), -np.inf, dtype=np.float32)
+        best_ids = np.empty((len(block), 0), dtype=np.int64)
+        for c_start in range(0, len(corpus), RECALL_CORPUS_BLOCK):
+            chunk = corpus[c_start:c_start + RECALL_CORPUS_BLOCK]
+            # Higher is nearer: similarity for cosine and dot, -(|c|^2 - 2 q.c) for squared L2 (|q|^2 is constant per row)
+            scores = block @ chunk.T
+            if distance == "l2-squared":
+                scores = 2 * scores - np.einsum("ij,ij->i", chunk, chunk)[None, :]
+            scores = np.concatenate([best_scores, scores], axis=1)
+            ids = np.concatenate([best_ids, np.broadcast_to(np.arange(c_start, c_start + len(chunk)), (len(block), len(chunk)))], axis=1)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if scores.shape[1] > k else np.argsort(-scores, axis=1)
+            best_scores = np.take_along_axis(scores, top, axis=1)
+            best_ids = np.take_along_axis(ids, top, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        neighbors[q_start:q_start + len(block)] = np.take_along_axis(best_ids, order, axis=1)
+    return neighbors
+
+
+def measure_recall(collection, query_ids: list, query_vectors: np.ndarray, exact_ids: list, k: int, target_vector: str = None) -> list:
+    """Run every query through Weaviate's index one at a time; recall@k and latency per query"""
+    results = []
+    for query_id, vector, expected in zip(query_ids, query_vectors, exact_ids):
+        start = time.perf_counter()
+        response = collection.query.near_vector(
+            near_vector=vector.tolist(),
+            limit=k,
+            target_vector=target_vector,
+            return_properties=[]
+        )
+        latency = time.perf_counter() - start
+        found = {str(obj.uuid) for obj in response.objects}
+        results.append({"query_id": query_id, "recall": len(found & set(expected)) / len(expected), "latency": latency})
+    return results
+
+
+def set_ef(collection, ef: int, target_vector: str = None):
+    vector_index = Reconfigure.VectorIndex.hnsw(ef=ef)
+    if target_vector:
+        collection.config.update(vectorizer_config=[Reconfigure.NamedVectors.update(name=target_vector, vector_index_config=vector_index)])
+    else:
+        collection.config.update(vector_index_config=vector_index)
+
+
+def summarize(ef, results: list) -> dict:
+    recalls = np.array([result["recall"] for result in results])
+    latencies = np.array([result["latency"] for result in results]) * 1000
+    return {
+        "ef": ef,
+        "queries": len(results),
+        "recall_mean": float(recalls.mean()),
+        "recall_min": float(recalls.min()),
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def recall_curve(collection, ef_values: list, query_ids: list, query_vectors: np.ndarray, exact_ids: list, k: int, target_vector: str = None, on_progress=None) -> list:
+    """Measure recall once per ef value; the collection's ef is changed for everyone meanwhile and restored at the end"""
+    original_ef = index_config(collection, target_vector)["ef"]
+    curve = []
+    try:
+        for ef in ef_values:
+            set_ef(collection, ef, target_vector)
+            results = measure_recall(collection, query_ids, query_vectors, exact_ids, k, target_vector)
+            curve.append({**summarize(ef, results), "per_query": results})
+            if on_progress is not None:
+                on_progress(len(curve))
+    finally:
+        set_ef(collection, original_ef, target_vector)
+    return curve
@@ -0,0 +1,165 @@
+from weaviate.classes.query import Filter, QueryReference
+
+from constants import REFERENCE_BATCH_SIZE, REFERENCE_CACHE_SIZE, REFERENCE_CACHE_TTL
+from utility.cache import TTLCache
+
+# Flattened referenced objects keyed by (connection, collection, tenant, uuid, properties, depth), shared by all sessions
+_reference_cache = TTLCache("references", REFERENCE_CACHE_SIZE, REFERENCE_CACHE_TTL)
+
+
+def _link(name: str, targets: list, target: str, return_properties: list, return_references=None):
+    # Links pointing at several collections must name the one to return
+    if len(targets) == 1:
+        return QueryReference(link_on=name, return_properties=return_properties, return_references=return_references)
+    return QueryReference.MultiTarget(
+        link_on=name,
+        target_collection=target,
+        return_properties=return_properties,
+        return_references=return_references
+    )
+
+
+def nested_references(weaviate, class_name: str, depth: int):
+    """Every reference of a collection with all its properties, followed `depth` levels deep"""
+    if depth < 1:
+        return None
+    links = [
+        _link(name, targets, target, weaviate.get_properties(target), nested_references(weaviate, target, depth - 1))
+        for name, targets in weaviate.get_references(class_name).items()
+        for target in targets
+    ]
+    return links or None
+
+
+def _return_properties(weaviate, target: str, properties: list) -> list:
+    # Nothing selected, or nothing that exists in this target, returns all of its properties
+    available = weaviate.get_properties(target)
+    return [prop for prop in properties if prop in available] or available
+
+
+def link_properties(weaviate, class_name: str, references: dict) -> dict:
+    """Properties returned per selected link, across all its target collections"""
+    targets_by_link = weaviate.get_references(class_name)
+    return {
+        name: list(dict.fromkeys(prop for target in targets_by_link[name] for prop in _return_properties(weaviate, target, properties)))
+        for name, properties in references.items()
+    }
+
+
+def build_query_references(weaviate, class_name: str, references: dict, depth: int = 1, ids_only: bool = False) -> list:
+    """return_references for the selected links; `references` maps link name to return properties
+
+    With `ids_only` the query returns just the referenced UUIDs, to be resolved in batches afterwards.
+    """
+    links = []
+    targets_by_link = weaviate.get_references(class_name)
+    for name, properties in references.items():
+        targets = targets_by_link[name]
+        for target in targets:
+            if ids_only:
+                links.append(_link(name, targets, target, []))
+                continue
+            links.append(_link(
+                name,
+                targets,
+                target,
+                _return_properties(weaviate, target, properties),
+                nested_references(weaviate, target, depth - 1)
+            ))
+    return links
+
+
+def _merge_columns(columns: dict, added: dict):
+    """Append `added` to `columns` link by link, padding with None so every column of a link stays parallel to its ids"""
+    links = {}
+    for key in (*columns, *added):
+        # Property names cannot contain dots, so everything up to the last one names the link
+        links.setdefault(key[:key.rindex(".") + 1], {})[key] = None
+    for link, keys in links.items():
+        before, count = len(columns.get(f"{link}id", ())), len(added.get(f"{link}id", ()))
+        for key in keys:
+            columns.setdefault(key, [None] * before).extend(added.get(key, [None] * count))
+
+
+def _object_columns(prefix: str, uuid: str, requested: list, properties: dict) -> dict:
+    # Requested properties the object lacks, e.g. unset or from another target collection, are None
+    return {f"{prefix}{key}": [value] for key, value in {"id": uuid, **dict.fromkeys(requested), **properties}.items()}
+
+
+def flatten_references(references: dict, prefix: str = "", properties: dict = None) -> dict:
+    """Flatten resolved references into `link.property` columns, recursing into nested links
+
+    Any reference can point at several objects, so every column is a list with one value per referenced
+    object, even when there is only one; a column never mixes scalars and lists, which Arrow rejects.
+    `properties` maps link names to the properties requested for them; every object gets a value, or None,
+    for each, so the columns of a link line up with its `id` column.
+    """
+    columns = {}
+    for name, reference in (references or {}).items():
+        requested = (properties or {}).get(name, [])
+        for obj in (reference.objects if reference else []):
+            _merge_columns(columns, _object_columns(f"{prefix}{name}.", str(obj.uuid), requested, obj.properties))
+            _merge_columns(columns, flatten_references(obj.references, f"{prefix}{name}."))
+    return columns
+
+
+def resolve_references_batched(weaviate, class_name: str, objects: list, references: dict, depth: int = 1, tenant: str = None) -> list:
+    """Resolve the referenced UUIDs of a result page with one fetch per target collection
+
+    Returns one flattened column dict per object. Referenced objects are cached, so rows pointing
+    at the same object, and later queries, reuse a single lookup.
+    """
+    wanted = {}
+    for obj in objects:
+        for name in references:
+            reference = (obj.references or {}).get(name)
+            for ref_obj in (reference.objects if reference else []):
+                wanted.setdefault((name, ref_obj.collection), set()).add(str(ref_obj.uuid))
+
+    resolved = {}
+    for (name, collection_name), uuids in wanted.items():
+        properties = _return_properties(weaviate, collection_name, references[name])
+        collection_tenant = tenant if tenant and weaviate.get_tenants(collection_name) else None
+
+        def cache_key(uuid):
+            # UUIDs are only unique within a cluster, and what is visible depends on the credentials
+            return (weaviate.connection_key, collection_name, collection_tenant, uuid, tuple(properties), depth)
+
+        missing = []
+        for uuid in uuids:
+            cached = _reference_cache.get(cache_key(uuid))
+            if cached is None:
+                missing.append(uuid)
+            else:
+                resolved[(name, uuid)] = cached
+
+        collection = weaviate.client.collections.get(collection_name)
+        if collection_tenant:
+            collection = collection.with_tenant(collection_tenant)
+        for start in range(0, len(missing), REFERENCE_BATCH_SIZE):
+            chunk = missing[start:start + REFERENCE_BATCH_SIZE]
+            response = collection.query.fetch_objects(
+                filters=Filter.by_id().contains_any(chunk),
+                limit=len(chunk),
+                return_properties=properties,
+                return_references=nested_references(weaviate, collection_name, depth - 1)
+            )
+            for ref_obj in response.objects:
+                flat = (ref_obj.properties, flatten_references(ref_obj.references))
+                _reference_cache.set(cache_key(str(ref_obj.uuid)), flat)
+                resolved[(name, str(ref_obj.uuid))] = flat
+
+    requested = link_properties(weaviate, class_name, references)
+    rows = []
+    for obj in objects:
+        columns = {}
+        for name in references:
+            reference = (obj.references or {}).get(name)
+            for ref_obj in (reference.objects if reference else []):
+                uuid = str(ref_obj.uuid)
+                # Objects that could not be fetched keep their id, with None for every property
+                properties, nested = resolved.get((name, uuid), ({}, {}))
+                _merge_columns(columns, _object_columns(f"{name}.", uuid, requested[name], properties))
+                _merge_columns(columns, {f"{name}.{key}": values for key, values in nested.items()})
+        rows.append(columns)
+    return rows
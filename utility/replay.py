@@ -0,0 +1,288 @@
+"""Record Weaviate responses to disk and replay them without a cluster
+
+With RESPONSE_RECORDING=record, clients from `Weaviate.create_client()` save the response of every
+collection listing, `config.get()`, tenant listing, query and aggregate call, keyed by the call and
+its arguments, as a compressed pickle under RESPONSE_RECORDING_DIR. With RESPONSE_RECORDING=replay,
+no connection is made: the same calls are answered from the recording, after the latency measured
+while recording or a fixed REPLAY_LATENCY in ms, so the query -> DataFrame -> render pipeline runs
+deterministically in an isolated build. Calls that were not recorded raise ReplayMissError.
+
+Headless usage:
+
+    python -m utility.replay list
+    RESPONSE_RECORDING=replay python -m utility.replay bench --corpus queries.jsonl --repeat 20
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+import zlib
+
+from env import REPLAY_LATENCY, RESPONSE_RECORDING, RESPONSE_RECORDING_DIR
+
+MODES = ["off", "record", "replay"]
+
+
+class ReplayMissError(LookupError):
+    """The call was not seen while recording"""
+
+
+def call_key(scope: tuple, args: tuple, kwargs: dict) -> str:
+    # Query options (metadata, group-by, references, filters) have stable reprs
+    return json.dumps([list(scope), list(args), kwargs], sort_keys=True, default=repr)
+
+
+class ResponseStore:
+    """One compressed pickle per distinct call; later recordings of the same call replace earlier ones"""
+
+    def __init__(self, directory: str, latency: str = REPLAY_LATENCY) -> None:
+        self.directory = directory
+        self.latency = latency
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest()[:24] + ".bin")
+
+    def save(self, scope: tuple, args: tuple, kwargs: dict, response, duration: float):
+        key = call_key(scope, args, kwargs)
+        data = zlib.compress(pickle.dumps({"key": key, "duration": duration, "response": response}, protocol=pickle.HIGHEST_PROTOCOL))
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        # Written aside and renamed, so a concurrent replay never reads half a file
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _load(self, key: str) -> tuple:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                raise ReplayMissError(f"Not recorded: {key}") from None
+            # Kept compressed; every replay unpickles a fresh response, as a real call would build one
+            entry = (pickle.loads(zlib.decompress(data))["duration"], data)
+            with self._lock:
+                self._entries[key] = entry
+        return entry
+
+    def replay(self, scope: tuple, args: tuple, kwargs: dict):
+        duration, data = self._load(call_key(scope, args, kwargs))
+        delay = duration if self.latency == "recorded" else float(self.latency) / 1000
+        if delay > 0:
+            time.sleep(delay)
+        return pickle.loads(zlib.decompress(data))["response"]
+
+    def entries(self) -> list:
+        """(call, recorded seconds, compressed bytes) of every recording"""
+        if not os.path.isdir(self.directory):
+            return []
+        rows = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".bin"):
+                continue
+            with open(os.path.join(self.directory, name), "rb") as f:
+                data = f.read()
+            entry = pickle.loads(zlib.decompress(data))
+            rows.append((entry["key"], entry["duration"], len(data)))
+        return rows
+
+
+class _Recorder:
+    """Forwards calls to `target` and saves each response under `scope` and the method name"""
+
+    def __init__(self, target, store: ResponseStore, scope: tuple) -> None:
+        self._target = target
+        self._store = store
+        self._scope = scope
+
+    def __getattr__(self, name):
+        method = getattr(self._target, name)
+
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            response = method(*args, **kwargs)
+            self._store.save(self._scope + (name,), args, kwargs, response, time.perf_counter() - start)
+            return response
+        return call
+
+
+class _Player:
+    """Answers any method call under `scope` from the recording"""
+
+    def __init__(self, store: ResponseStore, scope: tuple) -> None:
+        self._store = store
+        self._scope = scope
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            return self._store.replay(self._scope + (name,), args, kwargs)
+        return call
+
+
+class RecordingCollection:
+    """Collection whose config, tenant, query and aggregate calls are recorded; anything else is passed through"""
+
+    def __init__(self, collection, store: ResponseStore, name: str, tenant: str = None) -> None:
+        self._collection = collection
+        self._store = store
+        self.name = name
+        self.tenant = tenant
+        for part in ("config", "tenants", "query", "aggregate"):
+            setattr(self, part, _Recorder(getattr(collection, part), store, (name, tenant, part)))
+
+    def with_tenant(self, tenant):
+        return RecordingCollection(self._collection.with_tenant(tenant), self._store, self.name, tenant)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+class ReplayCollection:
+    def __init__(self, store: ResponseStore, name: str, tenant: str = None) -> None:
+        self._store = store
+        self.name = name
+        self.tenant = tenant
+        for part in ("config", "tenants", "query", "aggregate"):
+            setattr(self, part, _Player(store, (name, tenant, part)))
+
+    def with_tenant(self, tenant):
+        return ReplayCollection(self._store, self.name, tenant)
+
+    def __getattr__(self, name):
+        # Cursors, writes and batches are never recorded
+        raise ReplayMissError(f"{name} is not available when replaying")
+
+
+class _RecordingCollections:
+    def __init__(self, collections, store: ResponseStore) -> None:
+        self._collections = collections
+        self._store = store
+
+    def list_all(self, *args, **kwargs):
+        return _Recorder(self._collections, self._store, ("collections",)).list_all(*args, **kwargs)
+
+    def get(self, name: str):
+        return RecordingCollection(self._collections.get(name), self._store, name)
+
+    def __getattr__(self, name):
+        return getattr(self._collections, name)
+
+
+class _ReplayCollections:
+    def __init__(self, store: ResponseStore) -> None:
+        self._store = store
+
+    def list_all(self, *args, **kwargs):
+        return self._store.replay(("collections", "list_all"), args, kwargs)
+
+    def get(self, name: str):
+        return ReplayCollection(self._store, name)
+
+
+class RecordingClient:
+    """Wraps a connected client; everything but `collections` is passed through"""
+
+    def __init__(self, client, store: ResponseStore) -> None:
+        self._client = client
+        self.collections = _RecordingCollections(client.collections, store)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class ReplayClient:
+    """Stands in for a connected client without any network access"""
+
+    def __init__(self, store: ResponseStore) -> None:
+        self.collections = _ReplayCollections(store)
+
+    def is_ready(self) -> bool:
+        return True
+
+    def is_connected(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(directory: str = RESPONSE_RECORDING_DIR) -> ResponseStore:
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = _stores[directory] = ResponseStore(directory)
+        return store
+
+
+def wrap_client(client):
+    """The client to use in the configured RESPONSE_RECORDING mode; `client` is None when replaying"""
+    if RESPONSE_RECORDING == "record":
+        return RecordingClient(client, get_store())
+    if RESPONSE_RECORDING == "replay":
+        return ReplayClient(get_store())
+    return client
+
+
+def replaying() -> bool:
+    return RESPONSE_RECORDING == "replay"
+
+
+def main(argv=None) -> int:
+    import numpy as np
+
+    from utility.base import convert_response_to_df
+    from utility.loadgen import load_corpus
+    from utility.weaviate import Weaviate
+
+    parser = argparse.ArgumentParser(prog="python -m utility.replay", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Recorded calls with their latency and size")
+    bench = commands.add_parser("bench", help="Time query -> DataFrame for a query corpus (run with RESPONSE_RECORDING=replay)")
+    bench.add_argument("--corpus", required=True, help="JSON lines of Weaviate.query keyword arguments")
+    bench.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    store = get_store()
+    if args.command == "list":
+        entries = store.entries()
+        for key, duration, size in entries:
+            print(f"{duration * 1000:8.1f} ms  {size:>9,} B  {key}")
+        print(f"{len(entries)} recorded calls in {store.directory}", file=sys.stderr)
+        return 0
+
+    if not replaying():
+        print("bench needs RESPONSE_RECORDING=replay so no cluster is contacted", file=sys.stderr)
+        return 2
+    with open(args.corpus) as f:
+        corpus = load_corpus(f)
+    weaviate = Weaviate("replay", "8080", None)
+    weaviate.client = weaviate.create_client()
+    timings = {}
+    for params in corpus:
+        label = f"{params['class_name']} {params.get('search_type', 'keyword')} {params.get('query') or '*'!r}"
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            convert_response_to_df(weaviate.query(**params, coalesce=False))
+            timings.setdefault(label, []).append((time.perf_counter() - start) * 1000)
+    for label, values in timings.items():
+        print(f"p50 {np.percentile(values, 50):8.2f} ms  p95 {np.percentile(values, 95):8.2f} ms  {label}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
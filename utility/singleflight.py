@@ -0,0 +1,61 @@
+import threading
+
+from utility.metrics import Counter
+
+COALESCED = Counter("singleflight_coalesced", "Calls that waited for an identical in-flight call instead of running their own", ("operation",))
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the same key share its outcome
+
+    Nothing is kept once the call finishes, so unlike a cache this never serves stale results.
+    Waiters receive the leader's result object itself and must treat it as read-only.
+    """
+
+    def __init__(self, operation: str) -> None:
+        self.operation = operation
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        """Return (result, shared); `shared` is True when another caller's in-flight call was joined"""
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            COALESCED.inc(operation=self.operation)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        return len(self._in_flight)
@@ -0,0 +1,245 @@
+"""Local Parquet snapshots of collections and search results, for browsing without a Weaviate connection
+
+A snapshot is a directory under SNAPSHOT_DIR holding `data.parquet` and a `manifest.json` with
+its source, row count and the collection schema from `collection.config.get()`. Opened snapshots
+are memory-mapped Arrow tables cached per process, so filters and group-bys run locally in
+Arrow compute. When DuckDB is installed, snapshots can also be queried with SQL.
+"""
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from constants import SNAPSHOT_BATCH_SIZE, SNAPSHOT_CACHE_SIZE
+# Manifest handling lives in a module without pandas or pyarrow, for the login screen
+from utility.snapshot_catalog import _manifest, _snapshot_path, _write_manifest, default_snapshot_name, list_snapshots
+
+FILTER_OPERATORS = ["=", "!=", ">", ">=", "<", "<=", "contains", "is null", "is not null"]
+AGGREGATIONS = ["count", "mean", "min", "max", "sum", "count_distinct"]
+
+_DATA_TYPES = {
+    "text": pa.string(),
+    "uuid": pa.string(),
+    "int": pa.int64(),
+    "number": pa.float64(),
+    "boolean": pa.bool_(),
+    "date": pa.timestamp("us", tz="UTC"),
+}
+
+
+def arrow_type(data_type: str) -> pa.DataType:
+    """Arrow column type of a Weaviate data type; objects, geo coordinates and phone numbers become JSON text"""
+    if data_type.endswith("[]"):
+        element = _DATA_TYPES.get(data_type[:-2])
+        return pa.list_(element) if element is not None else pa.string()
+    return _DATA_TYPES.get(data_type, pa.string())
+
+
+def _json_default(value):
+    return getattr(value, "__dict__", None) or str(value)
+
+
+def _convert(value, data_type: str):
+    if value is None:
+        return None
+    # The client returns uuid.UUID objects, which Arrow does not take as strings
+    if data_type == "uuid":
+        return str(value)
+    if data_type == "uuid[]":
+        return [str(item) for item in value]
+    if data_type.rstrip("[]") in _DATA_TYPES:
+        return value
+    return json.dumps(value, default=_json_default)
+
+
+def save_collection(collection, name: str, source: str, tenant: str = None, max_objects: int = None, on_progress=None) -> dict:
+    """Stream a whole collection into a snapshot, one Parquet row group per SNAPSHOT_BATCH_SIZE objects
+
+    Properties get typed columns from the collection schema; the full config is kept in the manifest.
+    """
+    path = _snapshot_path(name)
+    if os.path.exists(path):
+        raise FileExistsError(f"Snapshot {name!r} already exists")
+    config = collection.config.get()
+    schema = {prop.name: getattr(prop.data_type, "value", str(prop.data_type)) for prop in config.properties}
+    arrow_schema = pa.schema([("id", pa.string())] + [(prop, arrow_type(data_type)) for prop, data_type in schema.items()])
+    os.makedirs(path)
+    rows = 0
+    try:
+        with pq.ParquetWriter(os.path.join(path, "data.parquet"), arrow_schema) as writer:
+            batch = []
+
+            def flush():
+                writer.write_table(pa.Table.from_pylist(batch, schema=arrow_schema))
+                batch.clear()
+                if on_progress is not None:
+                    on_progress(rows)
+
+            for obj in collection.iterator(include_vector=False, return_properties=list(schema)):
+                batch.append({
+                    "id": str(obj.uuid),
+                    **{prop: _convert(obj.properties.get(prop), data_type) for prop, data_type in schema.items()},
+                })
+                rows += 1
+                if len(batch) == SNAPSHOT_BATCH_SIZE:
+                    flush()
+                if max_objects and rows >= max_objects:
+                    break
+            if batch:
+                flush()
+    except BaseException:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    manifest = _manifest(name, "collection", source, tenant, schema, rows, truncated=bool(max_objects and rows >= max_objects), config=config.to_dict())
+    _write_manifest(path, manifest)
+    return manifest
+
+
+def save_result(df, name: str, source: str, schema: dict = None, query: str = None) -> dict:
+    """Store a search result DataFrame as a snapshot"""
+    path = _snapshot_path(name)
+    if os.path.exists(path):
+        raise FileExistsError(f"Snapshot {name!r} already exists")
+    table = pa.Table.from_pandas(df.drop(columns=["index"], errors="ignore"), preserve_index=False)
+    os.makedirs(path)
+    try:
+        pq.write_table(table, os.path.join(path, "data.parquet"), row_group_size=SNAPSHOT_BATCH_SIZE)
+    except BaseException:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    manifest = _manifest(name, "result", source, None, schema or {}, table.num_rows, query=query)
+    _write_manifest(path, manifest)
+    return manifest
+
+
+def delete_snapshot(name: str):
+    with _cache_lock:
+        _cache.pop(name, None)
+    shutil.rmtree(_snapshot_path(name))
+
+
+def _filter_expression(schema: pa.Schema, filters: list, search: str = None):
+    """Arrow expression for [(column, operator, value)] filters and a substring search over text columns"""
+    expression = None
+
+    def combine(part):
+        return part if expression is None else expression & part
+
+    for column, operator, value in filters:
+        field = pc.field(column)
+        if operator == "is null":
+            expression = combine(field.is_null())
+            continue
+        if operator == "is not null":
+            expression = combine(field.is_valid())
+            continue
+        if operator == "contains":
+            expression = combine(pc.match_substring(field.cast(pa.string()), str(value), ignore_case=True))
+            continue
+        # The typed text is cast to the column's type, so "2024-01-01" compares with dates and "3" with ints
+        column_type = schema.field(column).type
+        if pa.types.is_timestamp(column_type) and column_type.tz:
+            timestamp = pd.Timestamp(str(value))
+            scalar = pa.scalar(timestamp if timestamp.tzinfo else timestamp.tz_localize(column_type.tz), type=column_type)
+        else:
+            scalar = pc.cast(pa.scalar(str(value)), column_type)
+        expression = combine({
+            "=": field == scalar, "!=": field != scalar, ">": field > scalar,
+            ">=": field >= scalar, "<": field < scalar, "<=": field <= scalar,
+        }[operator])
+
+    if search:
+        text_columns = [f.name for f in schema if pa.types.is_string(f.type) or pa.types.is_large_string(f.type)]
+        matches = None
+        for column in text_columns:
+            match = pc.match_substring(pc.field(column), search, ignore_case=True)
+            matches = match if matches is None else matches | match
+        if matches is not None:
+            expression = combine(matches)
+    return expression
+
+
+class Snapshot:
+    """An opened snapshot: manifest plus its data as a memory-mapped Arrow table"""
+
+    def __init__(self, name: str) -> None:
+        path = _snapshot_path(name)
+        with open(os.path.join(path, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self.name = name
+        self.path = os.path.join(path, "data.parquet")
+        self.table = pq.read_table(self.path, memory_map=True)
+
+    @property
+    def columns(self) -> list:
+        return self.table.column_names
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows
+
+    def _filtered(self, filters: list = None, search: str = None, columns: list = None) -> pa.Table:
+        expression = _filter_expression(self.table.schema, filters or [], search)
+        return ds.dataset(self.table).to_table(filter=expression, columns=columns)
+
+    def query(self, filters: list = None, search: str = None, columns: list = None, limit: int = None):
+        """Matching rows as a DataFrame, and the number of matches before `limit`"""
+        table = self._filtered(filters, search, columns)
+        matched = table.num_rows
+        if limit:
+            table = table.slice(0, limit)
+        return table.to_pandas(), matched
+
+    def aggregate(self, group_by: list, aggregations: list, filters: list = None, search: str = None):
+        """Group matching rows by `group_by` columns; `aggregations` are (column, function) pairs"""
+        aggregations = aggregations or [(group_by[0], "count")]
+        needed = list(dict.fromkeys(list(group_by) + [column for column, _ in aggregations]))
+        table = self._filtered(filters, search, needed)
+        result = table.group_by(group_by).aggregate(list(aggregations)).to_pandas()
+        first = f"{aggregations[0][0]}_{aggregations[0][1]}"
+        return result.sort_values(first, ascending=False, ignore_index=True)
+
+    def sql(self, statement: str):
+        """Run SQL with DuckDB against the snapshot, available as the table `snapshot`"""
+        import duckdb
+
+        connection = duckdb.connect()
+        try:
+            connection.register("snapshot", self.table)
+            return connection.execute(statement).df()
+        finally:
+            connection.close()
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def open_snapshot(name: str) -> Snapshot:
+    """Snapshot by name, kept open for later reruns and sessions (LRU of SNAPSHOT_CACHE_SIZE)"""
+    with _cache_lock:
+        snapshot = _cache.get(name)
+        if snapshot is not None:
+            _cache.move_to_end(name)
+            return snapshot
+    snapshot = Snapshot(name)
+    with _cache_lock:
+        _cache[name] = snapshot
+        while len(_cache) > SNAPSHOT_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return snapshot
+
+
+def sql_available() -> bool:
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -0,0 +1,53 @@
+"""Names and manifests of local snapshots; light enough to list snapshots on the login screen
+
+The data side, which needs pandas and pyarrow, is in utility/snapshot.py.
+"""
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+from env import SNAPSHOT_DIR
+
+
+def default_snapshot_name(source: str) -> str:
+    """Valid snapshot name from a source label and the current time"""
+    return re.sub(r"[^\w.-]", "_", f"{source}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+
+def _snapshot_path(name: str) -> str:
+    if not re.fullmatch(r"[\w.-]+", name) or name.startswith("."):
+        raise ValueError("Snapshot names may only contain letters, digits, '.', '_' and '-'")
+    return os.path.join(SNAPSHOT_DIR, name)
+
+
+def _write_manifest(path: str, manifest: dict):
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, default=str)
+
+
+def _manifest(name: str, kind: str, source: str, tenant: str, schema: dict, rows: int, **extra) -> dict:
+    return {
+        "name": name,
+        "kind": kind,
+        "source": source,
+        "tenant": tenant,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "rows": rows,
+        "schema": schema,
+        **extra,
+    }
+
+
+def list_snapshots() -> list:
+    """Manifests of all snapshots, newest first"""
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return []
+    manifests = []
+    for name in os.listdir(SNAPSHOT_DIR):
+        try:
+            with open(os.path.join(SNAPSHOT_DIR, name, "manifest.json")) as f:
+                manifests.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(manifests, key=lambda manifest: manifest["created"], reverse=True)
@@ -0,0 +1,61 @@
+import importlib
+import os
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+
+import streamlit as st
+
+from utility.memprofile import profile_memory
+from utility.tracing import span
+
+STYLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "style.css")
+
+# First-import cost per module in ms, including everything it imports in turn
+_import_times = {}
+
+
+def timed_import(module_name: str):
+    """Import a module on first use and record how long the import took"""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    _import_times[module_name] = (time.perf_counter() - start) * 1000
+    return module
+
+
+def load_page(name: str):
+    """Render function of a page, importing its module the first time it is shown"""
+    return getattr(timed_import(f"pages.{name}"), name)
+
+
+def import_report() -> list:
+    """Recorded import costs, slowest first"""
+    return sorted(
+        ({"module": name, "import_ms": ms} for name, ms in _import_times.items()),
+        key=lambda row: row["import_ms"],
+        reverse=True,
+    )
+
+
+@lru_cache(maxsize=1)
+def load_css() -> str:
+    """App stylesheet, read from disk once per process"""
+    with open(STYLE_PATH, encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+
+@contextmanager
+def timed_section(name: str, history: int = 20):
+    """Record wall time of a page section, full rerun or fragment rerun, in the session state and as a trace span"""
+    start = time.perf_counter()
+    try:
+        with span(name), profile_memory(name):
+            yield
+    finally:
+        timings = st.session_state.setdefault("rerun_timings", {})
+        timings.setdefault(name, deque(maxlen=history)).append(time.perf_counter() - start)
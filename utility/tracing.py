@@ -0,0 +1,257 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from env import (
+    TRACE_BATCH_SIZE,
+    TRACE_EXPORTER,
+    TRACE_FILE,
+    TRACE_FILE_BACKUPS,
+    TRACE_FILE_MAX_MB,
+    TRACE_OTLP_ENDPOINT,
+    TRACE_SAMPLE_RATE,
+    TRACE_SERVICE_NAME,
+)
+
+TRACING_ENABLED = TRACE_EXPORTER in ("json", "otlp")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    """Stands in for spans that are disabled or not sampled"""
+
+    sampled = False
+
+    def set_attribute(self, key: str, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """One timed operation, shaped after the OpenTelemetry span model"""
+
+    sampled = True
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: str, attributes: dict) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.attributes = {key: value for key, value in attributes.items() if value is not None}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set_attribute(self, key: str, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "status": "ERROR" if self.error else "OK",
+            "error": self.error,
+        }
+
+
+class JsonFileExporter:
+    """One JSON line per span in a size-rotated file"""
+
+    def __init__(self, path: str = TRACE_FILE, max_mb: float = TRACE_FILE_MAX_MB, backups: int = TRACE_FILE_BACKUPS) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.logger = logging.getLogger("weaviate_utility.traces")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if not self.logger.handlers:
+            self.logger.addHandler(RotatingFileHandler(path, maxBytes=int(max_mb * 1024 * 1024), backupCount=backups))
+
+    def export(self, span: Span):
+        self.logger.info(json.dumps(span.to_dict(), default=str))
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpExporter:
+    """Batches spans on a background thread and posts them to an OTLP/HTTP collector as JSON
+
+    Spans are dropped rather than blocking a rerun when the queue is full or the collector is down.
+    """
+
+    def __init__(self, endpoint: str = TRACE_OTLP_ENDPOINT, batch_size: int = TRACE_BATCH_SIZE, interval: float = 2.0) -> None:
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue = queue.Queue(maxsize=batch_size * 20)
+        self.dropped = 0
+        threading.Thread(target=self._run, name="otlp-exporter", daemon=True).start()
+
+    def export(self, span: Span):
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size and time.monotonic() < deadline:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._post(batch)
+            except Exception:
+                self.dropped += len(batch)
+
+    def _post(self, batch: list):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+                "scopeSpans": [{
+                    "scope": {"name": TRACE_SERVICE_NAME},
+                    "spans": [
+                        {
+                            "traceId": span.trace_id,
+                            "spanId": span.span_id,
+                            "parentSpanId": span.parent_span_id or "",
+                            "name": span.name,
+                            "kind": 1,
+                            "startTimeUnixNano": str(span.start_ns),
+                            "endTimeUnixNano": str(span.end_ns),
+                            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+                            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                        }
+                        for span in batch
+                    ],
+                }],
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        urllib.request.urlopen(request, timeout=5).close()
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = OtlpHttpExporter() if TRACE_EXPORTER == "otlp" else JsonFileExporter()
+        return _exporter
+
+
+def _session_attributes() -> dict:
+    # Root spans carry the session and the search whose results are on screen
+    if get_script_run_ctx() is None:
+        return {}
+    return {"session.id": get_script_run_ctx().session_id, "search.id": st.session_state.get("search_id")}
+
+
+def start_search(search_id: str = None) -> str:
+    """New search ID for the session, linking the search span to later render spans of its results
+
+    Pass the ID of a search started earlier, e.g. a background job, to link its results instead.
+    """
+    search_id = search_id or os.urandom(8).hex()
+    st.session_state["search_id"] = search_id
+    current_span().set_attribute("search.id", search_id)
+    return search_id
+
+
+def current_span():
+    span = _current_span.get()
+    return span if span is not None else NOOP_SPAN
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Trace the enclosed block; sampling is decided once per trace, at its root span"""
+    parent = _current_span.get()
+    if not TRACING_ENABLED or parent is NOOP_SPAN:
+        yield NOOP_SPAN
+        return
+
+    if parent is None:
+        if random.random() >= TRACE_SAMPLE_RATE:
+            # Unsampled trace: children see the no-op span and skip all work
+            token = _current_span.set(NOOP_SPAN)
+            try:
+                yield NOOP_SPAN
+            finally:
+                _current_span.reset(token)
+            return
+        current = Span(name, os.urandom(16).hex(), None, {**_session_attributes(), **attributes})
+    else:
+        current = Span(name, parent.trace_id, parent.span_id, attributes)
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        # st.rerun()/st.stop() raise BaseException subclasses and are not errors
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_ns = time.time_ns()
+        get_exporter().export(current)
+
+
+def traced(name: str, attributes=None):
+    """Decorator form of `span`; `attributes` maps the call's bound arguments to span attributes"""
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACING_ENABLED or _current_span.get() is NOOP_SPAN:
+                return func(*args, **kwargs)
+            span_attributes = {}
+            if attributes is not None:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                span_attributes = attributes(bound.arguments)
+            with span(name, **span_attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
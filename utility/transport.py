@@ -0,0 +1,59 @@
+import statistics
+import time
+
+from constants import DEFAULT_TRANSPORT_PROFILE, TRANSPORT_PROBE_ROUNDS, TRANSPORT_PROFILES
+from env import TRANSPORT_OVERRIDES
+
+
+def resolve_profile(name: str = None) -> dict:
+    """Settings of a named transport profile with any WEAVIATE_* environment overrides applied"""
+    profile = dict(TRANSPORT_PROFILES.get(name or DEFAULT_TRANSPORT_PROFILE, TRANSPORT_PROFILES[DEFAULT_TRANSPORT_PROFILE]))
+    profile.update(TRANSPORT_OVERRIDES)
+    return profile
+
+
+def additional_config(name: str = None):
+    # Imported here so the connection page can list profiles without loading the client
+    from weaviate.classes.init import AdditionalConfig, Timeout
+    from weaviate.config import ConnectionConfig
+
+    profile = resolve_profile(name)
+    return AdditionalConfig(
+        timeout=Timeout(
+            init=profile["timeout_init"],
+            query=profile["timeout_query"],
+            insert=profile["timeout_insert"],
+        ),
+        connection=ConnectionConfig(
+            session_pool_connections=int(profile["pool_connections"]),
+            session_pool_maxsize=int(profile["pool_maxsize"]),
+            session_pool_max_retries=int(profile["pool_max_retries"]),
+            session_pool_timeout=int(profile["pool_timeout"]),
+        ),
+    )
+
+
+def probe_profile(weaviate, rounds: int = TRANSPORT_PROBE_ROUNDS) -> dict:
+    """Measure handshake and small-query latency of a connection with its transport profile"""
+    handshakes, queries = [], []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        client = weaviate.create_client()
+        try:
+            client.is_ready()
+            handshakes.append((time.perf_counter() - start) * 1000)
+
+            collection_name = next(iter(client.collections.list_all(simple=True)), None)
+            if collection_name:
+                start = time.perf_counter()
+                client.collections.get(collection_name).query.fetch_objects(limit=1, return_properties=[])
+                queries.append((time.perf_counter() - start) * 1000)
+        finally:
+            client.close()
+
+    return {
+        "profile": weaviate.transport_profile,
+        "handshake_ms": statistics.median(handshakes),
+        "query_ms": statistics.median(queries) if queries else None,
+        "rounds": rounds,
+    }
@@ -1,25 +1,48 @@
+import hashlib
+import json
+import time
 import traceback
 import weaviate
 import warnings
 
 import streamlit as st
 import weaviate.classes as wvc
-from weaviate.classes.query import HybridFusion
+from weaviate.classes.query import GroupBy, HybridFusion
 from weaviate.classes.init import Auth
 from urllib.parse import urlparse
 
-from env import GRPC_HOST, GRPC_PORT
-from constants import ADDITIONALS, DEFAULT_ALPHA, DEFAULT_FUSION, DEFAULT_LIMIT, DEFAULT_WITH_ADDITIONAL
+from env import GRPC_HOST, GRPC_PORT, TRANSPORT_PROFILE
+from utility.cache import TTLCache
+from utility.health import CircuitOpenError, get_breaker, is_transient_error
+from utility.memprofile import profile_memory
+from utility.metrics import CONNECTIONS_CREATED, ERRORS, QUERY_DURATION, QUERY_ROWS
+from utility.references import build_query_references, flatten_references, link_properties, resolve_references_batched
+from utility.replay import replaying, wrap_client
+from utility.singleflight import SingleFlight
+from utility.tracing import current_span, traced
+from utility.transport import additional_config, resolve_profile
+from constants import ADDITIONALS, DEFAULT_ALPHA, DEFAULT_FUSION, DEFAULT_LIMIT, DEFAULT_REFERENCE_MODE, DEFAULT_WITH_ADDITIONAL, GROUP_COLUMN, GROUP_SIZE_COLUMN, SCHEMA_CACHE_SIZE, SCHEMA_CACHE_TTL, SIMILAR_CACHE_SIZE, SIMILAR_CACHE_TTL
 
 warnings.filterwarnings("ignore", category=ResourceWarning)
 
+# Identical searches running at the same time, from any session, share one request
+_query_flight = SingleFlight("weaviate.query")
+
+# "More like this" rows keyed by connection, source object and query shape
+_similar_cache = TTLCache("similar", SIMILAR_CACHE_SIZE, SIMILAR_CACHE_TTL)
+
+# Collection configs and tenant names keyed by connection and collection; reference resolution looks
+# them up for every link and target of every query
+_schema_cache = TTLCache("schema", SCHEMA_CACHE_SIZE, SCHEMA_CACHE_TTL)
+
 class Weaviate:
-    def __init__(self, weaviate_host: str, weaviate_port: str, weaviate_api_key: str, llm_provider: str = None, llm_api_key: str = None) -> None:
+    def __init__(self, weaviate_host: str, weaviate_port: str, weaviate_api_key: str, llm_provider: str = None, llm_api_key: str = None, transport_profile: str = None) -> None:
         self.weaviate_host = weaviate_host
         self.weaviate_port = weaviate_port
         self.weaviate_api_key = weaviate_api_key
         self.llm_provider = llm_provider.lower() if llm_provider else None
         self.llm_api_key = llm_api_key
+        self.transport_profile = transport_profile or TRANSPORT_PROFILE
 
     def _get_provider_header(self):
         """Get the appropriate header based on LLM provider selection"""
@@ -31,6 +54,56 @@ class Weaviate:
         else:
             return {"X-OpenAI-Api-Key": self.llm_api_key}
     
+    @property
+    def connection_key(self) -> str:
+        """Identifies the cluster and credentials, shared by every session using them"""
+        api_key_hash = hashlib.sha256((self.weaviate_api_key or "").encode()).hexdigest()[:12]
+        return f"{self.weaviate_host}:{self.weaviate_port}:{api_key_hash}"
+
+    def _connection_params(self):
+        """Work out HTTP port, GRPC port, TLS and deployment mode for the configured host"""
+        # Auto-detect if secure connection is needed (for cloud deployments)
+        # Only use secure for standard HTTPS ports or cloud domains
+        is_cloud_deployment = self.weaviate_host not in ['localhost', '127.0.0.1']
+        # Use secure only if port is explicitly 443/8443 
+        use_secure = str(self.weaviate_port) in ['443', '8443']
+        
+        # Convert port to int
+        port_int = int(self.weaviate_port) if self.weaviate_port else (443 if use_secure else 8080)
+        
+        # GRPC configuration - use same host and calculate GRPC port
+        # For cloud: typically HTTP + 10000 or use 50051
+        if GRPC_PORT:
+            grpc_port = int(GRPC_PORT)
+        else:
+            # Default GRPC port calculation
+            grpc_port = 50051 if not is_cloud_deployment else (port_int + 10000 if port_int < 40000 else 50051)
+        return port_int, grpc_port, use_secure, is_cloud_deployment
+
+    def create_client(self):
+        """Create a client for this connection without any UI output"""
+        if replaying():
+            # Answered from recorded responses; nothing is contacted
+            return wrap_client(None)
+        port_int, grpc_port, use_secure, _ = self._connection_params()
+        with profile_memory("weaviate.create_client"):
+            client = weaviate.connect_to_custom(
+                http_host=self.weaviate_host,
+                http_port=port_int,
+                http_secure=use_secure,
+                grpc_host=self.weaviate_host,
+                grpc_port=grpc_port,
+                grpc_secure=use_secure,
+                # A local container without authentication takes no API key
+                auth_credentials=Auth.api_key(self.weaviate_api_key) if self.weaviate_api_key else None,
+                skip_init_checks=False,  # Enable checks for better error messages
+                headers=self._get_provider_header(),
+                additional_config=additional_config(self.transport_profile)
+            )
+        CONNECTIONS_CREATED.inc()
+        return wrap_client(client)
+
+    @traced("weaviate.connect", lambda args: {"host": args["self"].weaviate_host, "transport_profile": args["self"].transport_profile})
     def connect(self):
         try:
             st.info("🔄 **Step 1/6:** Initializing connection...")
@@ -42,23 +115,7 @@ class Weaviate:
             else:
                 st.info("ℹ️ **Step 2/6:** No LLM provider configured (using keyword search)")
             
-            # Auto-detect if secure connection is needed (for cloud deployments)
-            # Only use secure for standard HTTPS ports or cloud domains
-            is_cloud_deployment = self.weaviate_host not in ['localhost', '127.0.0.1']
-            # Use secure only if port is explicitly 443/8443 
-            use_secure = str(self.weaviate_port) in ['443', '8443']
-            
-            # Convert port to int
-            port_int = int(self.weaviate_port) if self.weaviate_port else (443 if use_secure else 8080)
-            
-            # GRPC configuration - use same host and calculate GRPC port
-            # For cloud: typically HTTP + 10000 or use 50051
-            grpc_host = self.weaviate_host
-            if GRPC_PORT:
-                grpc_port = int(GRPC_PORT)
-            else:
-                # Default GRPC port calculation
-                grpc_port = 50051 if not is_cloud_deployment else (port_int + 10000 if port_int < 40000 else 50051)
+            port_int, grpc_port, use_secure, is_cloud_deployment = self._connection_params()
             
             st.info(f"""
             ℹ️ **Step 3/6:** Connection parameters calculated:
@@ -67,21 +124,12 @@ class Weaviate:
             - **GRPC Port:** {grpc_port}
             - **Protocol:** {'HTTPS/WSS (secure)' if use_secure else 'HTTP/WS (insecure)'}
             - **Mode:** {'Cloud Deployment' if is_cloud_deployment else 'Local Deployment'}
+            - **Transport Profile:** {self.transport_profile} (query timeout {resolve_profile(self.transport_profile)['timeout_query']:g}s)
             """)
             
             st.info("🔄 **Step 4/6:** Creating Weaviate client...")
             
-            self.client = weaviate.connect_to_custom(
-                http_host=self.weaviate_host,
-                http_port=port_int,
-                http_secure=use_secure,
-                grpc_host=grpc_host,  
-                grpc_port=grpc_port,  
-                grpc_secure=use_secure,
-                auth_credentials=Auth.api_key(self.weaviate_api_key),
-                skip_init_checks=False,  # Enable checks for better error messages
-                headers=provider_headers
-            )
+            self.client = self.create_client()
             
             st.success("✅ **Step 5/6:** Weaviate client created successfully!")
             st.info("🔄 **Step 6/6:** Testing connection readiness...")
@@ -95,10 +143,12 @@ class Weaviate:
                 return False
                 
         except Exception as e:
-            import traceback
             error_msg = str(e) if str(e) else "Unknown error"
             error_type = type(e).__name__
             error_traceback = traceback.format_exc()
+            ERRORS.inc(operation="connect", error_type=error_type)
+            if is_transient_error(e):
+                get_breaker(self.connection_key).record_failure()
             
             # Display actual error prominently
             st.error(f"""
@@ -109,9 +159,9 @@ class Weaviate:
             **Error Message:** {error_msg}
             """)
             
-            # Show full traceback prominently
-            st.markdown("### 📋 Full Error Traceback (Actual Error Details):")
-            st.code(error_traceback, language="python")
+            # Full traceback stays available without taking over the page
+            with st.expander("📋 Full Error Traceback"):
+                st.code(error_traceback, language="python")
             
             # Check if using private IP from cloud
             if self.weaviate_host.startswith(('192.168.', '10.', '172.')):
@@ -133,53 +183,65 @@ class Weaviate:
             
             return False
 
+    def close(self):
+        if getattr(self, "client", None) is not None:
+            self.client.close()
+
+    @traced("weaviate.get_classes")
     def get_classes(self) -> list:
         objects = self.client.collections.list_all()
         return list(objects.keys()) 
 
-    def query(
-        self,
-        class_name,
-        query: str = None,
-        properties: list = None,
-        alpha: float = DEFAULT_ALPHA,
-        with_additional: list = DEFAULT_WITH_ADDITIONAL,
-        fusion: str = DEFAULT_FUSION,
-        limit: int = DEFAULT_LIMIT,
-        search_type: str = "keyword"
-    ):
-        collection = self.client.collections.get(class_name)
+    def get_config(self, class_name: str):
+        """Collection config, cached for SCHEMA_CACHE_TTL seconds"""
+        key = (self.connection_key, "config", class_name)
+        config = _schema_cache.get(key)
+        if config is None:
+            config = self.client.collections.get(class_name).config.get()
+            _schema_cache.set(key, config)
+        return config
 
-        fusion_type = HybridFusion.RELATIVE_SCORE if fusion == "relative" else HybridFusion.RANKED
-        
-        metadata_query = wvc.query.MetadataQuery(score=False,explain_score=False, certainty=False, distance=False)
+    def get_properties(self, class_name: str) -> list:
+        return [prop.name for prop in self.get_config(class_name).properties]
 
-        for prop in ADDITIONALS:
-            if prop in with_additional and prop != "id":
-                setattr(metadata_query, prop, True)
+    def get_references(self, class_name: str) -> dict:
+        """Reference properties of a collection and the collections they point to"""
+        return {ref.name: list(ref.target_collections) for ref in self.get_config(class_name).references}
 
-        if not query:
-            query = "*"
-            
-        if not properties:
-            properties = st.session_state.get("properties_options", [])
+    def get_tenants(self, class_name: str) -> list:
+        """Tenant names of a multi-tenant collection, empty for single-tenant collections; cached like the config"""
+        if not self.get_config(class_name).multi_tenancy_config.enabled:
+            return []
+        key = (self.connection_key, "tenants", class_name)
+        tenants = _schema_cache.get(key)
+        if tenants is None:
+            tenants = sorted(self.client.collections.get(class_name).tenants.get().keys())
+            _schema_cache.set(key, tenants)
+        return tenants
 
+    def _search(self, collection, search_type: str, query: str, alpha: float, fusion_type, limit: int, properties: list, metadata_query, return_references=None, group_by=None, offset: int = None, after: str = None):
         # Execute different queries based on search type
         if search_type == "keyword":
             # BM25 keyword search
             result = collection.query.bm25(
                 query=query,
                 limit=limit,
+                offset=offset,
                 return_properties=properties,
-                return_metadata=metadata_query
+                return_metadata=metadata_query,
+                return_references=return_references,
+                group_by=group_by
             )
         elif search_type == "near_text":
             # Near text semantic search
             result = collection.query.near_text(
                 query=query,
                 limit=limit,
+                offset=offset,
                 return_properties=properties,
-                return_metadata=metadata_query
+                return_metadata=metadata_query,
+                return_references=return_references,
+                group_by=group_by
             )
         elif search_type == "hybrid":
             # Hybrid search (combination of keyword and vector)
@@ -187,26 +249,195 @@ class Weaviate:
                 query=query,
                 alpha=alpha,
                 limit=limit,
+                offset=offset,
                 return_properties=properties,
                 fusion_type=fusion_type,
-                return_metadata=metadata_query
+                return_metadata=metadata_query,
+                return_references=return_references,
+                group_by=group_by
+            )
+        elif search_type == "near_object":
+            # Similar objects using the stored vector of the object whose UUID is the query
+            result = collection.query.near_object(
+                near_object=query,
+                limit=limit,
+                offset=offset,
+                return_properties=properties,
+                return_metadata=metadata_query,
+                return_references=return_references,
+                group_by=group_by
+            )
+        elif search_type == "fetch":
+            # Unranked listing in id order; `after` continues from an object id like the cursor iterator
+            result = collection.query.fetch_objects(
+                limit=limit,
+                after=after,
+                return_properties=properties,
+                return_metadata=metadata_query,
+                return_references=return_references
             )
         else:
             # Default to keyword search if unknown type
             result = collection.query.bm25(
                 query=query,
                 limit=limit,
+                offset=offset,
                 return_properties=properties,
-                return_metadata=metadata_query
+                return_metadata=metadata_query,
+                return_references=return_references,
+                group_by=group_by
+            )
+        return result
+
+    @traced("weaviate.query", lambda args: {
+        "collection": args["class_name"],
+        "search_type": args["search_type"],
+        "limit": args["limit"],
+        "property_count": len(args["properties"] or []),
+        "tenant": args["tenant"],
+        "offset": args["offset"] or None,
+    })
+    def query(
+        self,
+        class_name,
+        query: str = None,
+        properties: list = None,
+        alpha: float = DEFAULT_ALPHA,
+        with_additional: list = DEFAULT_WITH_ADDITIONAL,
+        fusion: str = DEFAULT_FUSION,
+        limit: int = DEFAULT_LIMIT,
+        search_type: str = "keyword",
+        tenant: str = None,
+        references: dict = None,
+        reference_depth: int = 1,
+        reference_mode: str = DEFAULT_REFERENCE_MODE,
+        group_by: dict = None,
+        offset: int = 0,
+        after: str = None,
+        coalesce: bool = True
+    ):
+        """Search a collection; returns a list of row dicts that may be shared with other callers, so don't mutate it
+
+        With `coalesce` False the search always goes to Weaviate, e.g. when generating load. Search type "fetch"
+        lists objects without ranking, starting after the object id `after`.
+        """
+        if not properties:
+            properties = st.session_state.get("properties_options", [])
+        if not coalesce:
+            return self._query(
+                class_name, query, properties, alpha, with_additional, fusion, limit, search_type,
+                tenant, references, reference_depth, reference_mode, group_by, offset, after
             )
+
+        # Everything that can change the response, including the LLM key used to vectorize the query
+        llm_key_hash = hashlib.sha256((self.llm_api_key or "").encode()).hexdigest()[:12]
+        key = json.dumps(
+            [self.connection_key, self.llm_provider, llm_key_hash, class_name, query, properties, alpha, list(with_additional),
+             fusion, limit, offset, after, search_type, tenant, references, reference_depth, reference_mode, group_by],
+            sort_keys=True,
+            default=str
+        )
+        rows, shared = _query_flight.do(key, lambda: self._query(
+            class_name, query, properties, alpha, with_additional, fusion, limit, search_type,
+            tenant, references, reference_depth, reference_mode, group_by, offset, after
+        ))
+        current_span().set_attribute("coalesced", shared)
+        return rows
+
+    def _query(
+        self,
+        class_name,
+        query: str = None,
+        properties: list = None,
+        alpha: float = DEFAULT_ALPHA,
+        with_additional: list = DEFAULT_WITH_ADDITIONAL,
+        fusion: str = DEFAULT_FUSION,
+        limit: int = DEFAULT_LIMIT,
+        search_type: str = "keyword",
+        tenant: str = None,
+        references: dict = None,
+        reference_depth: int = 1,
+        reference_mode: str = DEFAULT_REFERENCE_MODE,
+        group_by: dict = None,
+        offset: int = 0,
+        after: str = None
+    ):
+        # Fail fast instead of waiting for a timeout while the cluster is unhealthy
+        breaker = get_breaker(self.connection_key)
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            ERRORS.inc(operation="query", error_type="CircuitOpenError")
+            raise
+
+        collection = self.client.collections.get(class_name)
+        if tenant:
+            collection = collection.with_tenant(tenant)
+
+        fusion_type = HybridFusion.RELATIVE_SCORE if fusion == "relative" else HybridFusion.RANKED
+        
+        metadata_query = wvc.query.MetadataQuery(score=False,explain_score=False, certainty=False, distance=False)
+
+        for prop in ADDITIONALS:
+            if prop in with_additional and prop != "id":
+                setattr(metadata_query, prop, True)
+
+        if not query:
+            query = "*"
             
+        if not properties:
+            properties = st.session_state.get("properties_options", [])
+
+        # Selected reference properties ({link name: return properties}) come back in the same query,
+        # either fully resolved or as UUIDs that are looked up in one batch per target collection
+        return_references = None
+        if references:
+            return_references = build_query_references(self, class_name, references, reference_depth, ids_only=reference_mode == "batched")
+
+        # Server-side grouping: `limit` objects are searched, then collapsed into groups by a property
+        group_by_query = None
+        if group_by:
+            group_by_query = GroupBy(
+                prop=group_by["property"],
+                number_of_groups=group_by["number_of_groups"],
+                objects_per_group=group_by["objects_per_group"]
+            )
+
+        start = time.perf_counter()
+        try:
+            with profile_memory("query.search"):
+                result = self._search(collection, search_type, query, alpha, fusion_type, limit, properties, metadata_query, return_references, group_by_query, offset or None, after)
+        except Exception as e:
+            ERRORS.inc(operation="query", error_type=type(e).__name__)
+            if is_transient_error(e):
+                breaker.record_failure()
+            raise
+        breaker.record_success()
+        QUERY_DURATION.observe(time.perf_counter() - start, collection=class_name, search_type=search_type)
+
         try:
             objects_dict = []
 
-            for obj in result.objects:
+            # Grouped results come back as one row per member, tagged with its group, in group rank order
+            if group_by_query:
+                objects = [(obj, group) for group in result.groups.values() for obj in group.objects]
+            else:
+                objects = [(obj, None) for obj in result.objects]
+
+            resolved_references = inline_properties = None
+            if references and reference_mode == "batched":
+                resolved_references = resolve_references_batched(self, class_name, [obj for obj, _ in objects], references, reference_depth, tenant)
+            elif references:
+                inline_properties = link_properties(self, class_name, references)
+
+            for i, (obj, group) in enumerate(objects):
                 if hasattr(obj, 'properties') and hasattr(obj, 'metadata'):
                     obj_data = {}
 
+                    if group is not None:
+                        obj_data[GROUP_COLUMN] = group.name
+                        obj_data[GROUP_SIZE_COLUMN] = group.number_of_objects
+
                     # Check if 'with_additional' contains 'id' and if so, add it to obj_data
                     if 'id' in with_additional:
                         obj_data["id"] = str(obj.uuid)
@@ -220,11 +451,82 @@ class Weaviate:
                     for key, value in obj.properties.items():
                         obj_data[key] = value
 
+                    # Referenced objects flattened into `link.property` columns
+                    if resolved_references is not None:
+                        obj_data.update(resolved_references[i])
+                    elif references:
+                        obj_data.update(flatten_references(obj.references, properties=inline_properties))
+
                     # Append the object data to the result list
                     objects_dict.append(obj_data)
 
+            QUERY_ROWS.observe(len(objects_dict), collection=class_name, search_type=search_type)
+            current_span().set_attribute("rows", len(objects_dict))
             return objects_dict
 
         except Exception as e:
+            ERRORS.inc(operation="query", error_type=type(e).__name__)
             st.error(f"Query failed: {str(e)}")
             return None
+
+    def more_like_this(
+        self,
+        class_name,
+        uuid: str,
+        properties: list = None,
+        with_additional: list = DEFAULT_WITH_ADDITIONAL,
+        limit: int = DEFAULT_LIMIT,
+        tenant: str = None
+    ):
+        """Objects nearest to an existing object; reuses its stored vector, so no embedding call is made"""
+        with_additional = list(dict.fromkeys(["id", *with_additional]))
+        key = (self.connection_key, class_name, tenant, uuid, tuple(properties or ()), tuple(with_additional), limit)
+        rows = _similar_cache.get(key)
+        if rows is None:
+            # One extra result because the source object is its own nearest neighbour
+            rows = self.query(
+                class_name=class_name,
+                query=uuid,
+                properties=properties,
+                with_additional=with_additional,
+                limit=limit + 1,
+                search_type="near_object",
+                tenant=tenant
+            )
+            if rows is None:
+                return None
+            rows = [row for row in rows if row["id"] != uuid][:limit]
+            _similar_cache.set(key, rows)
+        return [dict(row) for row in rows]
+
+
+def query_flight() -> SingleFlight:
+    return _query_flight
+
+
+def get_session_weaviate() -> Weaviate:
+    """Connected client of the current session, created once and reused across reruns and pages"""
+    connection_settings = tuple(
+        st.session_state.get(key) for key in ("host", "port", "api_key", "llm_provider", "llm_api_key", "transport_profile")
+    )
+    weaviate = st.session_state.get("weaviate")
+    if (
+        weaviate is None
+        or st.session_state.get("weaviate_settings") != connection_settings
+        or getattr(weaviate, "client", None) is None
+        or not weaviate.client.is_connected()
+    ):
+        if weaviate is not None:
+            weaviate.close()
+        weaviate = Weaviate(
+            weaviate_host=st.session_state['host'], 
+            weaviate_port=st.session_state['port'], 
+            weaviate_api_key=st.session_state['api_key'],
+            llm_provider=st.session_state.get('llm_provider', 'OpenAI'),
+            llm_api_key=st.session_state.get('llm_api_key'),
+            transport_profile=st.session_state.get('transport_profile')
+        )
+        weaviate.connect()
+        st.session_state["weaviate"] = weaviate
+        st.session_state["weaviate_settings"] = connection_settings
+    return weaviate